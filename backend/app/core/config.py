@@ -15,11 +15,131 @@ class Settings(BaseSettings):
     github_client_id: Optional[str] = None
     github_client_secret: Optional[str] = None
     github_redirect_uri: str = "https://portreview.appwrite.network/auth/callback"
+    github_oauth_token_url: str = "https://github.com/login/oauth/access_token"
     
     # External APIs
     github_token: Optional[str] = None
+    # Extra comma-separated tokens; requests rotate across these and github_token
+    github_tokens: str = ""
     gemini_api_key: Optional[str] = None
     
+    # Shared LLM executor: max concurrent Gemini calls; extra calls queue
+    ai_max_concurrency: int = 8
+    
+    # LLM response cache keyed by hash(model + prompt); memory tier in front of Mongo
+    llm_cache_enabled: bool = True
+    llm_cache_ttl_seconds: int = 7 * 24 * 3600
+    llm_cache_max_entries: int = 1024
+    
+    # Portfolio analysis: "single_shot" (one combined prompt, per-feature calls only
+    # for sections that fail validation) or "multi_call" (one call per feature)
+    ai_analysis_mode: str = "single_shot"
+    ai_prompt_max_repositories: int = 30
+    
+    # Per-repository analysis fragments: refreshes only re-send repos whose metadata
+    # changed; past this share of changed repos the profile-level sections are regenerated
+    ai_fragment_batch_size: int = 10
+    ai_reanalysis_churn_threshold: float = 0.3
+
+    # GitHub HTTP client (shared connection pool); point the URLs at a local stub to test faults
+    github_api_url: str = "https://api.github.com"
+    github_http2: bool = True
+    github_max_connections: int = 20
+    github_max_keepalive_connections: int = 10
+    github_keepalive_expiry_seconds: float = 30.0
+    github_max_concurrent_requests_per_host: int = 10
+    github_request_timeout_seconds: float = 15.0
+    github_connect_timeout_seconds: float = 5.0
+    
+    # Rate-limit scheduler: keep this much headroom per token (capped at 10% of its
+    # limit); when every token is down to it, wait for the reset if it is this close
+    github_rate_limit_reserve: int = 50
+    github_rate_limit_max_wait_seconds: float = 30.0
+    
+    # Resilience: transient failures (timeouts, 5xx, secondary rate limits) are retried
+    # with jittered exponential backoff or Retry-After; after this many consecutive
+    # failures a host's circuit opens and calls fail fast until the reset period passes
+    github_retry_max_attempts: int = 3
+    github_retry_base_seconds: float = 0.5
+    github_retry_max_seconds: float = 60.0
+    github_circuit_failure_threshold: int = 5
+    github_circuit_reset_seconds: float = 30.0
+    # Per-call timeout for cheap per-repository probes (README, languages, commits)
+    github_probe_timeout_seconds: float = 5.0
+    
+    # README detection: "readme_endpoint" (1 request per repo) or "contents" (probe filenames)
+    github_readme_strategy: str = "readme_endpoint"
+    github_readme_concurrency: int = 16
+    
+    # Repository fetch mode: "rest" or "graphql" (graphql needs a GitHub token)
+    github_fetch_mode: str = "rest"
+    github_graphql_page_size: int = 50
+    
+    # Identical GitHub fetches share one in-flight call and reuse results briefly
+    github_memo_ttl_seconds: float = 60.0
+    github_memo_max_entries: int = 256
+    
+    # In-process tier in front of the Mongo analysis cache
+    analysis_cache_max_entries: int = 512
+    
+    # Stale-while-revalidate: serve instantly within the soft TTL, refresh in the
+    # background between soft and hard TTL, block for a fresh analysis after that
+    analysis_cache_soft_ttl_seconds: int = 6 * 3600
+    analysis_cache_hard_ttl_seconds: int = 24 * 3600
+    
+    # Key/value cache serialization: "json" or "msgpack" (falls back to json if msgpack is missing)
+    cache_serializer: str = "json"
+
+    # Background jobs (portfolio creation/refresh)
+    job_workers: int = 2
+    job_max_attempts: int = 3
+    job_retry_base_seconds: float = 5.0
+    job_retry_max_seconds: float = 300.0
+    job_poll_interval_seconds: float = 1.0
+    job_lock_timeout_seconds: int = 900
+    job_heartbeat_seconds: float = 60.0  # Must stay well under job_lock_timeout_seconds
+    job_retention_seconds: int = 7 * 24 * 3600
+
+    # In-process candidate search engine (when disabled or still loading, search runs in MongoDB).
+    # Picks up other processes' writes every refresh interval, full reload to drop deletions
+    search_engine_enabled: bool = True
+    search_engine_refresh_seconds: float = 10.0
+    search_engine_full_reload_seconds: float = 3600.0
+
+    # Offline BM25 text index over portfolios and users (custom_query and free-text search);
+    # rebuilt on this interval to pick up other processes' writes
+    text_index_enabled: bool = True
+    text_index_max_candidates: int = 1000  # First window of free-text hits filtered per page; grows until the page fills
+    text_index_reload_seconds: float = 900.0
+
+    # Ranked search result cache (per process): the first search_cache_depth ids of a
+    # search are kept and later pages sliced from them; local writes invalidate, the TTL
+    # bounds staleness from other processes
+    search_cache_enabled: bool = True
+    search_cache_depth: int = 500
+    search_cache_max_entries: int = 256
+    search_cache_ttl_seconds: float = 60.0
+
+    # Saved-search alerts: alert-enabled searches are compiled in memory and each indexed
+    # portfolio is tested only against those filed under its terms; saved-search changes
+    # are picked up every refresh, full reloads re-file searches by current term frequencies
+    search_alerts_enabled: bool = True
+    search_alert_refresh_seconds: float = 30.0
+    search_alert_full_reload_seconds: float = 3600.0
+
+    # Search suggestions mined from public portfolios, weighted by how many carry each label;
+    # local writes show up at the next rebuild, full reloads pick up other processes and deletions
+    autocomplete_enabled: bool = True
+    autocomplete_rebuild_seconds: float = 5.0
+    autocomplete_reload_seconds: float = 900.0
+    autocomplete_max_limit: int = 20
+    suggestions_cache_max_age_seconds: int = 60
+
+    # Recruiter batch analysis: concurrent analyses per batch, records per insert_many
+    recruitment_batch_concurrency: int = 8
+    recruitment_batch_insert_chunk: int = 25
+    recruitment_batch_max_candidates: int = 500
+
     # CORS - load from environment variable
     backend_cors_origins: str = "https://portreview.appwrite.network,http://localhost:3000"
     
@@ -32,6 +152,12 @@ class Settings(BaseSettings):
         """Convert CORS string to list"""
         return [origin.strip() for origin in self.backend_cors_origins.split(",")]
     
+    @property
+    def github_token_pool(self) -> List[str]:
+        """github_token plus github_tokens, de-duplicated"""
+        tokens = [self.github_token or ""] + self.github_tokens.split(",")
+        return list(dict.fromkeys(token.strip() for token in tokens if token.strip()))
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
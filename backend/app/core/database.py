@@ -1,4 +1,5 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import OperationFailure
 from app.core.config import settings
 from typing import Optional
 import logging
@@ -71,16 +72,53 @@ async def create_indexes():
         await database.portfolios.create_index([("created_at", -1)])
         await database.portfolios.create_index([("updated_at", -1)])
         
+        # Candidate search reads the denormalized search_index subdocument
+        await database.portfolios.create_index([("is_public", 1), ("search_index.skills", 1)])
+        await database.portfolios.create_index([("is_public", 1), ("search_index.languages", 1)])
+        await database.portfolios.create_index([("is_public", 1), ("search_index.fork_count", 1)])
+        await database.portfolios.create_index([("is_public", 1), ("search_index.overall_score", -1)])
+        await database.portfolios.create_index([("is_public", 1), ("search_index.repository_count", -1)])
+        await database.portfolios.create_index("search_index.version")
+        await database.portfolios.create_index("search_index.indexed_at")
+        
         # Review collection indexes
         await database.reviews.create_index("portfolio_id")
         await database.reviews.create_index("recruiter_id")
         await database.reviews.create_index([("created_at", -1)])
         await database.reviews.create_index([("rating", -1)])
         
-        # GitHub data collection indexes (for caching)
-        await database.github_cache.create_index("username", unique=True)
-        await database.github_cache.create_index([("last_updated", 1)], expireAfterSeconds=3600)  # 1 hour TTL
+        # Saved searches and the alerts recorded for them (one alert document per saved search)
+        await database.saved_searches.create_index("recruiter_id")
+        await database.saved_searches.create_index("updated_at")
+        await database.search_alerts.create_index("saved_search_id", unique=True)
+        await database.search_alerts.create_index([("recruiter_id", 1), ("last_triggered", -1)])
+        
+        # Key/value cache indexes (per-entry expiry via expires_at)
+        await database.cache_entries.create_index("namespace")
+        await ensure_ttl_index(database, "cache_entries", "expires_at", 0)
+        
+        # Background job queue indexes
+        await database.jobs.create_index([("status", 1), ("run_at", 1)])
+        await database.jobs.create_index("active_key", unique=True, sparse=True)
+        await database.jobs.create_index("idempotency_key")
+        await ensure_ttl_index(database, "jobs", "finished_at", settings.job_retention_seconds)
         
     except Exception as e:
         logger.error(f"Error creating indexes: {e}")
         raise
+
+async def ensure_ttl_index(database, collection_name: str, field: str, expire_after_seconds: int):
+    """Create a TTL index, or update its expiry if it already exists with another value."""
+    collection = database[collection_name]
+    try:
+        await collection.create_index([(field, 1)], expireAfterSeconds=expire_after_seconds)
+    except OperationFailure as e:
+        # IndexOptionsConflict: same key pattern, different expireAfterSeconds
+        if e.code != 85:
+            raise
+        await database.command(
+            "collMod",
+            collection_name,
+            index={"keyPattern": {field: 1}, "expireAfterSeconds": expire_after_seconds}
+        )
+        logger.info(f"Updated TTL on {collection_name}.{field} to {expire_after_seconds}s")
@@ -0,0 +1,185 @@
+from app.core.config import settings
+from typing import Any, Dict, List, Optional
+import asyncio
+import httpx
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class GitHubRateLimitExceeded(Exception):
+    """Every token's budget is spent and the next reset is too far away to wait for."""
+
+    def __init__(self, resource: str, reset_at: float):
+        self.resource = resource
+        self.reset_at = reset_at
+        super().__init__(f"GitHub {resource} rate limit exhausted for all tokens; resets in {self.retry_after}s")
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, int(self.reset_at - time.time()) + 1)
+
+class TokenBudget:
+    """Remaining request budget for one token on one GitHub rate-limit resource."""
+
+    def __init__(self, token: Optional[str], label: str, resource: str):
+        self.token = token
+        self.label = label
+        self.resource = resource
+        self.limit: Optional[int] = None  # Unknown until the first response
+        self.remaining: Optional[int] = None
+        self.reset_at = 0.0
+        self.in_flight = 0  # Sent but not yet reflected in the headers
+        self.requests = 0
+        self.exhausted_responses = 0
+
+    def headroom(self, now: float) -> float:
+        """Requests this token can still send before its budget runs out."""
+        if self.remaining is None:
+            return float("inf")
+        if now >= self.reset_at:
+            # The window rolled over since the last response
+            return self.limit - self.in_flight if self.limit else float("inf")
+        return self.remaining - self.in_flight
+
+    def reserve(self) -> int:
+        """Headroom kept back so other callers (and other processes) are not starved."""
+        if self.limit is None:
+            return 0
+        return min(settings.github_rate_limit_reserve, self.limit // 10)
+
+class GitHubRateLimiter:
+    """
+    Schedules GitHub API calls across a pool of tokens.
+
+    Budgets are tracked per (resource, token) from the X-RateLimit-* response
+    headers. Each request goes to the token with the most headroom; once every
+    token is down to its reserve, callers wait for the earliest reset (up to
+    `github_rate_limit_max_wait_seconds`) instead of burning the last requests
+    and getting 403s.
+    """
+
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+        self._budgets: Dict[str, List[TokenBudget]] = {}
+        self.waiting = 0
+        self.waits = 0
+        self.total_wait_seconds = 0.0
+        self.rejected = 0
+
+    @property
+    def has_tokens(self) -> bool:
+        return bool(self.tokens)
+
+    @staticmethod
+    def resource_for(url: str) -> str:
+        """GitHub meters GraphQL and search separately from the core REST API."""
+        if url.rstrip("/").endswith("/graphql"):
+            return "graphql"
+        if "/search/" in url:
+            return "search"
+        return "core"
+
+    def _pool(self, resource: str) -> List[TokenBudget]:
+        pool = self._budgets.get(resource)
+        if pool is None:
+            if self.tokens:
+                pool = [
+                    TokenBudget(token, f"token-{index + 1}:...{token[-4:]}", resource)
+                    for index, token in enumerate(self.tokens)
+                ]
+            else:
+                pool = [TokenBudget(None, "anonymous", resource)]
+            self._budgets[resource] = pool
+        return pool
+
+    async def acquire(self, resource: str = "core") -> TokenBudget:
+        """Pick the token with the most headroom, waiting for a reset if all are spent."""
+        pool = self._pool(resource)
+
+        while True:
+            now = time.time()
+            best = max(pool, key=lambda budget: budget.headroom(now))
+            if best.headroom(now) > best.reserve():
+                best.in_flight += 1
+                best.requests += 1
+                return best
+
+            reset_at = min(budget.reset_at for budget in pool)
+            wait = max(0.0, reset_at - now) + 1.0  # GitHub resets on whole seconds
+            if wait > settings.github_rate_limit_max_wait_seconds:
+                self.rejected += 1
+                raise GitHubRateLimitExceeded(resource, reset_at)
+
+            logger.warning(f"GitHub {resource} budget exhausted on all tokens - waiting {wait:.0f}s for reset")
+            self.waits += 1
+            self.waiting += 1
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self.waiting -= 1
+                self.total_wait_seconds += wait
+
+    def release(self, budget: TokenBudget, response: Optional[httpx.Response]) -> bool:
+        """
+        Record the budget reported by a response (None if the request failed).
+        Returns True if the response was a rate-limit rejection worth retrying on another token.
+        """
+        budget.in_flight = max(0, budget.in_flight - 1)
+        if response is None:
+            return False
+
+        headers = response.headers
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return False
+
+        resource = headers.get("X-RateLimit-Resource", budget.resource)
+        if resource != budget.resource:
+            # Endpoint metered differently than predicted; update the right bucket
+            budget = next(
+                (candidate for candidate in self._pool(resource) if candidate.token == budget.token),
+                budget
+            )
+
+        try:
+            budget.remaining = int(remaining)
+            budget.limit = int(headers.get("X-RateLimit-Limit", budget.limit or 0)) or budget.limit
+            budget.reset_at = float(headers.get("X-RateLimit-Reset", budget.reset_at))
+        except ValueError:
+            return False
+
+        if response.status_code in (403, 429) and budget.remaining == 0:
+            budget.exhausted_responses += 1
+            logger.warning(f"GitHub {resource} budget exhausted for {budget.label}")
+            return True
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-token budgets for each resource plus scheduler wait metrics."""
+        now = time.time()
+        resources = {}
+        for resource, pool in self._budgets.items():
+            resources[resource] = [
+                {
+                    "token": budget.label,
+                    "limit": budget.limit,
+                    "remaining": budget.remaining if now < budget.reset_at else budget.limit,
+                    "in_flight": budget.in_flight,
+                    "resets_in_seconds": max(0, int(budget.reset_at - now)),
+                    "requests": budget.requests,
+                    "exhausted_responses": budget.exhausted_responses
+                }
+                for budget in pool
+            ]
+
+        return {
+            "tokens": len(self.tokens),
+            "waiting": self.waiting,
+            "waits": self.waits,
+            "total_wait_seconds": round(self.total_wait_seconds, 1),
+            "rejected": self.rejected,
+            "resources": resources
+        }
+
+github_rate_limiter = GitHubRateLimiter(settings.github_token_pool)
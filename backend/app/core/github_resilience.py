@@ -0,0 +1,140 @@
+from app.core.config import settings
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+import httpx
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+# Worth retrying: GitHub is briefly unhealthy or overloaded
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+
+class GitHubUnavailable(Exception):
+    """The circuit breaker is open: GitHub has been failing, so calls fail fast."""
+
+    def __init__(self, host: str, retry_after: float):
+        self.host = host
+        self.retry_after = max(1, int(retry_after) + 1)
+        super().__init__(f"{host} is failing; not calling it for another {self.retry_after}s")
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one host.
+
+    Closed: calls flow. After `github_circuit_failure_threshold` failed calls in
+    a row it opens and rejects calls for `github_circuit_reset_seconds`; then a
+    single trial call is let through (half-open) and its outcome closes or
+    re-opens the circuit.
+    """
+
+    def __init__(self, host: str):
+        self.host = host
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def before_call(self):
+        """Raise GitHubUnavailable if the call should not be attempted."""
+        if self.state == "closed":
+            return
+
+        elapsed = time.monotonic() - self.opened_at
+        if self.state == "open" and elapsed >= settings.github_circuit_reset_seconds:
+            self.state = "half_open"
+
+        if self.state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return
+
+        self.rejected += 1
+        raise GitHubUnavailable(self.host, settings.github_circuit_reset_seconds - elapsed)
+
+    def record_success(self):
+        if self.state != "closed":
+            logger.info(f"Circuit for {self.host} closed")
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+
+    def record_abandoned(self):
+        """The call was cancelled before an outcome; let another trial through."""
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self.trial_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= settings.github_circuit_failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+                logger.warning(f"Circuit for {self.host} opened after {self.consecutive_failures} consecutive failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected
+        }
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def circuit_breaker(host: str) -> CircuitBreaker:
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = CircuitBreaker(host)
+        _breakers[host] = breaker
+    return breaker
+
+def get_circuit_stats() -> Dict[str, Any]:
+    return {host: breaker.get_stats() for host, breaker in _breakers.items()}
+
+def is_secondary_rate_limit(response: httpx.Response) -> bool:
+    """
+    403/429 that is not primary budget exhaustion (remaining > 0): GitHub's
+    abuse-detection limits, which say how long to back off via Retry-After.
+    """
+    if response.status_code not in (403, 429):
+        return False
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        return False
+    return "Retry-After" in response.headers or "secondary rate limit" in response.text.lower()
+
+def is_retryable_response(response: httpx.Response) -> bool:
+    return response.status_code in RETRYABLE_STATUS_CODES or is_secondary_rate_limit(response)
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse Retry-After (seconds or HTTP date)."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """
+    Delay before retry number `attempt` (1-based): Retry-After when GitHub sends
+    one, otherwise full-jitter exponential backoff. Capped at github_retry_max_seconds.
+    """
+    if response is not None:
+        retry_after = retry_after_seconds(response)
+        if retry_after is not None:
+            return min(retry_after, settings.github_retry_max_seconds)
+        if is_secondary_rate_limit(response):
+            # GitHub asks for at least a minute when it gives no Retry-After
+            return min(60.0, settings.github_retry_max_seconds)
+
+    ceiling = min(settings.github_retry_max_seconds, settings.github_retry_base_seconds * (2 ** (attempt - 1)))
+    return random.uniform(0, ceiling)
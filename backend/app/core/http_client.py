@@ -0,0 +1,58 @@
+import httpx
+from app.core.config import settings
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HTTPClients:
+    github: Optional[httpx.AsyncClient]
+
+    def __init__(self):
+        self.github = None
+
+http_clients = HTTPClients()
+
+def _create_github_client() -> httpx.AsyncClient:
+    """Build the pooled client used for all GitHub API traffic."""
+    limits = httpx.Limits(
+        max_connections=settings.github_max_connections,
+        max_keepalive_connections=settings.github_max_keepalive_connections,
+        keepalive_expiry=settings.github_keepalive_expiry_seconds
+    )
+    timeout = httpx.Timeout(
+        settings.github_request_timeout_seconds,
+        connect=settings.github_connect_timeout_seconds
+    )
+
+    http2 = settings.github_http2
+    if http2:
+        try:
+            import h2  # noqa: F401  (httpx needs the h2 package for HTTP/2)
+        except ImportError:
+            logger.warning("HTTP/2 requested for GitHub client but 'h2' is not installed - falling back to HTTP/1.1")
+            http2 = False
+
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+async def init_http_client():
+    """Create the process-wide GitHub connection pool."""
+    if http_clients.github is None or http_clients.github.is_closed:
+        http_clients.github = _create_github_client()
+        logger.info("GitHub HTTP connection pool created")
+
+async def close_http_client():
+    """Close the GitHub connection pool and release its sockets."""
+    if http_clients.github is not None and not http_clients.github.is_closed:
+        await http_clients.github.aclose()
+        logger.info("GitHub HTTP connection pool closed")
+    http_clients.github = None
+
+def get_github_client() -> httpx.AsyncClient:
+    """
+    Get the shared GitHub client.
+    Created lazily if the startup hook has not run (scripts, workers).
+    """
+    if http_clients.github is None or http_clients.github.is_closed:
+        http_clients.github = _create_github_client()
+    return http_clients.github
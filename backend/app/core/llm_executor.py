@@ -0,0 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class LLMExecutor:
+    """
+    Process-wide bounded pool for blocking LLM SDK calls.
+
+    At most `ai_max_concurrency` calls run at once; extra callers wait on a
+    semaphore (the queue) instead of spawning new threads.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.queued = 0
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix="llm"
+            )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run a blocking call in the shared pool, waiting for a free slot."""
+        semaphore = self._get_semaphore()
+
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        queued_at = time.monotonic()
+        try:
+            await semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        started_at = time.monotonic()
+        self.total_wait_seconds += started_at - queued_at
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), fn, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_run_seconds += time.monotonic() - started_at
+            semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and throughput metrics."""
+        finished = self.completed + self.failed
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self.total_wait_seconds / finished * 1000, 1) if finished else 0.0,
+            "avg_run_ms": round(self.total_run_seconds / finished * 1000, 1) if finished else 0.0
+        }
+
+    def shutdown(self):
+        """Stop the worker threads (called on application shutdown)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            logger.info("LLM executor shut down")
+
+llm_executor = LLMExecutor(settings.ai_max_concurrency)
@@ -0,0 +1,31 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+ProgressListener = Callable[[str, Dict[str, Any]], None]
+
+# Set by streaming endpoints; inherited by tasks spawned from the same context
+_progress_listener: ContextVar[Optional[ProgressListener]] = ContextVar("progress_listener", default=None)
+
+def report_progress(stage: str, data: Optional[Dict[str, Any]] = None):
+    """Tell the current listener (if any) that a pipeline stage completed."""
+    listener = _progress_listener.get()
+    if listener is None:
+        return
+    try:
+        listener(stage, data or {})
+    except Exception as e:
+        # A broken listener must never fail the pipeline it observes
+        logger.warning(f"Progress listener failed for stage {stage}: {e}")
+
+@contextmanager
+def listen_progress(listener: ProgressListener):
+    """Route report_progress calls made in this context to listener."""
+    token = _progress_listener.set(listener)
+    try:
+        yield
+    finally:
+        _progress_listener.reset(token)
@@ -1,8 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import auth, users, portfolios, reviews, search, github_ai, github_stats, analytics, auto_portfolio, recruitment_ai
+from .routers import auth, users, portfolios, reviews, search, github_ai, github_stats, analytics, auto_portfolio, recruitment_ai, jobs
 from .routers import auth_secure  # Import secure auth router
 from app.core.database import init_db
+from app.core.http_client import init_http_client, close_http_client
+from app.core.llm_executor import llm_executor
+from app.services.job_service import job_service
+from app.services.search_service import search_service
+from app.services.candidate_search_engine import candidate_search_engine
+from app.services.text_index_service import text_index_service
+from app.services.search_alert_service import search_alert_service
+from app.services.autocomplete_service import autocomplete_service
 from app.core.config import settings
 from app.middleware.security import setup_security_middleware
 
@@ -29,11 +37,19 @@ app.include_router(github_stats.router, prefix="/api/github", tags=["github-stat
 app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
 app.include_router(auto_portfolio.router, tags=["auto-portfolio"])
 app.include_router(recruitment_ai.router, tags=["recruitment-ai"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database and services on startup."""
     await init_db()
+    await init_http_client()
+    await job_service.start()
+    await search_service.enqueue_backfill()
+    await candidate_search_engine.start()
+    await text_index_service.start()
+    await search_alert_service.start()
+    await autocomplete_service.start()
     print("🚀 PortReviewer API started successfully with enhanced security!")
     print("🛡️  Security features enabled:")
     print("   - httpOnly cookies for tokens")
@@ -46,6 +62,13 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up resources on shutdown."""
+    await candidate_search_engine.stop()
+    await text_index_service.stop()
+    await search_alert_service.stop()
+    await autocomplete_service.stop()
+    await job_service.stop()
+    await close_http_client()
+    llm_executor.shutdown()
     print("👋 PortReviewer API shutting down...")
 
 @app.get("/", tags=["root"])
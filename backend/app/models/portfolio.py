@@ -48,6 +48,17 @@ class CodeCraftsmanshipScore(BaseModel):
     analyzed_repositories: int = Field(default=0, description="Number of repositories analyzed")
     analysis_date: datetime = Field(default_factory=datetime.utcnow)
 
+class RepositoryAnalysisFragment(BaseModel):
+    """Per-repository AI assessment, reused until the repository's metadata changes."""
+    description: str = Field(default="", description="AI-written project description")
+    code_quality_score: float = Field(..., ge=0, le=100)
+    documentation_score: float = Field(..., ge=0, le=100)
+    testing_score: float = Field(..., ge=0, le=100)
+    project_structure_score: float = Field(..., ge=0, le=100)
+    strengths: List[str] = Field(default_factory=list)
+    improvement_areas: List[str] = Field(default_factory=list)
+    recommendations: List[str] = Field(default_factory=list)
+
 class AIProfileAnalysis(BaseModel):
     """AI-powered profile analysis model."""
     technical_skills: Dict[str, float] = Field(default_factory=dict, description="Skills with confidence scores")
@@ -109,6 +120,8 @@ class Portfolio(PortfolioBase):
     ai_generated_content: Optional[AIGeneratedContent] = None
     code_craftsmanship_score: Optional[CodeCraftsmanshipScore] = None
     recruiter_insights: Optional[RecruiterInsights] = None
+    analysis_timings: Optional[Dict[str, Any]] = None
+    analysis_job_id: Optional[str] = None
     
     # Portfolio metadata
     view_count: int = 0
@@ -116,6 +129,12 @@ class Portfolio(PortfolioBase):
     created_at: datetime
     updated_at: datetime
 
+class PortfolioCreateAccepted(BaseModel):
+    """Response for a created portfolio whose analysis is running as a background job."""
+    portfolio: Portfolio
+    job_id: Optional[str] = None
+    status_url: Optional[str] = None
+
 class PortfolioPublic(BaseModel):
     """Public portfolio model (developer-facing view)."""
     id: str
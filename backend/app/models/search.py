@@ -28,6 +28,7 @@ class SearchCriteria(BaseModel):
     # Results configuration
     limit: int = Field(default=20, le=100)
     offset: int = Field(default=0, ge=0)
+    cursor: Optional[str] = None  # next_cursor from the previous page; takes precedence over offset
     sort_by: str = Field(default="relevance")  # relevance, score, created_at
     sort_order: str = Field(default="desc")  # asc, desc
 
@@ -49,6 +50,7 @@ class SearchResponse(BaseModel):
     search_time_ms: int
     filters_applied: Dict[str, Any]
     suggestions: List[str] = Field(default_factory=list, description="Search suggestions")
+    next_cursor: Optional[str] = Field(default=None, description="Pass as criteria.cursor to fetch the next page")
     
 class SavedSearch(BaseModel):
     """Saved search model for recruiters."""
@@ -4,10 +4,15 @@ Implements USP-focused endpoints for automatic portfolio generation
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from app.core.database import get_database
 from app.services.auto_portfolio_service import AutoPortfolioService
+from app.routers.auth import get_current_user
+from app.models.user import User
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator
+import json
 
 router = APIRouter(prefix="/api/auto-portfolio", tags=["auto-portfolio"])
 
@@ -17,9 +22,56 @@ class GitHubPortfolioRequest(BaseModel):
 class PortfolioRefreshRequest(BaseModel):
     portfolio_id: str
 
-@router.post("/create-from-github")
+def _build_demo_preview(
+    github_username: str,
+    github_data: Dict[str, Any],
+    ai_insights: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Shape extracted GitHub data and AI insights into the demo preview response."""
+    user_profile = github_data.get("user_profile", {})
+    portfolio_content = ai_insights.get("portfolio_content", {})
+    craftsmanship = ai_insights.get("craftsmanship_score", {})
+    
+    return {
+        "demo_preview": True,
+        "github_username": github_username,
+        "preview_data": {
+            "suggested_title": portfolio_content.get("suggested_title", f"{user_profile.get('name', github_username)} - Developer Portfolio"),
+            "ai_generated_bio": portfolio_content.get("bio", "Bio generation in progress..."),
+            "craftsmanship_score": craftsmanship.get("overall_score", "Calculating..."),
+            "total_repositories": len(github_data.get("repositories", [])),
+            "primary_languages": [lang["language"] for lang in github_data.get("activity_stats", {}).get("top_languages", [])[:5]],
+            "high_impact_projects": len(github_data.get("repository_analysis", {}).get("high_impact_projects", [])),
+            "interview_questions_count": len(ai_insights.get("interview_questions", []))
+        },
+        "value_proposition": [
+            f"🚀 Instant portfolio creation from {len(github_data.get('repositories', []))} repositories",
+            f"🎯 AI-powered insights and {craftsmanship.get('overall_score', 0)}/100 quality score",
+            f"💼 Recruiter-ready with {len(ai_insights.get('interview_questions', []))} custom interview questions",
+            f"📈 Skill progression tracking across {github_data.get('skill_progression', {}).get('years_coding', 0)} years"
+        ],
+        "call_to_action": "Create your auto-generated portfolio now - no manual work required!"
+    }
+
+def _sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+async def _event_stream(service: AutoPortfolioService, run) -> AsyncIterator[str]:
+    async for event, data in service.stream_progress(run):
+        yield _sse(event, data)
+
+def _streaming_response(service: AutoPortfolioService, run) -> StreamingResponse:
+    return StreamingResponse(
+        _event_stream(service, run),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/create-from-github", status_code=status.HTTP_202_ACCEPTED)
 async def create_portfolio_from_github(
     request: GitHubPortfolioRequest,
+    current_user: User = Depends(get_current_user),
     db = Depends(get_database)
 ) -> Dict[str, Any]:
     """
@@ -27,54 +79,55 @@ async def create_portfolio_from_github(
     
     Creates a complete professional portfolio automatically from GitHub username alone.
     No manual input required - AI analyzes repositories, commits, and generates content.
+    Generation runs as a background job owned by the caller; poll `status_url` until it succeeds.
     """
     try:
         service = AutoPortfolioService(db)
         
-        # For demo purposes, using a dummy user_id
-        # In production, this would come from authentication
-        user_id = "demo_user_123"
-        
-        result = await service.create_auto_portfolio_from_github(
-            user_id=user_id,
+        job = await service.enqueue_create(
+            user_id=str(current_user.id),
             github_username=request.github_username
         )
         
-        if result["success"]:
-            return {
-                "message": "🚀 Portfolio auto-generated successfully!",
-                "portfolio_id": result["portfolio_id"],
-                "portfolio_url": result["portfolio_url"],
-                "features_generated": [
-                    "✅ Professional bio and summary",
-                    "✅ Project descriptions and highlights", 
-                    "✅ Skills analysis and technical stack",
-                    "✅ Code craftsmanship score",
-                    "✅ Recruiter-ready insights",
-                    "✅ Interview questions based on your code"
-                ],
-                "auto_generated_content": result.get("auto_generated_content", {}),
-                "craftsmanship_score": result.get("craftsmanship_score", {}),
-                "next_steps": [
-                    "Share your portfolio link with recruiters",
-                    "Customize the generated content if needed",
-                    "Keep coding - portfolio auto-updates from GitHub!"
-                ]
-            }
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=result.get("error", "Portfolio generation failed")
-            )
+        return {
+            "message": "🚀 Portfolio generation started!",
+            "job_id": job["id"],
+            "status": job["status"],
+            "status_url": job["status_url"]
+        }
             
-    except HTTPException:
-        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Portfolio generation failed: {str(e)}"
         )
 
+@router.post("/create-from-github/stream")
+async def create_portfolio_from_github_stream(
+    request: GitHubPortfolioRequest,
+    current_user: User = Depends(get_current_user),
+    db = Depends(get_database)
+) -> StreamingResponse:
+    """
+    Streaming variant of create-from-github; the portfolio is owned by the caller.
+    
+    Emits Server-Sent Events as each stage completes (repo_page, readmes_checked,
+    github_profile, github_analysis, ai_section, portfolio_saved), then a final
+    `complete` event with the result or an `error` event.
+    """
+    service = AutoPortfolioService(db)
+    
+    async def run() -> Dict[str, Any]:
+        result = await service.create_auto_portfolio_from_github(
+            user_id=str(current_user.id),
+            github_username=request.github_username
+        )
+        if not result["success"]:
+            raise RuntimeError(result.get("error", "Portfolio generation failed"))
+        return result
+    
+    return _streaming_response(service, run)
+
 @router.get("/insights/{portfolio_id}")
 async def get_portfolio_insights(
     portfolio_id: str,
@@ -124,32 +177,29 @@ async def get_portfolio_insights(
             detail=f"Failed to get portfolio insights: {str(e)}"
         )
 
-@router.post("/refresh")
+@router.post("/refresh", status_code=status.HTTP_202_ACCEPTED)
 async def refresh_portfolio_from_github(
     request: PortfolioRefreshRequest,
+    current_user: User = Depends(get_current_user),
     db = Depends(get_database)
 ) -> Dict[str, Any]:
     """
     Refresh portfolio with latest GitHub data and regenerate AI insights.
     
     Perfect for keeping portfolios up-to-date as developers add new projects
-    and improve existing code. All insights are regenerated automatically.
+    and improve existing code. All insights are regenerated in a background job.
     """
     try:
         service = AutoPortfolioService(db)
-        result = await service.refresh_portfolio_from_github(request.portfolio_id)
+        result = await service.enqueue_refresh(request.portfolio_id, str(current_user.id))
         
         if result["success"]:
+            job = result["job"]
             return {
-                "message": "🔄 Portfolio refreshed successfully!",
-                "updated_at": result["updated_at"],
-                "refreshed_features": [
-                    "✅ Latest GitHub repositories analyzed",
-                    "✅ Updated code craftsmanship score",
-                    "✅ Regenerated project descriptions",
-                    "✅ Updated skill progression timeline",
-                    "✅ New interview questions generated"
-                ]
+                "message": "🔄 Portfolio refresh started!",
+                "job_id": job["id"],
+                "status": job["status"],
+                "status_url": job["status_url"]
             }
         else:
             raise HTTPException(
@@ -179,33 +229,10 @@ async def demo_portfolio_preview(
         
         # Extract GitHub data without creating portfolio
         github_data = await service._extract_comprehensive_github_data(github_username)
+        github_data.pop("sync_state", None)  # Previews are not persisted
         ai_insights = await service._generate_comprehensive_ai_insights(github_data)
         
-        # Generate preview
-        user_profile = github_data.get("user_profile", {})
-        portfolio_content = ai_insights.get("portfolio_content", {})
-        craftsmanship = ai_insights.get("craftsmanship_score", {})
-        
-        return {
-            "demo_preview": True,
-            "github_username": github_username,
-            "preview_data": {
-                "suggested_title": portfolio_content.get("suggested_title", f"{user_profile.get('name', github_username)} - Developer Portfolio"),
-                "ai_generated_bio": portfolio_content.get("bio", "Bio generation in progress..."),
-                "craftsmanship_score": craftsmanship.get("overall_score", "Calculating..."),
-                "total_repositories": len(github_data.get("repositories", [])),
-                "primary_languages": [lang["language"] for lang in github_data.get("activity_stats", {}).get("top_languages", [])[:5]],
-                "high_impact_projects": len(github_data.get("repository_analysis", {}).get("high_impact_projects", [])),
-                "interview_questions_count": len(ai_insights.get("interview_questions", []))
-            },
-            "value_proposition": [
-                f"🚀 Instant portfolio creation from {len(github_data.get('repositories', []))} repositories",
-                f"🎯 AI-powered insights and {craftsmanship.get('overall_score', 0)}/100 quality score",
-                f"💼 Recruiter-ready with {len(ai_insights.get('interview_questions', []))} custom interview questions",
-                f"📈 Skill progression tracking across {github_data.get('skill_progression', {}).get('years_coding', 0)} years"
-            ],
-            "call_to_action": "Create your auto-generated portfolio now - no manual work required!"
-        }
+        return _build_demo_preview(github_username, github_data, ai_insights)
         
     except Exception as e:
         raise HTTPException(
@@ -213,6 +240,25 @@ async def demo_portfolio_preview(
             detail=f"Demo preview failed: {str(e)}"
         )
 
+@router.get("/demo/{github_username}/stream")
+async def demo_portfolio_preview_stream(
+    github_username: str,
+    db = Depends(get_database)
+) -> StreamingResponse:
+    """
+    Streaming variant of the demo preview.
+    Emits the same stage events as create-from-github/stream, ending with the preview.
+    """
+    service = AutoPortfolioService(db)
+    
+    async def run() -> Dict[str, Any]:
+        github_data = await service._extract_comprehensive_github_data(github_username)
+        github_data.pop("sync_state", None)  # Previews are not persisted
+        ai_insights = await service._generate_comprehensive_ai_insights(github_data)
+        return _build_demo_preview(github_username, github_data, ai_insights)
+    
+    return _streaming_response(service, run)
+
 @router.get("/stats")
 async def get_platform_stats(
     db = Depends(get_database)
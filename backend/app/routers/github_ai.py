@@ -5,6 +5,8 @@ from typing import List, Dict, Any, Optional
 from app.services.github_service import GitHubService
 from app.services.ai_service import AIService
 from app.services.cache_service import cache_service
+from app.core.llm_executor import llm_executor
+from app.services.llm_cache_service import llm_response_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -64,97 +66,98 @@ class GitHubAnalysisResponse(BaseModel):
     repositories: List[GitHubRepo]
     ai_insights: AIInsights
     user_data: Dict[str, Any]  # Added user profile data
+    freshness: Optional[Dict[str, Any]] = None  # Cache status, age and background revalidation
+
+async def _build_profile_analysis(username: str) -> Dict[str, Any]:
+    """
+    Run the GitHub crawl and AI analysis for a user and return the cacheable result.
+    """
+    # Get GitHub repositories
+    repos_data = await github_service.get_user_repositories(username)
+    
+    # Get user profile data for additional stats
+    user_data = await github_service.get_user_data_public(username)
+    
+    # Convert to our format
+    repositories = []
+    for repo in repos_data:
+        repo_language = repo.get('language')
+        if repo_language is None:
+            repo_language = 'Unknown'
+        
+        repositories.append(GitHubRepo(
+            name=repo.get('name', ''),
+            description=repo.get('description', '') or '',
+            language=repo_language,
+            stars=repo.get('stargazers_count', 0),
+            forks=repo.get('forks_count', 0),
+            url=repo.get('html_url', '')
+        ))
+    
+    # Get AI analysis using available method
+    ai_analysis = await ai_service.analyze_profile(repos_data)
+    
+    # Extract and format AI insights with proper fallbacks
+    technical_skills = ai_analysis.get('technical_skills', {})
+    
+    # Calculate code quality score from the analysis
+    overall_quality = ai_analysis.get('project_quality_assessment', {}).get('overall_quality', 'moderate')
+    confidence = ai_analysis.get('analysis_confidence', 0.0)
+    
+    # Map quality to score
+    quality_scores = {'low': 0.3, 'moderate': 0.6, 'high': 0.85, 'excellent': 0.95}
+    base_score = quality_scores.get(overall_quality, 0.6)
+    code_quality_score = base_score * confidence * 100
+    
+    # Extract strengths and recommendations
+    specializations = ai_analysis.get('specializations', [])
+    strengths = specializations[:3] if specializations else ['Technical skills development needed']
+    
+    # Create recommendations based on analysis
+    recommendations = []
+    if ai_analysis.get('project_quality_assessment', {}).get('documentation_quality') == 'low':
+        recommendations.append('Improve project documentation and README files')
+    if ai_analysis.get('project_quality_assessment', {}).get('testing_evidence') == 'low':
+        recommendations.append('Add unit tests and testing coverage')
+    if not ai_analysis.get('collaboration_patterns', {}).get('contributes_to_open_source'):
+        recommendations.append('Contribute to open source projects to showcase collaboration skills')
+    
+    # Format AI insights
+    ai_insights = AIInsights(
+        code_quality_score=round(code_quality_score, 1),
+        technical_skills=technical_skills,
+        experience_level=ai_analysis.get('experience_level', 'Beginner'),
+        strengths=strengths,
+        recommendations=recommendations[:3] if recommendations else ['Continue building diverse projects']
+    )
+    
+    return {
+        "repositories": [repo.dict() for repo in repositories],
+        "ai_insights": ai_insights.dict(),
+        "user_data": user_data
+    }
 
 @router.post("/analyze", response_model=GitHubAnalysisResponse)
 async def analyze_github_profile(request: GitHubAnalyzeRequest):
     """
     Analyze a GitHub profile with AI insights and caching.
-    Uses cache to avoid repeated API calls for the same user.
+    Uses cache to avoid repeated API calls for the same user; concurrent
+    requests for the same user share one analysis. Stale entries are served
+    immediately and refreshed in the background.
     """
     try:
         username = request.username.lower()
         
-        # Check cache first
-        cached_result = await cache_service.get_analysis_cache(username)
-        if cached_result:
-            logger.info(f"Returning cached analysis for {username}")
-            # Convert cached data to response model
-            repositories = [GitHubRepo(**repo) for repo in cached_result.get("repositories", [])]
-            ai_insights = AIInsights(**cached_result.get("ai_insights", {}))
-            user_data = cached_result.get("user_data", {})
-            return GitHubAnalysisResponse(repositories=repositories, ai_insights=ai_insights, user_data=user_data)
-        
-        # Get GitHub repositories
-        repos_data = await github_service.get_user_repositories(request.username)
-        
-        # Get user profile data for additional stats
-        user_data = await github_service.get_user_data_public(request.username)
-        
-        # Convert to our format
-        repositories = []
-        for repo in repos_data:
-            repo_language = repo.get('language')
-            if repo_language is None:
-                repo_language = 'Unknown'
-            
-            repositories.append(GitHubRepo(
-                name=repo.get('name', ''),
-                description=repo.get('description', '') or '',
-                language=repo_language,
-                stars=repo.get('stargazers_count', 0),
-                forks=repo.get('forks_count', 0),
-                url=repo.get('html_url', '')
-            ))
-        
-        # Get AI analysis using available method
-        ai_analysis = await ai_service.analyze_profile(repos_data)
-        
-        # Extract and format AI insights with proper fallbacks
-        technical_skills = ai_analysis.get('technical_skills', {})
-        
-        # Calculate code quality score from the analysis
-        overall_quality = ai_analysis.get('project_quality_assessment', {}).get('overall_quality', 'moderate')
-        confidence = ai_analysis.get('analysis_confidence', 0.0)
-        
-        # Map quality to score
-        quality_scores = {'low': 0.3, 'moderate': 0.6, 'high': 0.85, 'excellent': 0.95}
-        base_score = quality_scores.get(overall_quality, 0.6)
-        code_quality_score = base_score * confidence * 100
-        
-        # Extract strengths and recommendations
-        specializations = ai_analysis.get('specializations', [])
-        strengths = specializations[:3] if specializations else ['Technical skills development needed']
-        
-        # Create recommendations based on analysis
-        recommendations = []
-        if ai_analysis.get('project_quality_assessment', {}).get('documentation_quality') == 'low':
-            recommendations.append('Improve project documentation and README files')
-        if ai_analysis.get('project_quality_assessment', {}).get('testing_evidence') == 'low':
-            recommendations.append('Add unit tests and testing coverage')
-        if not ai_analysis.get('collaboration_patterns', {}).get('contributes_to_open_source'):
-            recommendations.append('Contribute to open source projects to showcase collaboration skills')
-        
-        # Format AI insights
-        ai_insights = AIInsights(
-            code_quality_score=round(code_quality_score, 1),
-            technical_skills=technical_skills,
-            experience_level=ai_analysis.get('experience_level', 'Beginner'),
-            strengths=strengths,
-            recommendations=recommendations[:3] if recommendations else ['Continue building diverse projects']
+        analysis, freshness = await cache_service.get_or_compute_analysis(
+            username,
+            lambda: _build_profile_analysis(request.username)
         )
         
-        # Cache the result
-        cache_data = {
-            "repositories": [repo.dict() for repo in repositories],
-            "ai_insights": ai_insights.dict(),
-            "user_data": user_data
-        }
-        await cache_service.save_analysis_cache(username, cache_data)
-        
         return GitHubAnalysisResponse(
-            repositories=repositories,
-            ai_insights=ai_insights,
-            user_data=user_data
+            repositories=[GitHubRepo(**repo) for repo in analysis.get("repositories", [])],
+            ai_insights=AIInsights(**analysis.get("ai_insights", {})),
+            user_data=analysis.get("user_data", {}),
+            freshness=freshness
         )
         
     except Exception as e:
@@ -169,27 +172,23 @@ async def get_ai_suggestions(request: AISuggestionsRequest):
     try:
         username = request.username.lower()
         
-        # Get cached analysis or perform new analysis
-        cached_result = await cache_service.get_analysis_cache(username)
-        if not cached_result:
-            # No cached data, need fresh analysis
-            repos_data = await github_service.get_user_repositories(request.username)
-            if not repos_data:
-                raise HTTPException(status_code=404, detail=f"No repositories found for user {request.username}")
-            
-            analysis = await ai_service.analyze_profile(repos_data)
-            if "error" in analysis:
-                raise HTTPException(status_code=500, detail=f"AI analysis failed: {analysis['error']}")
-        else:
-            analysis = cached_result.get("ai_insights", {})
-            repos_data = [
-                {
-                    "name": repo["name"],
-                    "description": repo.get("description", ""),
-                    "language": repo.get("language", "")
-                }
-                for repo in cached_result.get("repositories", [])
-            ]
+        # Get cached analysis or perform (and cache) a new analysis
+        cached_result, _ = await cache_service.get_or_compute_analysis(
+            username,
+            lambda: _build_profile_analysis(request.username)
+        )
+        if not cached_result.get("repositories"):
+            raise HTTPException(status_code=404, detail=f"No repositories found for user {request.username}")
+        
+        analysis = cached_result.get("ai_insights", {})
+        repos_data = [
+            {
+                "name": repo["name"],
+                "description": repo.get("description", ""),
+                "language": repo.get("language", "")
+            }
+            for repo in cached_result.get("repositories", [])
+        ]
         
         if request.suggestion_type == "career":
             # Generate career recommendations
@@ -276,6 +275,19 @@ async def clear_user_cache(username: str):
         logger.error(f"Error clearing cache for {username}: {e}")
         raise HTTPException(status_code=500, detail="Failed to clear cache")
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Analysis cache hit/miss/eviction counters."""
+    return cache_service.get_stats()
+
+@router.get("/llm/stats")
+async def get_llm_stats():
+    """Shared LLM executor queue metrics and response cache hit rates."""
+    return {
+        "executor": llm_executor.get_stats(),
+        "response_cache": llm_response_cache.get_stats()
+    }
+
 @router.get("/user/{username}")
 async def get_github_user(username: str):
     """
@@ -1,11 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException
 from app.services.github_service import GitHubService
-from app.services.cache_service import CacheService
+from app.core.github_rate_limiter import GitHubRateLimitExceeded, github_rate_limiter
+from app.core.github_resilience import GitHubUnavailable, get_circuit_stats
+from app.services.cache_service import cache_service
 from app.services.ai_service import AIService
-from app.core.database import get_database
 from pydantic import BaseModel
 from typing import Dict, Any, List
-import json
 
 router = APIRouter()
 
@@ -27,53 +27,50 @@ async def analyze_github_profile(
     try:
         github_service = GitHubService()
         ai_service = AIService()
-        cache_service = CacheService()
         
         username = request.username
-        cache_key = f"github_analysis_{username}"
         
-        # Check cache first
-        cached_analysis = await cache_service.get_analysis_cache(username)
-        if cached_analysis:
-            return cached_analysis
-        
-        # Get repositories from GitHub
-        repos = await github_service.get_user_repositories(username)
-        if not repos:
-            raise HTTPException(status_code=404, detail=f"No repositories found for user {username}")
-        
-        # Get AI analysis
-        ai_analysis = await ai_service.analyze_profile(repos)
-        
-        # Ensure we have a code_quality_score
-        if not ai_analysis.get("code_quality_score"):
-            # Calculate a basic score based on repository metrics
-            total_stars = sum(repo.get("stargazers_count", 0) for repo in repos)
-            avg_stars = total_stars / max(len(repos), 1)
-            has_docs = sum(1 for repo in repos if repo.get("has_readme", False))
-            doc_ratio = has_docs / max(len(repos), 1)
+        async def build_analysis() -> Dict[str, Any]:
+            # Get repositories from GitHub
+            repos = await github_service.get_user_repositories(username)
+            if not repos:
+                raise HTTPException(status_code=404, detail=f"No repositories found for user {username}")
             
-            # Simple scoring algorithm
-            base_score = min(50, len(repos) * 2)  # Base score from number of repos
-            star_bonus = min(30, avg_stars * 5)   # Bonus from stars
-            doc_bonus = min(20, doc_ratio * 20)   # Bonus from documentation
+            # Get AI analysis
+            ai_analysis = await ai_service.analyze_profile(repos)
             
-            calculated_score = int(base_score + star_bonus + doc_bonus)
-            ai_analysis["code_quality_score"] = calculated_score
-        
-        # Format response
-        analysis_result = {
-            "username": username,
-            "repositories_count": len(repos),
-            "repositories": repos[:10],  # Top 10 repos
-            "ai_insights": ai_analysis,
-            "timestamp": "2025-09-05T00:00:00Z"
-        }
-        
-        # Cache for 6 hours
-        await cache_service.save_analysis_cache(username, analysis_result)
+            # Ensure we have a code_quality_score
+            if not ai_analysis.get("code_quality_score"):
+                # Calculate a basic score based on repository metrics
+                total_stars = sum(repo.get("stargazers_count", 0) for repo in repos)
+                avg_stars = total_stars / max(len(repos), 1)
+                has_docs = sum(1 for repo in repos if repo.get("has_readme", False))
+                doc_ratio = has_docs / max(len(repos), 1)
+                
+                # Simple scoring algorithm
+                base_score = min(50, len(repos) * 2)  # Base score from number of repos
+                star_bonus = min(30, avg_stars * 5)   # Bonus from stars
+                doc_bonus = min(20, doc_ratio * 20)   # Bonus from documentation
+                
+                calculated_score = int(base_score + star_bonus + doc_bonus)
+                ai_analysis["code_quality_score"] = calculated_score
+            
+            # Format response
+            return {
+                "username": username,
+                "repositories_count": len(repos),
+                "repositories": repos[:10],  # Top 10 repos
+                "ai_insights": ai_analysis,
+                "timestamp": "2025-09-05T00:00:00Z"
+            }
         
-        return analysis_result
+        # Cached with stale-while-revalidate; concurrent requests share one analysis
+        analysis_result, freshness = await cache_service.get_or_compute_analysis(
+            username,
+            build_analysis,
+            namespace="repo_analysis"
+        )
+        return {**analysis_result, "freshness": freshness}
         
     except HTTPException:
         raise
@@ -102,36 +99,33 @@ async def get_github_suggestions(
     try:
         github_service = GitHubService()
         ai_service = AIService()
-        cache_service = CacheService()
         
         username = request.username
         suggestion_type = request.suggestion_type
-        cache_key = f"github_suggestions_{suggestion_type}_{username}"
-        
-        # Check cache first
-        cached_suggestions = await cache_service.get_analysis_cache(f"suggestions_{suggestion_type}_{username}")
-        if cached_suggestions:
-            return cached_suggestions
         
-        # Get repositories from GitHub
-        repos = await github_service.get_user_repositories(username)
-        if not repos:
-            raise HTTPException(status_code=404, detail=f"No repositories found for user {username}")
-        
-        # Generate different types of suggestions
-        if suggestion_type == "career":
-            suggestions_result = await _generate_career_suggestions(ai_service, repos, username)
-        elif suggestion_type == "technical":
-            suggestions_result = await _generate_technical_suggestions(ai_service, repos, username)
-        elif suggestion_type == "portfolio":
-            suggestions_result = await _generate_portfolio_suggestions(ai_service, repos, username)
-        else:
-            suggestions_result = await _generate_career_suggestions(ai_service, repos, username)
-        
-        # Cache for 6 hours
-        await cache_service.save_analysis_cache(f"suggestions_{suggestion_type}_{username}", suggestions_result)
-        
-        return suggestions_result
+        async def build_suggestions() -> Dict[str, Any]:
+            # Get repositories from GitHub
+            repos = await github_service.get_user_repositories(username)
+            if not repos:
+                raise HTTPException(status_code=404, detail=f"No repositories found for user {username}")
+            
+            # Generate different types of suggestions
+            if suggestion_type == "career":
+                return await _generate_career_suggestions(ai_service, repos, username)
+            elif suggestion_type == "technical":
+                return await _generate_technical_suggestions(ai_service, repos, username)
+            elif suggestion_type == "portfolio":
+                return await _generate_portfolio_suggestions(ai_service, repos, username)
+            else:
+                return await _generate_career_suggestions(ai_service, repos, username)
+        
+        # Cached with stale-while-revalidate; concurrent requests share one generation
+        suggestions_result, freshness = await cache_service.get_or_compute_analysis(
+            f"{suggestion_type}:{username}",
+            build_suggestions,
+            namespace="suggestions"
+        )
+        return {**suggestions_result, "freshness": freshness}
         
     except HTTPException:
         raise
@@ -281,25 +275,39 @@ def _generate_fallback_suggestions(username: str, suggestion_type: str) -> Dict[
             "improvement_tips": ["Add project demos", "Improve documentation", "Showcase your best work"]
         }
 
+def github_unavailable_error(error) -> HTTPException:
+    """
+    429 when the GitHub budget is spent, 503 while GitHub's circuit is open;
+    Retry-After tells the client when to come back.
+    """
+    return HTTPException(
+        status_code=429 if isinstance(error, GitHubRateLimitExceeded) else 503,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+@router.get("/rate-limit")
+async def get_rate_limit_status():
+    """Remaining GitHub API budget per pooled token, scheduler waits and circuit breaker state."""
+    return {
+        **github_rate_limiter.get_stats(),
+        "circuits": get_circuit_stats()
+    }
+
 @router.get("/stats/{username}")
-async def get_github_stats(
-    username: str,
-    db=Depends(get_database)
-):
+async def get_github_stats(username: str):
     """
     Get comprehensive GitHub statistics for a user.
     Results are cached for 1 hour to reduce API calls.
     """
     try:
-        cache_service = CacheService(db)
         github_service = GitHubService()
         
         # Check cache first
-        cache_key = f"github_stats_{username}"
-        cached_stats = await cache_service.get(cache_key)
+        cached_stats = await cache_service.get(username, namespace="github_stats")
         
         if cached_stats:
-            return json.loads(cached_stats)
+            return cached_stats
         
         # Fetch fresh data from GitHub
         activity_stats = await github_service.get_user_activity_stats(username)
@@ -308,6 +316,8 @@ async def get_github_stats(
         try:
             # Try to get user data without token first (public data)
             user_data = await github_service.get_user_data_public(username)
+        except (GitHubRateLimitExceeded, GitHubUnavailable):
+            raise
         except:
             # If that fails, use basic info
             user_data = {
@@ -333,13 +343,17 @@ async def get_github_stats(
         
         # Cache for 1 hour
         await cache_service.set(
-            cache_key, 
-            json.dumps(comprehensive_stats, default=str), 
-            expire_seconds=3600
+            username,
+            comprehensive_stats,
+            expire_seconds=3600,
+            namespace="github_stats"
         )
         
         return comprehensive_stats
         
+    except (GitHubRateLimitExceeded, GitHubUnavailable) as e:
+        # Mock numbers would be mistaken for real ones; let the client retry after the reset
+        raise github_unavailable_error(e)
     except Exception as e:
         # Return mock data if GitHub API fails
         return get_mock_github_stats(username)
@@ -349,9 +363,15 @@ async def estimate_total_commits(github_service: GitHubService, username: str) -
     Estimate total commits by sampling recent repositories.
     """
     try:
-        repos = await github_service.get_user_repositories(username, per_page=10)
+        # Same call as get_user_activity_stats, so it is served from the shared fetch
+        repos = await github_service.get_user_repositories(username)
+
+        # GraphQL mode already carries exact default-branch commit totals
+        if repos and all(repo.get("commit_count") is not None for repo in repos):
+            return sum(repo["commit_count"] for repo in repos)
+
         total_commits = 0
-        
+
         for repo in repos[:5]:  # Sample first 5 repos to avoid rate limits
             commits = await github_service.get_repository_commits(
                 username, 
@@ -398,33 +418,34 @@ def get_mock_github_stats(username: str) -> Dict[str, Any]:
 @router.get("/repositories/{username}")
 async def get_user_repositories(
     username: str,
-    per_page: int = 20,
-    db=Depends(get_database)
+    per_page: int = 20
 ):
     """
     Get user's repositories with caching.
     """
     try:
-        cache_service = CacheService(db)
         github_service = GitHubService()
         
-        cache_key = f"github_repos_{username}_{per_page}"
-        cached_repos = await cache_service.get(cache_key)
+        cache_key = f"{username}:{per_page}"
+        cached_repos = await cache_service.get(cache_key, namespace="github_repos")
         
         if cached_repos:
-            return {"repositories": json.loads(cached_repos)}
+            return {"repositories": cached_repos}
         
         repos = await github_service.get_user_repositories(username, per_page)
         
         # Cache for 30 minutes
         await cache_service.set(
-            cache_key, 
-            json.dumps(repos, default=str), 
-            expire_seconds=1800
+            cache_key,
+            repos,
+            expire_seconds=1800,
+            namespace="github_repos"
         )
         
         return {"repositories": repos}
         
+    except (GitHubRateLimitExceeded, GitHubUnavailable) as e:
+        raise github_unavailable_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch repositories: {str(e)}")
 
@@ -451,6 +472,8 @@ async def get_github_user_data(username: str):
         
     except HTTPException:
         raise
+    except (GitHubRateLimitExceeded, GitHubUnavailable) as e:
+        raise github_unavailable_error(e)
     except Exception as e:
         # Log the full error for debugging
         import traceback
@@ -459,21 +482,15 @@ async def get_github_user_data(username: str):
         raise HTTPException(status_code=500, detail=f"Failed to fetch user data: {str(e)}")
 
 @router.get("/activity/{username}")
-async def get_user_activity(
-    username: str,
-    db=Depends(get_database)
-):
+async def get_user_activity(username: str):
     """
     Get user's recent GitHub activity.
     """
     try:
-        cache_service = CacheService(db)
-        
-        cache_key = f"github_activity_{username}"
-        cached_activity = await cache_service.get(cache_key)
+        cached_activity = await cache_service.get(username, namespace="github_activity")
         
         if cached_activity:
-            return {"activities": json.loads(cached_activity)}
+            return {"activities": cached_activity}
         
         # For now, return mock activity data
         # In production, you would fetch from GitHub Events API
@@ -496,9 +513,10 @@ async def get_user_activity(
         
         # Cache for 15 minutes
         await cache_service.set(
-            cache_key,
-            json.dumps(mock_activities),
-            expire_seconds=900
+            username,
+            mock_activities,
+            expire_seconds=900,
+            namespace="github_activity"
         )
         
         return {"activities": mock_activities}
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, HTTPException, Depends, status
+from app.services.job_service import job_service
+from app.routers.auth import get_current_user
+from app.models.user import User
+from typing import Dict, Any
+
+router = APIRouter()
+
+@router.get("/{job_id}")
+async def get_job_status(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get the status of one of the current user's background jobs.
+    `status` is one of queued, running, succeeded or failed; `result` is set on success.
+    """
+    job = await job_service.get_job(job_id)
+    # Other users' (and internal) jobs are reported as missing rather than forbidden
+    if not job or job["user_id"] is None or job["user_id"] != str(current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
@@ -1,8 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Query
-from app.models.portfolio import PortfolioCreate, Portfolio, PortfolioUpdate, PortfolioPublic
+from app.models.portfolio import PortfolioCreate, Portfolio, PortfolioUpdate, PortfolioPublic, PortfolioCreateAccepted
 from app.services.portfolio_service import PortfolioService
-from app.services.github_service import GitHubService
-from app.services.ai_service import AIService
 from app.routers.auth import get_current_active_user
 from app.models.user import User
 from app.core.database import get_database
@@ -11,7 +9,7 @@ from bson import ObjectId
 
 router = APIRouter()
 
-@router.post("/", response_model=Portfolio)
+@router.post("/", response_model=PortfolioCreateAccepted, status_code=status.HTTP_202_ACCEPTED)
 async def create_portfolio(
     portfolio_data: PortfolioCreate,
     current_user: User = Depends(get_current_active_user),
@@ -19,6 +17,7 @@ async def create_portfolio(
 ):
     """
     Create a new portfolio for the current user.
+    The GitHub/AI analysis runs as a background job; poll `status_url` for progress.
     """
     if current_user.user_type != "developer":
         raise HTTPException(
@@ -27,37 +26,18 @@ async def create_portfolio(
         )
     
     portfolio_service = PortfolioService(db)
-    github_service = GitHubService()
-    ai_service = AIService()
     
     try:
-        # Create initial portfolio
         portfolio = await portfolio_service.create_portfolio(
             user_id=current_user.id,
             portfolio_data=portfolio_data
         )
         
-        # Analyze GitHub repositories if GitHub username is provided
-        if current_user.github_username:
-            repositories = await github_service.get_user_repositories(
-                current_user.github_username
-            )
-            
-            # Get AI insights for the repositories
-            ai_insights = await ai_service.analyze_repositories(repositories)
-            
-            # Update portfolio with GitHub data and AI insights
-            update_data = PortfolioUpdate(
-                github_repositories=repositories,
-                ai_insights=ai_insights
-            )
-            
-            portfolio = await portfolio_service.update_portfolio(
-                portfolio.id,
-                update_data
-            )
-        
-        return portfolio
+        return {
+            "portfolio": portfolio,
+            "job_id": portfolio.analysis_job_id,
+            "status_url": f"/api/jobs/{portfolio.analysis_job_id}"
+        }
         
     except Exception as e:
         raise HTTPException(
@@ -255,14 +235,14 @@ async def delete_portfolio(
             detail="Invalid portfolio ID"
         )
 
-@router.post("/{portfolio_id}/analyze")
+@router.post("/{portfolio_id}/analyze", status_code=status.HTTP_202_ACCEPTED)
 async def analyze_portfolio(
     portfolio_id: str,
     current_user: User = Depends(get_current_active_user),
     db=Depends(get_database)
 ):
     """
-    Trigger AI analysis of a portfolio.
+    Trigger AI analysis of a portfolio as a background job.
     """
     if current_user.user_type != "developer":
         raise HTTPException(
@@ -272,11 +252,9 @@ async def analyze_portfolio(
     
     try:
         portfolio_service = PortfolioService(db)
-        github_service = GitHubService()
-        ai_service = AIService()
         
         # Check if portfolio exists and belongs to user
-        portfolio = await portfolio_service.get_portfolio(ObjectId(portfolio_id))
+        portfolio = await portfolio_service.get_portfolio(portfolio_id)
         
         if not portfolio:
             raise HTTPException(
@@ -290,36 +268,26 @@ async def analyze_portfolio(
                 detail="Access denied"
             )
         
-        # Get fresh GitHub data
-        if current_user.github_username:
-            repositories = await github_service.get_user_repositories(
-                current_user.github_username
-            )
-            
-            # Get AI insights
-            ai_insights = await ai_service.analyze_repositories(repositories)
-            
-            # Update portfolio
-            update_data = PortfolioUpdate(
-                github_repositories=repositories,
-                ai_insights=ai_insights
-            )
-            
-            updated_portfolio = await portfolio_service.update_portfolio(
-                ObjectId(portfolio_id),
-                update_data
-            )
-            
-            return {
-                "message": "Portfolio analyzed successfully",
-                "portfolio": updated_portfolio
-            }
-        else:
+        if not portfolio.github_username:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="GitHub username is required for analysis"
             )
         
+        job = await portfolio_service.enqueue_analysis(
+            portfolio_id,
+            portfolio.user_id,
+            portfolio.github_username,
+            portfolio.resume_data
+        )
+        
+        return {
+            "message": "Portfolio analysis queued",
+            "job_id": job["id"],
+            "status": job["status"],
+            "status_url": job["status_url"]
+        }
+        
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -1,9 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, StreamingResponse
 from typing import Dict, Any, List
 from pydantic import BaseModel
 import asyncio
+import json
+from app.core.config import settings
 from app.services.langchain_ai_service import langchain_ai
+from app.services.candidate_batch_service import candidate_batch_service
 from app.services.pdf_service import pdf_generator
 from app.core.database import get_database
 
@@ -221,6 +225,13 @@ async def get_market_trends():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get market trends: {str(e)}")
 
+def check_batch_size(candidates: List[CandidateAnalysisRequest]):
+    if len(candidates) > settings.recruitment_batch_max_candidates:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: at most {settings.recruitment_batch_max_candidates} candidates per request"
+        )
+
 @router.post("/batch-candidate-analysis")
 async def batch_analyze_candidates(
     candidates: List[CandidateAnalysisRequest], 
@@ -228,55 +239,46 @@ async def batch_analyze_candidates(
 ):
     """
     Analyze multiple candidates in batch
-    Useful for bulk candidate processing
+    Candidates are analyzed concurrently; results are returned in input order
     """
+    check_batch_size(candidates)
     try:
-        results = []
-        
-        for candidate in candidates:
-            try:
-                candidate_data = {
-                    "github_data": {"username": candidate.github_username},
-                    "portfolio_data": candidate.portfolio_data or {},
-                    "skills": candidate.skills,
-                    "resume_text": candidate.resume_text
-                }
-                
-                analysis = await langchain_ai.analyze_candidate_profile(candidate_data)
-                
-                results.append({
-                    "github_username": candidate.github_username,
-                    "analysis": analysis,
-                    "success": True
-                })
-                
-                # Store in database
-                analysis_record = {
-                    "github_username": candidate.github_username,
-                    "analysis": analysis,
-                    "timestamp": asyncio.get_event_loop().time(),
-                    "batch_analysis": True
-                }
-                await db.candidate_analyses.insert_one(analysis_record)
-                
-            except Exception as e:
-                results.append({
-                    "github_username": candidate.github_username,
-                    "error": str(e),
-                    "success": False
-                })
+        batch = await candidate_batch_service.analyze_all(
+            [candidate.dict() for candidate in candidates], db
+        )
         
         return {
             "success": True,
-            "results": results,
-            "total_processed": len(results),
-            "successful": len([r for r in results if r["success"]]),
-            "failed": len([r for r in results if not r["success"]])
+            "batch_id": batch["batch_id"],
+            "results": batch["results"],
+            "total_processed": batch["total_processed"],
+            "successful": batch["successful"],
+            "failed": batch["failed"]
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
 
+@router.post("/batch-candidate-analysis/stream")
+async def stream_batch_analyze_candidates(
+    candidates: List[CandidateAnalysisRequest], 
+    db = Depends(get_database)
+):
+    """
+    Analyze multiple candidates in batch, streaming NDJSON
+    One {"type": "result"} line per candidate as it finishes (with its input
+    index), then a {"type": "summary"} line
+    """
+    check_batch_size(candidates)
+    
+    async def lines():
+        async for event in candidate_batch_service.analyze(
+            [candidate.dict() for candidate in candidates], db
+        ):
+            yield json.dumps(jsonable_encoder(event)) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @router.get("/health")
 async def health_check():
     """Health check for recruitment AI service"""
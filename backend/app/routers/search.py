@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
 from typing import List, Optional
 from app.models.search import SearchCriteria, SearchResponse, SavedSearch
-from app.services.search_service import SearchService
+from app.services.search_service import search_service
+from app.services.candidate_search_engine import candidate_search_engine
+from app.services.text_index_service import text_index_service
+from app.services.search_result_cache import search_result_cache
+from app.services.search_alert_service import search_alert_service
+from app.services.autocomplete_service import autocomplete_service
+from app.core.config import settings
 from app.routers.auth import get_current_user
 from app.models.user import User
+import hashlib
 
 router = APIRouter()
-search_service = SearchService()
 
 @router.post("/search", response_model=SearchResponse)
 async def search_candidates(
@@ -22,43 +29,78 @@ async def search_candidates(
     
     try:
         return await search_service.search_candidates(criteria, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+# Filters with fixed values (everything else is mined from portfolios by autocomplete_service)
+_STATIC_SUGGESTIONS = {
+    "experience_levels": ["junior", "mid", "senior"],
+    "documentation_quality": ["poor", "fair", "good", "excellent"],
+    "testing_practices": ["poor", "fair", "good", "excellent"]
+}
+
+# Served until the suggestion index has loaded
+_FALLBACK_SUGGESTIONS = {
+    "skills": [
+        "JavaScript", "Python", "React", "Node.js", "TypeScript", "Java",
+        "Go", "Rust", "Vue.js", "Angular", "Next.js", "Express.js",
+        "Django", "Flask", "Spring Boot", "PostgreSQL", "MongoDB",
+        "Redis", "Docker", "Kubernetes", "AWS", "Azure", "GCP"
+    ],
+    "languages": [
+        "JavaScript", "Python", "TypeScript", "Java", "Go", "Rust",
+        "PHP", "C#", "C++", "Swift", "Kotlin", "Dart", "Ruby"
+    ]
+}
+
 @router.get("/search/suggestions")
 async def get_search_suggestions(
+    request: Request,
     q: Optional[str] = Query(None, description="Partial query for suggestions"),
+    limit: int = Query(10, ge=1, le=20, description="Completions per category"),
     current_user: User = Depends(get_current_user)
 ):
-    """Get search suggestions for auto-completion."""
+    """
+    Get search suggestions for auto-completion.
+    Skills, languages, topics and titles are the most common completions of q
+    across public portfolios. Responses carry an ETag that changes only when
+    the suggestion index is rebuilt, so repeated keystrokes revalidate cheaply.
+    """
     if current_user.user_type != "recruiter":
         raise HTTPException(status_code=403, detail="Only recruiters can access search suggestions")
     
-    # Common skills and technologies for suggestions
-    suggestions = {
-        "skills": [
-            "JavaScript", "Python", "React", "Node.js", "TypeScript", "Java",
-            "Go", "Rust", "Vue.js", "Angular", "Next.js", "Express.js",
-            "Django", "Flask", "Spring Boot", "PostgreSQL", "MongoDB",
-            "Redis", "Docker", "Kubernetes", "AWS", "Azure", "GCP"
-        ],
-        "languages": [
-            "JavaScript", "Python", "TypeScript", "Java", "Go", "Rust",
-            "PHP", "C#", "C++", "Swift", "Kotlin", "Dart", "Ruby"
-        ],
-        "experience_levels": ["junior", "mid", "senior"],
-        "documentation_quality": ["poor", "fair", "good", "excellent"],
-        "testing_practices": ["poor", "fair", "good", "excellent"]
+    prefix = (q or "").strip().lower()
+    fingerprint = hashlib.sha1(f"{prefix}|{limit}".encode("utf-8")).hexdigest()[:16]
+    etag = f'W/"{autocomplete_service.version}-{fingerprint}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.suggestions_cache_max_age_seconds}"
     }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
     
-    if q:
-        # Filter suggestions based on query
-        filtered = {}
-        for category, items in suggestions.items():
-            filtered[category] = [item for item in items if q.lower() in item.lower()]
-        return filtered
+    if not autocomplete_service.ready:
+        suggestions = {
+            category: [item for item in items if prefix in item.lower()]
+            for category, items in {**_FALLBACK_SUGGESTIONS, **_STATIC_SUGGESTIONS}.items()
+        }
+        return JSONResponse(suggestions, headers=headers)
+    
+    completions = autocomplete_service.complete(prefix, limit)
+    suggestions = {
+        category: [completion["value"] for completion in values]
+        for category, values in completions.items()
+    }
+    suggestions["counts"] = {
+        category: {completion["value"]: completion["count"] for completion in values}
+        for category, values in completions.items()
+    }
+    for category, items in _STATIC_SUGGESTIONS.items():
+        suggestions[category] = [item for item in items if prefix in item]
     
-    return suggestions
+    return JSONResponse(suggestions, headers=headers)
 
 @router.post("/search/save")
 async def save_search(
@@ -90,6 +132,54 @@ async def get_saved_searches(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve saved searches: {str(e)}")
 
+@router.patch("/search/saved/{search_id}/alerts")
+async def set_saved_search_alerts(
+    search_id: str,
+    alerts_enabled: bool,
+    current_user: User = Depends(get_current_user)
+):
+    """Turn alerts of one of the current recruiter's saved searches on or off."""
+    if current_user.user_type != "recruiter":
+        raise HTTPException(status_code=403, detail="Only recruiters can change saved searches")
+
+    try:
+        updated = await search_service.set_search_alerts(search_id, current_user.id, alerts_enabled)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update saved search: {str(e)}")
+    if not updated:
+        raise HTTPException(status_code=404, detail="Saved search not found")
+    return {"search_id": search_id, "alerts_enabled": alerts_enabled}
+
+@router.delete("/search/saved/{search_id}")
+async def delete_saved_search(
+    search_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Delete one of the current recruiter's saved searches and its alerts."""
+    if current_user.user_type != "recruiter":
+        raise HTTPException(status_code=403, detail="Only recruiters can delete saved searches")
+
+    try:
+        deleted = await search_service.delete_saved_search(search_id, current_user.id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to delete saved search: {str(e)}")
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Saved search not found")
+    return {"message": "Saved search deleted"}
+
+@router.get("/search/alerts")
+async def get_search_alerts(
+    current_user: User = Depends(get_current_user)
+):
+    """New candidates matching the current recruiter's alert-enabled saved searches."""
+    if current_user.user_type != "recruiter":
+        raise HTTPException(status_code=403, detail="Only recruiters can access search alerts")
+    
+    try:
+        return await search_alert_service.get_alerts(current_user.id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve search alerts: {str(e)}")
+
 @router.get("/search/examples")
 async def get_search_examples():
     """Get example search queries to help recruiters understand capabilities."""
@@ -135,3 +225,14 @@ async def get_search_examples():
             }
         ]
     }
+
+@router.get("/search/engine/stats")
+async def get_search_engine_stats():
+    """In-process candidate search engine, text index, result cache, alert and autocomplete stats."""
+    return {
+        **candidate_search_engine.get_stats(),
+        "text_index": text_index_service.get_stats(),
+        "result_cache": search_result_cache.get_stats(),
+        "alerts": search_alert_service.get_stats(),
+        "autocomplete": autocomplete_service.get_stats()
+    }
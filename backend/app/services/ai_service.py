@@ -1,15 +1,86 @@
 import google.generativeai as genai
 from app.core.config import settings
-from typing import List, Dict, Any
-import json
+from typing import List, Dict, Any, Callable, Collection, Optional
+from pydantic import ValidationError
+from app.core.llm_executor import llm_executor
+from app.services.llm_cache_service import llm_response_cache
+from app.models.portfolio import (
+    AIProfileAnalysis, AIGeneratedContent, CodeCraftsmanshipScore, RecruiterInsights,
+    RepositoryAnalysisFragment
+)
+from collections import Counter
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+# Repository fields that feed a fragment; any change to them means re-analysis
+_FRAGMENT_FIELDS = (
+    "name", "description", "language", "languages", "topics", "has_readme",
+    "license", "pushed_at", "archived", "fork", "size"
+)
+
+_FRAGMENT_SCORES = ("code_quality_score", "documentation_score", "testing_score", "project_structure_score")
+
+# Sections of the single-shot analysis and the models they must validate against
+ANALYSIS_SECTIONS = {
+    "profile_analysis": AIProfileAnalysis,
+    "craftsmanship_score": CodeCraftsmanshipScore,
+    "portfolio_content": AIGeneratedContent,
+    "recruiter_insights": RecruiterInsights
+}
+
+# JSON layout of each single-shot section, in prompt order
+_FULL_ANALYSIS_SCHEMAS = {
+    "profile_analysis": """{
+                "technical_skills": {"<skill>": <confidence 0-1>},
+                "most_active_languages": [{"language": "<name>", "repos": <int>, "percentage": <float>}],
+                "project_quality_assessment": {"overall_quality": "<low|medium|high>", "documentation_quality": "<...>", "testing_evidence": "<...>"},
+                "experience_level": "<junior|mid|senior|expert>",
+                "specializations": ["<specialization>"],
+                "collaboration_patterns": {"works_on_team_projects": <bool>, "contributes_to_open_source": <bool>},
+                "code_patterns": {"follows_conventions": <bool>, "uses_modern_practices": <bool>, "architecture_awareness": "<low|medium|high>"},
+                "analysis_confidence": <0-1>
+            }""",
+    "craftsmanship_score": """{
+                "overall_score": <0-100>,
+                "code_quality_score": <0-100>,
+                "documentation_score": <0-100>,
+                "testing_score": <0-100>,
+                "project_structure_score": <0-100>,
+                "metrics": {"total_repos_analyzed": <int>, "repos_with_readme": <int>, "repos_with_license": <int>, "languages_diversity": <int>},
+                "strengths": ["<strength>"],
+                "improvement_areas": ["<area>"],
+                "recommendations": ["<recommendation>"],
+                "analyzed_repositories": <int>
+            }""",
+    "portfolio_content": """{
+                "suggested_title": "<professional portfolio title>",
+                "bio": "<2-3 sentence professional bio>",
+                "professional_summary": "<2-3 paragraph summary of skills and experience>",
+                "project_descriptions": {"<repo_name>": "<description highlighting technical choices and impact>"},
+                "skills_summary": "<paragraph summarizing technical expertise>",
+                "call_to_action": "<closing statement for recruiters/collaborators>"
+            }""",
+    "recruiter_insights": """{
+                "candidate_summary": "<2-3 paragraph executive summary for recruiters>",
+                "core_strengths": ["<strength>"],
+                "impressive_projects": [{"name": "<repo>", "description": "<why>", "impact": "<impact>", "technologies": ["<tech>"]}],
+                "potential_red_flags": ["<concern>"],
+                "fit_analysis": {"best_suited_for": ["<role>"], "team_environment": "<...>", "growth_potential": "<...>"}
+            }""",
+    "interview_questions": """["<8-10 questions referencing specific projects and decisions>"]"""
+}
 
 class AIService:
     def __init__(self):
         if settings.gemini_api_key:
             genai.configure(api_key=settings.gemini_api_key)
-            self.model = genai.GenerativeModel('gemini-2.5-flash-lite')  # Updated to latest model
+            self.model_name = 'gemini-2.5-flash-lite'  # Updated to latest model
+            self.model = genai.GenerativeModel(self.model_name)
         else:
             self.model = None
     
@@ -24,11 +95,7 @@ class AIService:
         try:
             prompt = self._create_profile_analysis_prompt(repositories, resume_data)
             
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as executor:
-                response = await loop.run_in_executor(executor, self._generate_response, prompt)
-            
-            return self._parse_json_response(response.text)
+            return await self._generate_json("analyze_profile", prompt)
             
         except Exception as e:
             return {"error": f"Profile analysis failed: {str(e)}"}
@@ -44,11 +111,7 @@ class AIService:
         try:
             prompt = self._create_portfolio_generation_prompt(github_data, repositories)
             
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as executor:
-                response = await loop.run_in_executor(executor, self._generate_response, prompt)
-            
-            result = self._parse_json_response(response.text)
+            result = await self._generate_json("generate_portfolio_content", prompt)
             
             # Ensure we have fallback content if AI fails
             if result.get("error"):
@@ -70,11 +133,7 @@ class AIService:
         try:
             prompt = self._create_craftsmanship_scoring_prompt(repositories)
             
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as executor:
-                response = await loop.run_in_executor(executor, self._generate_response, prompt)
-            
-            return self._parse_json_response(response.text)
+            return await self._generate_json("calculate_craftsmanship_score", prompt)
             
         except Exception as e:
             return {"error": f"Craftsmanship scoring failed: {str(e)}"}
@@ -90,11 +149,7 @@ class AIService:
         try:
             prompt = self._create_candidate_summary_prompt(profile_data)
             
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as executor:
-                response = await loop.run_in_executor(executor, self._generate_response, prompt)
-            
-            return self._parse_json_response(response.text)
+            return await self._generate_json("generate_candidate_summary", prompt)
             
         except Exception as e:
             return {"error": f"Candidate summary generation failed: {str(e)}"}
@@ -110,16 +165,257 @@ class AIService:
         try:
             prompt = self._create_interview_questions_prompt(repositories, profile_analysis)
             
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as executor:
-                response = await loop.run_in_executor(executor, self._generate_response, prompt)
-            
-            result = self._parse_json_response(response.text)
+            result = await self._generate_json("generate_interview_questions", prompt)
             return result.get("questions", [])
             
         except Exception as e:
             return [f"Interview question generation failed: {str(e)}"]
     
+    async def generate_full_analysis(
+        self,
+        repositories: List[Dict[str, Any]],
+        github_data: Dict[str, Any] = None,
+        resume_data: Dict[str, Any] = None,
+        skip: Collection[str] = ()
+    ) -> Dict[str, Any]:
+        """
+        Single-shot analysis: profile, craftsmanship, portfolio content, recruiter
+        insights and interview questions from one Gemini call.
+        Sections in skip are left out of the prompt (the caller derives them otherwise).
+        
+        Returns only the sections that validated against their models; callers
+        fill any missing section with the per-feature methods above.
+        """
+        if not self.model or settings.ai_analysis_mode != "single_shot":
+            return {}
+        
+        wanted = [name for name in _FULL_ANALYSIS_SCHEMAS if name not in skip]
+        try:
+            prompt = self._create_full_analysis_prompt(repositories, github_data or {}, resume_data, wanted)
+            result = await self._generate_json(
+                "generate_full_analysis",
+                prompt,
+                is_cacheable=lambda result: len(self._validate_full_analysis(result, wanted)) == len(wanted)
+            )
+        except Exception as e:
+            logger.warning(f"Single-shot analysis failed, falling back to per-feature calls: {e}")
+            return {}
+        
+        sections = self._validate_full_analysis(result, wanted)
+        missing = [name for name in wanted if name not in sections]
+        if missing:
+            logger.warning(f"Single-shot analysis missing or invalid sections: {', '.join(missing)}")
+        return sections
+    
+    def repository_fingerprint(self, repo: Dict[str, Any]) -> str:
+        """Content hash of the repository metadata a fragment is based on."""
+        fields = {field: repo.get(field) for field in _FRAGMENT_FIELDS}
+        license_info = fields.get("license")
+        if isinstance(license_info, dict):
+            fields["license"] = license_info.get("spdx_id") or license_info.get("key")
+        encoded = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+    
+    async def analyze_repository_fragments(self, repositories: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Per-repository description and craftsmanship sub-scores, keyed by repo name.
+        Repositories are sent in batches; repos whose batch fails or whose fragment
+        does not validate are simply missing from the result.
+        """
+        if not self.model or not repositories:
+            return {}
+        
+        batch_size = max(1, settings.ai_fragment_batch_size)
+        batches = [repositories[i:i + batch_size] for i in range(0, len(repositories), batch_size)]
+        
+        async def analyze_batch(batch: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+            names = {repo.get("name") for repo in batch}
+            try:
+                result = await self._generate_json(
+                    "analyze_repository_fragments",
+                    self._create_repository_fragments_prompt(batch)
+                )
+            except Exception as e:
+                logger.warning(f"Repository fragment analysis failed for {len(batch)} repos: {e}")
+                return {}
+            
+            fragments = {}
+            for name, fragment in (result.get("repositories") or {}).items():
+                if name not in names or not isinstance(fragment, dict):
+                    continue
+                try:
+                    fragments[name] = RepositoryAnalysisFragment.model_validate(fragment).model_dump()
+                except ValidationError:
+                    continue
+            return fragments
+        
+        fragments = {}
+        for batch_fragments in await asyncio.gather(*(analyze_batch(batch) for batch in batches)):
+            fragments.update(batch_fragments)
+        return fragments
+    
+    def aggregate_craftsmanship_score(
+        self,
+        fragments: Dict[str, Dict[str, Any]],
+        repositories: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Deterministic craftsmanship score from per-repository fragments.
+        Sub-scores are averaged with more weight on starred repos and less on
+        forks/archived ones; text lists are the most common fragment entries.
+        """
+        totals = dict.fromkeys(_FRAGMENT_SCORES, 0.0)
+        total_weight = 0.0
+        used = []
+        for repo in repositories:
+            fragment = fragments.get(repo.get("name"))
+            if not fragment:
+                continue
+            weight = 1.0 + math.log10(1 + (repo.get("stargazers_count") or 0))
+            if repo.get("fork") or repo.get("archived"):
+                weight *= 0.5
+            for score in _FRAGMENT_SCORES:
+                totals[score] += fragment[score] * weight
+            total_weight += weight
+            used.append((repo, fragment))
+        
+        if not used:
+            return {"error": "No repository fragments to score"}
+        
+        scores = {score: round(totals[score] / total_weight, 1) for score in _FRAGMENT_SCORES}
+        
+        def most_common(field: str, limit: int = 5) -> List[str]:
+            counts = Counter(item for _, fragment in used for item in fragment.get(field, []))
+            return [item for item, _ in counts.most_common(limit)]
+        
+        analyzed = [repo for repo, _ in used]
+        return {
+            "overall_score": round(sum(scores.values()) / len(scores), 1),
+            **scores,
+            "metrics": {
+                "total_repos_analyzed": len(analyzed),
+                "repos_with_readme": sum(1 for repo in analyzed if repo.get("has_readme")),
+                "repos_with_license": sum(1 for repo in analyzed if repo.get("license")),
+                "avg_stars_per_repo": round(sum(repo.get("stargazers_count") or 0 for repo in analyzed) / len(analyzed), 1),
+                "languages_diversity": len({repo.get("language") for repo in analyzed if repo.get("language")})
+            },
+            "strengths": most_common("strengths"),
+            "improvement_areas": most_common("improvement_areas"),
+            "recommendations": most_common("recommendations"),
+            "analyzed_repositories": len(analyzed),
+            "scoring_method": "repository_fragments"
+        }
+    
+    def _validate_full_analysis(self, result: Dict[str, Any], wanted: Collection[str]) -> Dict[str, Any]:
+        """Keep the requested sections of a single-shot response that match their models."""
+        if result.get("error"):
+            return {}
+        
+        sections = {}
+        for name, model in ANALYSIS_SECTIONS.items():
+            if name not in wanted:
+                continue
+            section = result.get(name)
+            if not isinstance(section, dict):
+                continue
+            try:
+                model.model_validate(section)
+            except ValidationError:
+                continue
+            sections[name] = section
+        
+        questions = result.get("interview_questions")
+        if "interview_questions" in wanted and isinstance(questions, list) and questions and all(isinstance(q, str) for q in questions):
+            sections["interview_questions"] = questions
+        
+        return sections
+    
+    def _compact_repositories(self, repositories: List[Dict[str, Any]]) -> str:
+        """Serialize only the repository fields the prompts use, without indentation."""
+        compact = []
+        for repo in repositories[:settings.ai_prompt_max_repositories]:
+            entry = {
+                "name": repo.get("name"),
+                "description": repo.get("description"),
+                "language": repo.get("language"),
+                "stars": repo.get("stargazers_count", 0),
+                "forks": repo.get("forks_count", 0),
+                "topics": repo.get("topics") or [],
+                "has_readme": repo.get("has_readme", False),
+                "license": (repo.get("license") or {}).get("spdx_id"),
+                "fork": repo.get("fork", False),
+                "updated": (repo.get("updated_at") or "")[:10]
+            }
+            if repo.get("languages"):
+                entry["languages"] = repo["languages"]
+            # Empty/zero/false values are omitted to save tokens
+            compact.append({k: v for k, v in entry.items() if v not in (None, "", [], False)})
+        return json.dumps(compact, separators=(",", ":"))
+    
+    def _create_full_analysis_prompt(
+        self,
+        repositories: List[Dict[str, Any]],
+        github_data: Dict[str, Any],
+        resume_data: Dict[str, Any] = None,
+        sections: Collection[str] = tuple(_FULL_ANALYSIS_SCHEMAS)
+    ) -> str:
+        """Create the combined prompt for single-shot analysis of the given sections."""
+        user_profile = github_data.get("user_profile") or {}
+        profile = {
+            key: user_profile.get(key)
+            for key in ("name", "bio", "location", "company", "public_repos", "followers")
+            if user_profile.get(key)
+        }
+        activity_stats = github_data.get("activity_stats")
+        context = f"Profile: {json.dumps(profile, separators=(',', ':'))}\n" if profile else ""
+        if activity_stats:
+            context += f"Activity: {json.dumps(activity_stats, separators=(',', ':'), default=str)}\n"
+        if resume_data:
+            context += f"Resume: {json.dumps(resume_data, separators=(',', ':'), default=str)}\n"
+        layout = ",\n".join(f'            "{name}": {_FULL_ANALYSIS_SCHEMAS[name]}' for name in sections)
+        
+        return f"""
+        Analyze this developer's GitHub work and produce a complete portfolio assessment.
+        
+        {context}Repositories ({len(repositories)} total, most relevant first):
+        {self._compact_repositories(repositories)}
+        
+        Respond with one JSON object containing exactly these sections:
+        {{
+{layout}
+        }}
+        
+        Base every section on the actual repositories. Scores must be consistent with the
+        evidence (README, license, topics, activity). Avoid generic algorithm questions.
+        """
+    
+    def _create_repository_fragments_prompt(self, repositories: List[Dict[str, Any]]) -> str:
+        """Create prompt for per-repository fragments."""
+        return f"""
+        Assess each of these repositories individually for a code craftsmanship review.
+        
+        Repositories:
+        {self._compact_repositories(repositories)}
+        
+        Respond in JSON, with one entry per repository using exactly the names given:
+        {{
+            "repositories": {{
+                "<repo name>": {{
+                    "description": "<1-2 sentence portfolio description highlighting technical choices and impact>",
+                    "code_quality_score": <0-100>,
+                    "documentation_score": <0-100>,
+                    "testing_score": <0-100>,
+                    "project_structure_score": <0-100>,
+                    "strengths": ["<up to 3>"],
+                    "improvement_areas": ["<up to 3>"],
+                    "recommendations": ["<up to 2>"]
+                }}
+            }}
+        }}
+        
+        Score each repository on its own evidence (README, license, topics, size, activity).
+        """
+    
     def _create_profile_analysis_prompt(self, repositories: List[Dict[str, Any]], resume_data: Dict[str, Any] = None) -> str:
         """Create prompt for comprehensive profile analysis."""
         repo_data = json.dumps(repositories, indent=2)
@@ -313,8 +609,27 @@ class AIService:
         Avoid generic algorithm questions. Focus on real problem-solving and decision-making.
         """
     
+    async def _generate_json(
+        self,
+        method: str,
+        prompt: str,
+        is_cacheable: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Dict[str, Any]:
+        """Generate and parse a JSON response, reusing cached results for identical prompts."""
+        async def generate():
+            response = await llm_executor.run(self._generate_response, prompt)
+            return self._parse_json_response(response.text)
+        
+        return await llm_response_cache.get_or_generate(
+            method,
+            self.model_name,
+            prompt,
+            generate,
+            is_cacheable=is_cacheable or (lambda result: "error" not in result)
+        )
+    
     def _generate_response(self, prompt: str):
-        """Generate response using Gemini (runs in thread pool)."""
+        """Generate response using Gemini (runs in the shared LLM executor)."""
         return self.model.generate_content(prompt)
     
     def _parse_json_response(self, response_text: str) -> Dict[str, Any]:
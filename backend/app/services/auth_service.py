@@ -1,6 +1,7 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.models.user import User, UserCreate, UserUpdate
 from app.core.security import get_password_hash, verify_password
+from app.services.text_index_service import USER_TEXT_PROJECTION, text_index_service
 from bson import ObjectId
 from typing import Optional, Dict, Any
 from datetime import datetime
@@ -42,6 +43,7 @@ class AuthService:
         # Insert user
         result = await self.collection.insert_one(user_doc)
         user_doc["_id"] = result.inserted_id
+        text_index_service.index_user(user_doc)
         user_doc["id"] = result.inserted_id
         
         return User(**user_doc)
@@ -71,6 +73,7 @@ class AuthService:
         
         result = await self.collection.insert_one(user_doc)
         user_doc["_id"] = result.inserted_id
+        text_index_service.index_user(user_doc)
         user_doc["id"] = result.inserted_id
         
         return User(**user_doc)
@@ -160,5 +163,8 @@ class AuthService:
         )
         
         if result.modified_count > 0:
+            user = await self.collection.find_one({"_id": user_id}, USER_TEXT_PROJECTION)
+            if user:
+                text_index_service.index_user(user)
             return await self.get_user_by_id(str(user_id))
         return None
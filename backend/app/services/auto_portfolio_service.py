@@ -6,11 +6,39 @@ Implements core USPs: One-click GitHub portfolio generation with AI insights
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.services.github_service import GitHubService
 from app.services.ai_service import AIService
-from typing import Dict, Any, List, Optional
+from app.services.job_service import job_service
+from app.services.search_service import search_service
+from app.core.database import get_database
+from app.core.progress import report_progress, listen_progress
+from app.core.config import settings
+from typing import Dict, Any, List, Optional, Callable, Awaitable, AsyncIterator, Tuple, Set
 from datetime import datetime, timedelta, timezone
 import asyncio
+import logging
 from bson import ObjectId
 
+logger = logging.getLogger(__name__)
+
+_INSIGHT_SECTIONS = ("profile_analysis", "craftsmanship_score", "portfolio_content", "interview_questions")
+
+_FEATURES_GENERATED = [
+    "✅ Professional bio and summary",
+    "✅ Project descriptions and highlights",
+    "✅ Skills analysis and technical stack",
+    "✅ Code craftsmanship score",
+    "✅ Recruiter-ready insights",
+    "✅ Interview questions based on your code"
+]
+
+_NEXT_STEPS = [
+    "Share your portfolio link with recruiters",
+    "Customize the generated content if needed",
+    "Keep coding - portfolio auto-updates from GitHub!"
+]
+
+# Pipelines started by streaming requests keep running if the client disconnects
+_stream_tasks: Set[asyncio.Task] = set()
+
 class AutoPortfolioService:
     def __init__(self, db):
         self.db = db
@@ -18,6 +46,39 @@ class AutoPortfolioService:
         self.github_service = GitHubService()
         self.ai_service = AIService()
     
+    async def enqueue_create(self, user_id: str, github_username: str) -> Dict[str, Any]:
+        """Queue auto-portfolio generation; a user's repeat requests for the same username share the active job."""
+        return await job_service.enqueue(
+            "auto_portfolio_create",
+            {"user_id": user_id, "github_username": github_username},
+            idempotency_key=f"auto_portfolio_create:{user_id}:{github_username.lower()}",
+            user_id=user_id
+        )
+    
+    async def enqueue_refresh(self, portfolio_id: str, user_id: str) -> Dict[str, Any]:
+        """Queue a refresh of one of user_id's auto-generated portfolios (others' are reported as not found)."""
+        if not ObjectId.is_valid(portfolio_id):
+            return {"success": False, "error": "Portfolio not found"}
+        
+        portfolio = await self.portfolios_collection.find_one(
+            {"_id": ObjectId(portfolio_id), "user_id": user_id},
+            {"github_username": 1}
+        )
+        if not portfolio:
+            return {"success": False, "error": "Portfolio not found"}
+        
+        github_username = portfolio.get("github_username")
+        if not github_username:
+            return {"success": False, "error": "No GitHub username associated with portfolio"}
+        
+        job = await job_service.enqueue(
+            "auto_portfolio_refresh",
+            {"portfolio_id": portfolio_id},
+            idempotency_key=f"auto_portfolio_refresh:{user_id}:{github_username.lower()}",
+            user_id=user_id
+        )
+        return {"success": True, "job": job}
+    
     async def create_auto_portfolio_from_github(self, user_id: str, github_username: str) -> Dict[str, Any]:
         """
         USP #1: One-Click GitHub Portfolio Auto-Generation
@@ -26,19 +87,23 @@ class AutoPortfolioService:
         try:
             # Step 1: Extract comprehensive GitHub data
             github_data = await self._extract_comprehensive_github_data(github_username)
+            sync_state = github_data.pop("sync_state")
             
             # Step 2: Generate AI insights
-            ai_insights = await self._generate_comprehensive_ai_insights(github_data)
+            ai_insights = await self._generate_comprehensive_ai_insights(github_data, with_fragments=True)
             
             # Step 3: Create auto-generated portfolio
-            portfolio = await self._create_auto_portfolio(user_id, github_username, github_data, ai_insights)
+            portfolio = await self._create_auto_portfolio(user_id, github_username, github_data, ai_insights, sync_state)
+            report_progress("portfolio_saved", {"portfolio_id": portfolio["id"]})
             
             return {
                 "success": True,
                 "portfolio_id": portfolio["id"],
                 "portfolio_url": f"/portfolio/{portfolio['id']}",
+                "features_generated": _FEATURES_GENERATED,
                 "auto_generated_content": ai_insights.get("portfolio_content", {}),
                 "craftsmanship_score": ai_insights.get("craftsmanship_score", {}),
+                "next_steps": _NEXT_STEPS,
                 "message": "Portfolio auto-generated successfully from GitHub data!"
             }
             
@@ -49,17 +114,33 @@ class AutoPortfolioService:
                 "suggestion": "Please check if the GitHub username is correct and the profile is public."
             }
     
-    async def _extract_comprehensive_github_data(self, username: str) -> Dict[str, Any]:
+    async def _extract_comprehensive_github_data(
+        self,
+        username: str,
+        previous_github_data: Optional[Dict[str, Any]] = None,
+        sync_state: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         Extract comprehensive data from GitHub for portfolio generation.
+        With a previous sync, repositories are fetched incrementally; the new
+        sync state is returned under "sync_state".
         """
-        # Get user profile
-        user_data = await self.github_service.get_user_data_public(username)
+        # Get user profile and repositories together
+        user_data, (repositories, new_sync_state) = await asyncio.gather(
+            self.github_service.get_user_data_public(username),
+            self.github_service.sync_user_repositories(
+                username,
+                previous_repositories=(previous_github_data or {}).get("repositories"),
+                sync_state=sync_state
+            )
+        )
         
-        # Get repositories with enhanced analysis
-        repositories = await self.github_service.get_user_repositories(username)
+        report_progress("github_profile", {
+            "user_profile": user_data,
+            "repositories": len(repositories)
+        })
         
-        # Get activity statistics
+        # Get activity statistics (reuses the repository fetch above)
         activity_stats = await self.github_service.get_user_activity_stats(username)
         
         # Analyze repository patterns
@@ -68,13 +149,20 @@ class AutoPortfolioService:
         # Extract skill progression
         skill_progression = await self._extract_skill_progression(repositories)
         
+        report_progress("github_analysis", {
+            "activity_stats": activity_stats,
+            "repository_analysis": repo_analysis,
+            "skill_progression": skill_progression
+        })
+        
         return {
             "user_profile": user_data,
             "repositories": repositories,
             "activity_stats": activity_stats,
             "repository_analysis": repo_analysis,
             "skill_progression": skill_progression,
-            "extracted_at": datetime.now(timezone.utc)
+            "extracted_at": datetime.now(timezone.utc),
+            "sync_state": new_sync_state
         }
     
     async def _analyze_repository_patterns(self, repositories: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -207,36 +295,166 @@ class AutoPortfolioService:
             "learning_pattern": "continuous" if len(repos_by_year) > 1 else "recent_starter"
         }
     
-    async def _generate_comprehensive_ai_insights(self, github_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _generate_comprehensive_ai_insights(
+        self,
+        github_data: Dict[str, Any],
+        previous_insights: Optional[Dict[str, Any]] = None,
+        with_fragments: bool = False
+    ) -> Dict[str, Any]:
         """
         Generate all AI insights for the portfolio.
+        
+        With with_fragments, per-repository fragments are kept under
+        "repository_fragments" and the craftsmanship score and project
+        descriptions are derived from them. Given previous insights, only repos
+        whose metadata changed are re-sent, and the profile-level sections are
+        reused unless churn exceeds ai_reanalysis_churn_threshold.
         """
         repositories = github_data.get("repositories", [])
-        user_profile = github_data.get("user_profile", {})
+        previous_insights = previous_insights or {}
+        previous_fragments = previous_insights.get("repository_fragments") or {}
+        tracked = repositories[:settings.ai_prompt_max_repositories] if with_fragments else []
         
-        # Run AI analysis in parallel for efficiency
-        tasks = [
-            self.ai_service.analyze_profile(repositories, user_profile),
-            self.ai_service.calculate_craftsmanship_score(repositories),
-            self.ai_service.generate_portfolio_content(github_data, repositories),
-            self.ai_service.generate_interview_questions(repositories, github_data)
+        changed = [
+            repo for repo in tracked
+            if (previous_fragments.get(repo.get("name")) or {}).get("hash") != self.ai_service.repository_fingerprint(repo)
         ]
+        churn = len(changed) / len(tracked) if tracked else 1.0
+        reuse_sections = (
+            bool(previous_fragments)
+            and churn <= settings.ai_reanalysis_churn_threshold
+            and all(
+                previous_insights.get(name) and not (isinstance(previous_insights[name], dict) and previous_insights[name].get("error"))
+                for name in _INSIGHT_SECTIONS
+            )
+        )
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Fragments replace the craftsmanship score and project descriptions, so those
+        # sections are reported once, after merging, and the score is not generated
+        merged = ("craftsmanship_score", "portfolio_content") if tracked else ()
+        if reuse_sections:
+            insights = {name: previous_insights[name] for name in _INSIGHT_SECTIONS}
+            new_fragments = await self.ai_service.analyze_repository_fragments(changed)
+        else:
+            insights, new_fragments = await asyncio.gather(
+                self._generate_insight_sections(github_data, skip=merged[:1], unreported=merged),
+                self.ai_service.analyze_repository_fragments(changed)
+            )
         
-        return {
-            "profile_analysis": results[0] if not isinstance(results[0], Exception) else {"error": str(results[0])},
-            "craftsmanship_score": results[1] if not isinstance(results[1], Exception) else {"error": str(results[1])},
-            "portfolio_content": results[2] if not isinstance(results[2], Exception) else {"error": str(results[2])},
-            "interview_questions": results[3] if not isinstance(results[3], Exception) else []
+        if not with_fragments:
+            return insights
+        
+        # Keep fragments for tracked repos only; a failed re-analysis keeps the old
+        # fragment (and its old hash, so it is retried on the next refresh)
+        fragments = {}
+        for repo in tracked:
+            name = repo.get("name")
+            if name in new_fragments:
+                fragments[name] = {**new_fragments[name], "hash": self.ai_service.repository_fingerprint(repo)}
+            elif name in previous_fragments:
+                fragments[name] = previous_fragments[name]
+        
+        if fragments:
+            insights["craftsmanship_score"] = self.ai_service.aggregate_craftsmanship_score(fragments, tracked)
+            portfolio_content = dict(insights.get("portfolio_content") or {})
+            portfolio_content["project_descriptions"] = {
+                **(portfolio_content.get("project_descriptions") or {}),
+                **{name: fragment["description"] for name, fragment in fragments.items() if fragment.get("description")}
+            }
+            insights["portfolio_content"] = portfolio_content
+        elif "craftsmanship_score" not in insights:
+            # Every fragment batch failed: score the profile the per-feature way after all
+            try:
+                insights["craftsmanship_score"] = await self.ai_service.calculate_craftsmanship_score(repositories)
+            except Exception as e:
+                insights["craftsmanship_score"] = {"error": str(e)}
+        for name in merged:
+            report_progress("ai_section", {"section": name, "data": insights[name]})
+        
+        insights["repository_fragments"] = fragments
+        logger.info(
+            f"AI insights: {len(changed)}/{len(tracked)} repositories re-analyzed, "
+            f"profile sections {'reused' if reuse_sections else 'regenerated'}"
+        )
+        return insights
+    
+    async def _generate_insight_sections(
+        self,
+        github_data: Dict[str, Any],
+        skip: Tuple[str, ...] = (),
+        unreported: Tuple[str, ...] = ()
+    ) -> Dict[str, Any]:
+        """
+        Profile analysis, craftsmanship, portfolio content and interview questions.
+        Sections in skip are not generated; sections in unreported are returned
+        without an ai_section event (the caller reports them once finished).
+        """
+        repositories = github_data.get("repositories", [])
+        user_profile = github_data.get("user_profile", {})
+        
+        # One combined prompt covers every section when it validates
+        insights = await self.ai_service.generate_full_analysis(repositories, github_data=github_data, skip=skip)
+        
+        # Per-feature calls (in parallel) for anything the single-shot call did not produce
+        fallback_calls = {
+            "profile_analysis": lambda: self.ai_service.analyze_profile(repositories, user_profile),
+            "craftsmanship_score": lambda: self.ai_service.calculate_craftsmanship_score(repositories),
+            "portfolio_content": lambda: self.ai_service.generate_portfolio_content(github_data, repositories),
+            "interview_questions": lambda: self.ai_service.generate_interview_questions(repositories, github_data)
         }
+        for name in fallback_calls:
+            if name in insights and name not in unreported:
+                report_progress("ai_section", {"section": name, "data": insights[name]})
+        
+        async def run_fallback(name: str):
+            try:
+                result = await fallback_calls[name]()
+            except Exception as e:
+                result = [] if name == "interview_questions" else {"error": str(e)}
+            insights[name] = result
+            if name not in unreported:
+                report_progress("ai_section", {"section": name, "data": result})
+        
+        missing = [name for name in fallback_calls if name not in insights and name not in skip]
+        await asyncio.gather(*(run_fallback(name) for name in missing))
+        
+        return {name: insights[name] for name in _INSIGHT_SECTIONS if name in insights}
+    
+    async def stream_progress(
+        self,
+        run: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Run a pipeline and yield (event, data) for each stage as it completes,
+        ending with ("complete", result) or ("error", {"error": ...}).
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def runner():
+            with listen_progress(lambda stage, data: queue.put_nowait((stage, data))):
+                try:
+                    result = await run()
+                    queue.put_nowait(("complete", result))
+                except Exception as e:
+                    queue.put_nowait(("error", {"error": str(e)}))
+        
+        task = asyncio.create_task(runner())
+        _stream_tasks.add(task)
+        task.add_done_callback(_stream_tasks.discard)
+        
+        while True:
+            event, data = await queue.get()
+            yield event, data
+            if event in ("complete", "error"):
+                break
     
     async def _create_auto_portfolio(
         self, 
         user_id: str, 
         github_username: str, 
         github_data: Dict[str, Any], 
-        ai_insights: Dict[str, Any]
+        ai_insights: Dict[str, Any],
+        sync_state: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Create the auto-generated portfolio document.
@@ -281,6 +499,7 @@ class AutoPortfolioService:
                     "description": description,
                     "skills": skills,
                     "github_data": github_data,
+                    "github_sync_state": sync_state,
                     "ai_insights": ai_insights,
                     "updated_at": datetime.now(timezone.utc),
                     "last_github_sync": datetime.now(timezone.utc)
@@ -291,6 +510,7 @@ class AutoPortfolioService:
                 {"_id": existing_portfolio["_id"]}, 
                 update_doc
             )
+            await search_service.index_portfolio(str(existing_portfolio["_id"]))
             
             existing_portfolio.update(update_doc["$set"])
             existing_portfolio["id"] = str(existing_portfolio["_id"])
@@ -330,6 +550,7 @@ class AutoPortfolioService:
             "is_public": True,  # Auto-generated portfolios are public by default
             "auto_generated": True,
             "github_data": github_data,
+            "github_sync_state": sync_state,
             "ai_insights": ai_insights,
             "view_count": 0,
             "created_at": datetime.now(timezone.utc),
@@ -339,6 +560,7 @@ class AutoPortfolioService:
         
         result = await self.portfolios_collection.insert_one(portfolio_doc)
         portfolio_doc["id"] = str(result.inserted_id)
+        await search_service.index_portfolio(portfolio_doc["id"])
         
         return portfolio_doc
     
@@ -355,13 +577,23 @@ class AutoPortfolioService:
             if not github_username:
                 return {"success": False, "error": "No GitHub username associated with portfolio"}
             
-            # Re-extract data and regenerate insights
-            github_data = await self._extract_comprehensive_github_data(github_username)
-            ai_insights = await self._generate_comprehensive_ai_insights(github_data)
+            # Re-extract data incrementally and regenerate insights
+            github_data = await self._extract_comprehensive_github_data(
+                github_username,
+                previous_github_data=portfolio.get("github_data"),
+                sync_state=portfolio.get("github_sync_state")
+            )
+            sync_state = github_data.pop("sync_state")
+            ai_insights = await self._generate_comprehensive_ai_insights(
+                github_data,
+                previous_insights=portfolio.get("ai_insights"),
+                with_fragments=True
+            )
             
             # Update portfolio
             update_data = {
                 "github_data": github_data,
+                "github_sync_state": sync_state,
                 "ai_insights": ai_insights,
                 "updated_at": datetime.now(timezone.utc),
                 "last_github_sync": datetime.now(timezone.utc)
@@ -371,6 +603,7 @@ class AutoPortfolioService:
                 {"_id": ObjectId(portfolio_id)},
                 {"$set": update_data}
             )
+            await search_service.index_portfolio(portfolio_id)
             
             return {
                 "success": True,
@@ -415,3 +648,25 @@ class AutoPortfolioService:
             
         except Exception as e:
             return {"error": f"Failed to get portfolio insights: {str(e)}"}
+
+async def run_auto_portfolio_create_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Background job handler for "auto_portfolio_create"."""
+    database = await get_database()
+    result = await AutoPortfolioService(database).create_auto_portfolio_from_github(
+        user_id=payload["user_id"],
+        github_username=payload["github_username"]
+    )
+    if not result["success"]:
+        raise RuntimeError(result.get("error", "Portfolio generation failed"))
+    return result
+
+async def run_auto_portfolio_refresh_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Background job handler for "auto_portfolio_refresh"."""
+    database = await get_database()
+    result = await AutoPortfolioService(database).refresh_portfolio_from_github(payload["portfolio_id"])
+    if not result["success"]:
+        raise RuntimeError(result.get("error", "Portfolio refresh failed"))
+    return result
+
+job_service.register("auto_portfolio_create", run_auto_portfolio_create_job)
+job_service.register("auto_portfolio_refresh", run_auto_portfolio_refresh_job)
@@ -0,0 +1,263 @@
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+from collections import Counter
+from bisect import bisect_left
+from app.core.config import settings
+from app.core.database import get_database
+from app.services.search_service import search_service
+import asyncio
+import heapq
+import logging
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ("skills", "languages", "topics", "titles")
+
+# Fields mined for completions (manual and auto-generated portfolio layouts)
+AUTOCOMPLETE_SOURCE_PROJECTION = {
+    "is_public": 1,
+    "title": 1,
+    "skills": 1,
+    "ai_profile_analysis.most_active_languages": 1,
+    "ai_insights.profile_analysis.most_active_languages": 1,
+    "search_index.original_topics": 1
+}
+
+# Titles generated for auto-created portfolios name the person, not a role
+_GENERATED_TITLE = re.compile(r"'s portfolio$|- developer portfolio$", re.IGNORECASE)
+
+# Prefixes up to this length have their completions precomputed at build time
+_PRECOMPUTED_PREFIX_LENGTH = 2
+
+def _normalize(label: str) -> str:
+    return " ".join(label.lower().split())
+
+def portfolio_labels(portfolio: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Completion labels a public portfolio contributes, per category."""
+    if not portfolio.get("is_public"):
+        return {}
+
+    profile = portfolio.get("ai_profile_analysis") or (portfolio.get("ai_insights") or {}).get("profile_analysis") or {}
+    languages = [
+        entry.get("language") for entry in profile.get("most_active_languages") or []
+        if isinstance(entry, dict) and entry.get("language")
+    ]
+    title = (portfolio.get("title") or "").strip()
+
+    labels = {
+        "skills": [str(skill) for skill in portfolio.get("skills") or []],
+        "languages": [str(language) for language in languages],
+        "topics": list((portfolio.get("search_index") or {}).get("original_topics") or []),
+        "titles": [title] if title and len(title) <= 80 and not _GENERATED_TITLE.search(title) else []
+    }
+    return {category: [label.strip() for label in values if label.strip()] for category, values in labels.items()}
+
+class PrefixIndex:
+    """
+    Frequency-weighted completions for one category.
+
+    Counts (portfolios carrying a label) change on every write; the sorted
+    lookup structures are rebuilt from them by build() and replaced whole, so
+    queries never see a half-built index. Multi-word labels can also be
+    completed from any word ("learning" -> "Machine Learning").
+    """
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._spellings: Dict[str, Counter] = {}  # Normalized label -> how it is written
+        self.dirty = False
+        self._keys: List[str] = []
+        self._key_labels: List[str] = []
+        self._labels: Dict[str, str] = {}  # Normalized label -> most common spelling
+        self._top: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def add(self, labels: Iterable[str], weight: int = 1):
+        """Count (weight 1) or uncount (weight -1) one portfolio's labels."""
+        for label in set(labels):
+            normalized = _normalize(label)
+            if not normalized:
+                continue
+            self._counts[normalized] += weight
+            spellings = self._spellings.setdefault(normalized, Counter())
+            spellings[label] += weight
+            if spellings[label] <= 0:
+                del spellings[label]
+            if self._counts[normalized] <= 0:
+                del self._counts[normalized]
+                del self._spellings[normalized]
+            self.dirty = True
+
+    def build(self, top_k: int):
+        """Rebuild the sorted keys and the precomputed completions of short prefixes."""
+        entries = []
+        for normalized in self._counts:
+            entries.append((normalized, normalized))
+            for match in re.finditer(r"[ \-_/.]", normalized):
+                suffix = normalized[match.end():]
+                if suffix:
+                    entries.append((suffix, normalized))
+        entries.sort()
+
+        ranked = sorted(self._counts, key=lambda normalized: (-self._counts[normalized], normalized))
+        top: Dict[str, List[str]] = {"": ranked[:top_k]}
+        keys_by_label: Dict[str, List[str]] = {}
+        for key, normalized in entries:
+            keys_by_label.setdefault(normalized, []).append(key)
+        for normalized in ranked:
+            prefixes = {key[:length] for key in keys_by_label[normalized] for length in range(1, _PRECOMPUTED_PREFIX_LENGTH + 1)}
+            for prefix in prefixes:
+                completions = top.setdefault(prefix, [])
+                if len(completions) < top_k:
+                    completions.append(normalized)
+
+        self._keys = [key for key, _ in entries]
+        self._key_labels = [normalized for _, normalized in entries]
+        self._labels = {normalized: self._spellings[normalized].most_common(1)[0][0] for normalized in self._counts}
+        self._top = top
+        self.dirty = False
+
+    def complete(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        """Most frequent labels with a word starting with prefix, as {"value", "count"}."""
+        prefix = _normalize(prefix)
+        if len(prefix) <= _PRECOMPUTED_PREFIX_LENGTH:
+            matches = self._top.get(prefix, [])[:limit]
+        else:
+            low = bisect_left(self._keys, prefix)
+            high = bisect_left(self._keys, prefix + "\U0010ffff")
+            candidates = set(self._key_labels[low:high])
+            matches = heapq.nsmallest(limit, candidates, key=lambda normalized: (-self._counts.get(normalized, 0), normalized))
+
+        # Labels no portfolio carries any more stay in the lookup structures until the next build
+        return [
+            {"value": self._labels.get(normalized, normalized), "count": self._counts[normalized]}
+            for normalized in matches
+            if self._counts.get(normalized)
+        ]
+
+class AutocompleteService:
+    """
+    Search suggestions mined from public portfolios.
+
+    Every category is a PrefixIndex. Portfolios indexed by this process adjust
+    the counts right away (via the search_service index listener) and become
+    visible at the next rebuild, every `autocomplete_rebuild_seconds`; a full
+    reload every `autocomplete_reload_seconds` picks up other processes' writes
+    and deleted portfolios. `version` changes with every rebuild, for ETags.
+    """
+
+    def __init__(self):
+        self.indexes = {category: PrefixIndex() for category in CATEGORIES}
+        self._contributions: Dict[str, Dict[str, List[str]]] = {}  # Portfolio id -> labels it added
+        self._replay: Optional[List[Tuple[str, Dict[str, List[str]]]]] = None  # Writes seen during a reload
+        self.ready = False
+        self.version = 0
+        self._task: Optional[asyncio.Task] = None
+        self._loaded_at = 0.0
+        self.last_load_seconds = 0.0
+        self.last_build_seconds = 0.0
+
+    def _apply(self, portfolio_id: str, labels: Dict[str, List[str]]):
+        previous = self._contributions.pop(portfolio_id, {})
+        for category, values in previous.items():
+            self.indexes[category].add(values, -1)
+        for category, values in labels.items():
+            self.indexes[category].add(values)
+        if any(labels.values()):
+            self._contributions[portfolio_id] = labels
+
+    async def portfolio_indexed(self, portfolio: Dict[str, Any]):
+        """search_service index listener: recount the labels of a written portfolio."""
+        portfolio_id, labels = str(portfolio["_id"]), portfolio_labels(portfolio)
+        self._apply(portfolio_id, labels)
+        if self._replay is not None:
+            self._replay.append((portfolio_id, labels))
+
+    def build(self):
+        """Rebuild the indexes whose counts changed."""
+        started_at = time.perf_counter()
+        rebuilt = False
+        for index in self.indexes.values():
+            if index.dirty:
+                index.build(settings.autocomplete_max_limit)
+                rebuilt = True
+        if rebuilt:
+            self.version += 1
+            self.last_build_seconds = time.perf_counter() - started_at
+
+    def complete(self, prefix: str, limit: int) -> Dict[str, List[Dict[str, Any]]]:
+        limit = max(1, min(limit, settings.autocomplete_max_limit))
+        return {category: index.complete(prefix, limit) for category, index in self.indexes.items()}
+
+    async def start(self):
+        if not settings.autocomplete_enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                if not self.ready or time.monotonic() - self._loaded_at >= settings.autocomplete_reload_seconds:
+                    await self.load()
+                else:
+                    self.build()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Autocomplete index refresh failed: {e}")
+            await asyncio.sleep(settings.autocomplete_rebuild_seconds)
+
+    async def load(self):
+        """Count every public portfolio's labels from MongoDB, then swap the indexes in."""
+        database = await get_database()
+        if database is None:
+            return
+
+        started_at = time.perf_counter()
+        fresh = AutocompleteService()
+        self._replay = []
+        try:
+            async for portfolio in database.portfolios.find({"is_public": True}, AUTOCOMPLETE_SOURCE_PROJECTION):
+                fresh._apply(str(portfolio["_id"]), portfolio_labels(portfolio))
+            # Writes made while loading may be missing from the scan
+            for portfolio_id, labels in self._replay:
+                fresh._apply(portfolio_id, labels)
+        finally:
+            self._replay = None
+        fresh.build()
+
+        self.indexes, self._contributions = fresh.indexes, fresh._contributions
+        self.version += 1
+        self.ready = True
+        self._loaded_at = time.monotonic()
+
+        self.last_load_seconds = time.perf_counter() - started_at
+        logger.info(
+            f"Autocomplete index loaded "
+            f"{', '.join(f'{len(index)} {category}' for category, index in self.indexes.items())} "
+            f"in {self.last_load_seconds:.2f}s"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.autocomplete_enabled,
+            "ready": self.ready,
+            "version": self.version,
+            "labels": {category: len(index) for category, index in self.indexes.items()},
+            "portfolios": len(self._contributions),
+            "last_load_ms": round(self.last_load_seconds * 1000, 1),
+            "last_build_ms": round(self.last_build_seconds * 1000, 1)
+        }
+
+autocomplete_service = AutocompleteService()
+
+search_service.add_index_listener(autocomplete_service.portfolio_indexed)
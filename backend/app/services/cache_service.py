@@ -1,81 +1,452 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, Awaitable, Hashable, Tuple, Set, List
 from datetime import datetime, timedelta
+from collections import OrderedDict
 from app.core.database import get_database
+from app.core.config import settings
+import asyncio
+import copy
 import json
 import logging
+import re
+import time
+from bson import Binary
+from pymongo import ReplaceOne
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; JSON is always available
+    msgpack = None
 
 logger = logging.getLogger(__name__)
 
+class MemoryCache:
+    """Small in-process LRU cache with per-entry TTL."""
+    
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a value, evicting the least recently used entry when full."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def delete(self, key: Hashable):
+        self._entries.pop(key, None)
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def keys(self) -> List[Hashable]:
+        return list(self._entries.keys())
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key onto one running task."""
+    
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        
+        # Shield so a cancelled caller does not cancel the work other callers wait on
+        return await asyncio.shield(task)
+    
+    def is_running(self, key: Hashable) -> bool:
+        return key in self._in_flight
+
+def _serialize_default(value: Any) -> Any:
+    """Fallback for values JSON/msgpack cannot encode natively (datetimes, ObjectIds)."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
 class CacheService:
-    """Service for caching AI analysis results to avoid repeated API calls."""
+    """
+    Namespaced key/value cache with per-key TTL.
+    
+    Values live in a bounded in-process LRU in front of the Mongo
+    `cache_entries` collection. The AI analysis cache is built on top of it
+    with stale-while-revalidate and single-flight computation.
+    """
+    
+    ANALYSIS_NAMESPACES = ("analysis", "repo_analysis", "suggestions")
     
     def __init__(self):
-        self.cache_duration = timedelta(hours=6)  # Cache for 6 hours
+        self.cache_duration = timedelta(seconds=settings.analysis_cache_soft_ttl_seconds)  # Served as fresh
+        self.max_stale_duration = timedelta(seconds=settings.analysis_cache_hard_ttl_seconds)  # Served while revalidating
+        self.memory = MemoryCache(
+            max_entries=settings.analysis_cache_max_entries,
+            ttl_seconds=self.max_stale_duration.total_seconds()
+        )
+        self.single_flight = SingleFlight()
+        self._background_tasks: Set[asyncio.Task] = set()
+        self.counters = {
+            "memory_hits": 0,
+            "mongo_hits": 0,
+            "misses": 0,
+            "stale_hits": 0,
+            "computations": 0,
+            "background_refreshes": 0,
+            "coalesced_requests": 0
+        }
+    
+    # ------------------------------------------------------------------
+    # Key/value API
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _entry_id(namespace: str, key: str) -> str:
+        return f"{namespace}:{key}"
     
-    async def get_analysis_cache(self, username: str) -> Optional[Dict[str, Any]]:
-        """Get cached analysis result for a username."""
+    @staticmethod
+    def _encode(value: Any) -> Tuple[bytes, str]:
+        if settings.cache_serializer == "msgpack" and msgpack is not None:
+            return msgpack.packb(value, default=_serialize_default, use_bin_type=True), "msgpack"
+        return json.dumps(value, default=_serialize_default, separators=(",", ":")).encode("utf-8"), "json"
+    
+    @staticmethod
+    def _decode(payload: bytes, codec: str) -> Any:
+        if codec == "msgpack":
+            if msgpack is None:
+                raise ValueError("msgpack-encoded cache entry but msgpack is not installed")
+            return msgpack.unpackb(payload, raw=False)
+        return json.loads(payload)
+    
+    def _remember(self, namespace: str, key: str, value: Any, expires_at: datetime):
+        ttl = (expires_at - datetime.utcnow()).total_seconds()
+        if ttl > 0:
+            self.memory.set((namespace, key), value, ttl_seconds=ttl)
+    
+    async def get(self, key: str, namespace: str = "default", use_memory: bool = True) -> Optional[Any]:
+        """
+        Get a cached value, or None if missing or expired.
+        use_memory=False reads Mongo only (for callers with their own memory tier).
+        """
+        value = self.memory.get((namespace, key)) if use_memory else None
+        if value is not None:
+            self.counters["memory_hits"] += 1
+            return copy.deepcopy(value)
+        
         try:
             database = await get_database()
             if database is None:
+                self.counters["misses"] += 1
                 return None
             
-            # Find cached analysis
-            cache_entry = await database.github_cache.find_one({"username": username})
-            
-            if cache_entry:
-                # Check if cache is still valid
-                last_updated = cache_entry.get("last_updated")
-                if last_updated and datetime.utcnow() - last_updated < self.cache_duration:
-                    logger.info(f"Cache hit for username: {username}")
-                    # Remove MongoDB-specific fields
-                    result = {k: v for k, v in cache_entry.items() if k not in ["_id", "username", "last_updated"]}
-                    return result
-                else:
-                    # Cache expired, remove it
-                    await database.github_cache.delete_one({"username": username})
-                    logger.info(f"Cache expired for username: {username}")
+            entry = await database.cache_entries.find_one({
+                "_id": self._entry_id(namespace, key),
+                "expires_at": {"$gt": datetime.utcnow()}
+            })
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
             
-            return None
+            self.counters["mongo_hits"] += 1
+            value = self._decode(entry["value"], entry.get("codec", "json"))
+            if not use_memory:
+                return value
+            self._remember(namespace, key, value, entry["expires_at"])
+            return copy.deepcopy(value)
             
         except Exception as e:
-            logger.error(f"Error getting cache for {username}: {e}")
+            logger.error(f"Error getting cache key {namespace}:{key}: {e}")
             return None
     
-    async def save_analysis_cache(self, username: str, analysis_data: Dict[str, Any]) -> bool:
-        """Save analysis result to cache."""
+    async def get_many(self, keys: List[str], namespace: str = "default") -> Dict[str, Any]:
+        """Get several keys at once. Missing or expired keys are omitted."""
+        found = {}
+        remaining = []
+        for key in keys:
+            value = self.memory.get((namespace, key))
+            if value is not None:
+                self.counters["memory_hits"] += 1
+                found[key] = copy.deepcopy(value)
+            else:
+                remaining.append(key)
+        
+        if not remaining:
+            return found
+        
+        try:
+            database = await get_database()
+            if database is None:
+                self.counters["misses"] += len(remaining)
+                return found
+            
+            cursor = database.cache_entries.find({
+                "_id": {"$in": [self._entry_id(namespace, key) for key in remaining]},
+                "expires_at": {"$gt": datetime.utcnow()}
+            })
+            async for entry in cursor:
+                value = self._decode(entry["value"], entry.get("codec", "json"))
+                self._remember(namespace, entry["key"], value, entry["expires_at"])
+                found[entry["key"]] = copy.deepcopy(value)
+                self.counters["mongo_hits"] += 1
+            
+            self.counters["misses"] += len([key for key in remaining if key not in found])
+            return found
+            
+        except Exception as e:
+            logger.error(f"Error getting cache keys in {namespace}: {e}")
+            return found
+    
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        expire_seconds: int = 3600,
+        namespace: str = "default",
+        use_memory: bool = True
+    ) -> bool:
+        """Store a value under namespace:key for expire_seconds."""
+        return await self.set_many(
+            {key: value},
+            expire_seconds=expire_seconds,
+            namespace=namespace,
+            use_memory=use_memory
+        )
+    
+    async def set_many(
+        self,
+        items: Dict[str, Any],
+        expire_seconds: int = 3600,
+        namespace: str = "default",
+        use_memory: bool = True
+    ) -> bool:
+        """Store several values with the same TTL in one bulk write."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=expire_seconds)
+        if use_memory:
+            for key, value in items.items():
+                self._remember(namespace, key, copy.deepcopy(value), expires_at)
+        
         try:
             database = await get_database()
             if database is None:
                 return False
             
-            cache_entry = {
-                "username": username,
-                "last_updated": datetime.utcnow(),
-                **analysis_data
-            }
+            operations = []
+            for key, value in items.items():
+                payload, codec = self._encode(value)
+                entry_id = self._entry_id(namespace, key)
+                operations.append(ReplaceOne(
+                    {"_id": entry_id},
+                    {
+                        "_id": entry_id,
+                        "namespace": namespace,
+                        "key": key,
+                        "value": Binary(payload),
+                        "codec": codec,
+                        "created_at": now,
+                        "expires_at": expires_at
+                    },
+                    upsert=True
+                ))
             
-            # Upsert the cache entry
-            await database.github_cache.replace_one(
-                {"username": username},
-                cache_entry,
-                upsert=True
-            )
+            if operations:
+                await database.cache_entries.bulk_write(operations, ordered=False)
+            return True
             
-            logger.info(f"Cache saved for username: {username}")
+        except Exception as e:
+            logger.error(f"Error saving cache keys in {namespace}: {e}")
+            return False
+    
+    async def delete(self, key: str, namespace: str = "default") -> bool:
+        """Remove a key from both tiers."""
+        self.memory.delete((namespace, key))
+        try:
+            database = await get_database()
+            if database is None:
+                return False
+            
+            await database.cache_entries.delete_one({"_id": self._entry_id(namespace, key)})
             return True
             
         except Exception as e:
-            logger.error(f"Error saving cache for {username}: {e}")
+            logger.error(f"Error deleting cache key {namespace}:{key}: {e}")
             return False
     
+    # ------------------------------------------------------------------
+    # AI analysis cache (stale-while-revalidate on top of the key/value API)
+    # ------------------------------------------------------------------
+    
+    async def _get_entry(self, username: str, namespace: str = "analysis") -> Optional[Tuple[Dict[str, Any], datetime]]:
+        """Look up (data, last_updated) within the hard TTL."""
+        envelope = await self.get(username, namespace=namespace)
+        if envelope is None:
+            return None
+        return envelope["data"], datetime.fromisoformat(envelope["last_updated"])
+    
+    async def get_analysis_cache(self, username: str, namespace: str = "analysis") -> Optional[Dict[str, Any]]:
+        """Get cached analysis result for a username (fresh entries only)."""
+        entry = await self._get_entry(username, namespace)
+        if entry is None:
+            return None
+        
+        data, last_updated = entry
+        if datetime.utcnow() - last_updated >= self.cache_duration:
+            return None
+        
+        logger.info(f"Cache hit for username: {username}")
+        return data
+    
+    async def save_analysis_cache(self, username: str, analysis_data: Dict[str, Any], namespace: str = "analysis") -> bool:
+        """Save analysis result to cache."""
+        envelope = {
+            "data": analysis_data,
+            "last_updated": datetime.utcnow().isoformat()
+        }
+        saved = await self.set(
+            username,
+            envelope,
+            expire_seconds=int(self.max_stale_duration.total_seconds()),
+            namespace=namespace
+        )
+        if saved:
+            logger.info(f"Cache saved for username: {username}")
+        return saved
+    
+    async def get_or_compute_analysis(
+        self,
+        username: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        namespace: str = "analysis"
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Return (analysis, freshness) using stale-while-revalidate.
+        
+        Within the soft TTL the cached analysis is served as fresh. Between the
+        soft and hard TTL it is served immediately while a background task
+        rebuilds it. Past the hard TTL (or on a miss) the caller waits for
+        compute(); concurrent callers share a single computation.
+        """
+        flight_key = (namespace, username)
+        entry = await self._get_entry(username, namespace)
+        now = datetime.utcnow()
+        
+        if entry is not None:
+            data, last_updated = entry
+            age = now - last_updated
+            stale = age >= self.cache_duration
+            if stale:
+                self.counters["stale_hits"] += 1
+                self._schedule_refresh(username, compute, namespace)
+            
+            return data, {
+                "status": "stale" if stale else "fresh",
+                "cached_at": last_updated.isoformat() + "Z",
+                "age_seconds": int(age.total_seconds()),
+                "revalidating": self.single_flight.is_running(flight_key)
+            }
+        
+        if self.single_flight.is_running(flight_key):
+            self.counters["coalesced_requests"] += 1
+        
+        result = await self.single_flight.do(
+            flight_key,
+            lambda: self._compute_and_save(username, compute, namespace)
+        )
+        return copy.deepcopy(result), {
+            "status": "miss",
+            "cached_at": now.isoformat() + "Z",
+            "age_seconds": 0,
+            "revalidating": False
+        }
+    
+    async def _compute_and_save(
+        self,
+        username: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        namespace: str
+    ) -> Dict[str, Any]:
+        self.counters["computations"] += 1
+        result = await compute()
+        await self.save_analysis_cache(username, result, namespace)
+        return result
+    
+    def _schedule_refresh(self, username: str, compute: Callable[[], Awaitable[Dict[str, Any]]], namespace: str):
+        """Start a background rebuild unless one is already running for this key."""
+        flight_key = (namespace, username)
+        if self.single_flight.is_running(flight_key):
+            return
+        
+        async def refresh():
+            try:
+                await self.single_flight.do(
+                    flight_key,
+                    lambda: self._compute_and_save(username, compute, namespace)
+                )
+                logger.info(f"Background cache refresh completed for {namespace}:{username}")
+            except Exception as e:
+                logger.error(f"Background cache refresh failed for {namespace}:{username}: {e}")
+        
+        self.counters["background_refreshes"] += 1
+        task = asyncio.create_task(refresh())
+        # Hold a reference so the task is not garbage collected mid-flight
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters for both cache tiers."""
+        lookups = self.counters["memory_hits"] + self.counters["mongo_hits"] + self.counters["misses"]
+        hits = self.counters["memory_hits"] + self.counters["mongo_hits"]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_evictions": self.memory.evictions,
+            "memory_expirations": self.memory.expirations,
+            "refreshes_in_progress": len(self._background_tasks)
+        }
+    
     async def clear_user_cache(self, username: str) -> bool:
-        """Clear cache for a specific user."""
+        """Clear all cached analyses and suggestions for a specific user."""
         try:
+            # Analysis keys are the username; suggestion keys are "<type>:<username>"
+            for cache_key in self.memory.keys():
+                namespace, key = cache_key
+                if namespace in self.ANALYSIS_NAMESPACES and (key == username or key.endswith(f":{username}")):
+                    self.memory.delete(cache_key)
+            
             database = await get_database()
             if database is None:
                 return False
             
-            await database.github_cache.delete_one({"username": username})
+            await database.cache_entries.delete_many({
+                "namespace": {"$in": list(self.ANALYSIS_NAMESPACES)},
+                "$or": [{"key": username}, {"key": {"$regex": f"^[^:]+:{re.escape(username)}$"}}]
+            })
             logger.info(f"Cache cleared for username: {username}")
             return True
             
@@ -90,9 +461,8 @@ class CacheService:
             if database is None:
                 return 0
             
-            cutoff_time = datetime.utcnow() - self.cache_duration
-            result = await database.github_cache.delete_many({
-                "last_updated": {"$lt": cutoff_time}
+            result = await database.cache_entries.delete_many({
+                "expires_at": {"$lt": datetime.utcnow()}
             })
             
             deleted_count = result.deleted_count
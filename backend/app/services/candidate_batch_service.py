@@ -0,0 +1,134 @@
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
+from pymongo.errors import BulkWriteError, PyMongoError
+from app.core.config import settings
+from app.services.langchain_ai_service import langchain_ai
+import anyio
+import asyncio
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class CandidateBatchService:
+    """
+    Analyzes many candidates concurrently.
+
+    At most `recruitment_batch_concurrency` analyses run at once (a sliding
+    window, so a slow candidate never holds up the next chunk). Results are
+    yielded as they finish, one failing candidate never affects the others,
+    and analysis records are written with one insert_many per
+    `recruitment_batch_insert_chunk` results.
+    """
+
+    async def analyze(self, candidates: List[Dict[str, Any]], db=None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield a {"type": "result"} event per candidate in completion order,
+        then a {"type": "summary"} event.
+        """
+        batch_id = uuid.uuid4().hex
+        window = max(1, settings.recruitment_batch_concurrency)
+        chunk_size = max(1, settings.recruitment_batch_insert_chunk)
+
+        remaining = iter(enumerate(candidates))
+        running = set()
+        records: List[Dict[str, Any]] = []
+        counts = {"successful": 0, "failed": 0, "persisted": 0}
+
+        def fill_window():
+            while len(running) < window:
+                item = next(remaining, None)
+                if item is None:
+                    return
+                running.add(asyncio.create_task(self._analyze_one(batch_id, *item)))
+
+        try:
+            fill_window()
+            while running:
+                done, pending = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                running.clear()
+                running.update(pending)
+                fill_window()
+
+                for task in done:
+                    result, record = task.result()
+                    counts["successful" if result["success"] else "failed"] += 1
+                    if record is not None:
+                        records.append(record)
+                    yield {"type": "result", **result}
+
+                if len(records) >= chunk_size:
+                    counts["persisted"] += await self._persist(db, records)
+                    records = []
+        finally:
+            # Client went away or the batch finished: stop leftover work, keep what completed.
+            # On a disconnect the request's cancel scope is cancelled, so the last insert is shielded.
+            for task in running:
+                task.cancel()
+            if records:
+                with anyio.CancelScope(shield=True):
+                    counts["persisted"] += await self._persist(db, records)
+
+        yield {
+            "type": "summary",
+            "batch_id": batch_id,
+            "total_processed": counts["successful"] + counts["failed"],
+            **counts
+        }
+
+    async def analyze_all(self, candidates: List[Dict[str, Any]], db=None) -> Dict[str, Any]:
+        """Run the whole batch and return the results in input order."""
+        results = []
+        summary = {}
+        async for event in self.analyze(candidates, db):
+            if event.pop("type") == "result":
+                results.append(event)
+            else:
+                summary = event
+
+        results.sort(key=lambda result: result["index"])
+        return {"results": results, **summary}
+
+    async def _analyze_one(
+        self,
+        batch_id: str,
+        index: int,
+        candidate: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Analyze one candidate; errors are reported in the result, never raised."""
+        username = candidate.get("github_username")
+        try:
+            candidate_data = {
+                "github_data": {"username": username},
+                "portfolio_data": candidate.get("portfolio_data") or {},
+                "skills": candidate.get("skills") or [],
+                "resume_text": candidate.get("resume_text")
+            }
+            analysis = await langchain_ai.analyze_candidate_profile(candidate_data)
+        except Exception as e:
+            logger.warning(f"Batch {batch_id}: analysis failed for {username}: {e}")
+            return {"index": index, "github_username": username, "error": str(e), "success": False}, None
+
+        record = {
+            "github_username": username,
+            "analysis": analysis,
+            "timestamp": asyncio.get_event_loop().time(),
+            "batch_analysis": True,
+            "batch_id": batch_id
+        }
+        return {"index": index, "github_username": username, "analysis": analysis, "success": True}, record
+
+    async def _persist(self, db, records: List[Dict[str, Any]]) -> int:
+        """Insert a chunk of analysis records; returns how many were written."""
+        if db is None or not records:
+            return 0
+        try:
+            result = await db.candidate_analyses.insert_many(records, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            logger.error(f"Batch insert partially failed: {e.details.get('writeErrors', [])[:3]}")
+            return e.details.get("nInserted", 0)
+        except PyMongoError as e:
+            logger.error(f"Batch insert of {len(records)} candidate analyses failed: {e}")
+            return 0
+
+candidate_batch_service = CandidateBatchService()
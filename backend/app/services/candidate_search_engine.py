@@ -0,0 +1,403 @@
+from typing import Dict, Any, List, Optional, Set, Tuple
+from datetime import datetime
+from app.core.config import settings
+from app.core.database import get_database
+from app.services.match_score import combine, match_terms
+import asyncio
+import logging
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# search_index fields matched through posting lists / numeric columns
+_TERM_FIELDS = ("skills", "languages", "original_topics")
+_NUMERIC_FIELDS = (
+    "overall_score", "documentation_score", "testing_score",
+    "repository_count", "fork_count"
+)
+
+# Fields kept per row to render a SearchResult without going back to MongoDB
+DISPLAY_PROJECTION = {
+    "title": 1,
+    "github_username": 1,
+    "skills": 1,
+    "description": 1,
+    "code_craftsmanship_score": 1,
+    "recruiter_insights.candidate_summary": 1,
+    "ai_profile_analysis.most_active_languages": 1,
+    "ai_profile_analysis.experience_level": 1,
+    "is_public": 1,
+    "created_at": 1,
+    "search_index": 1
+}
+
+_INITIAL_CAPACITY = 1024
+
+class CandidateSearchEngine:
+    """
+    In-process candidate search over the portfolios' search_index entries.
+
+    Every portfolio is a row: numeric columns (scores, repository counts,
+    created_at) live in NumPy arrays, and each skill/language/topic has a
+    posting list of rows. A search turns the MongoDB match conditions built by
+    SearchService into one boolean mask, scores the whole pool in a single
+    vectorized pass and selects the top rows with argpartition, so cost does
+    not depend on how deep the page is.
+
+    Rows are updated on every portfolio write in this process; a background
+    loop picks up writes made by other processes (via search_index.indexed_at)
+    and periodically reloads everything to drop deleted portfolios.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._task: Optional[asyncio.Task] = None
+        self._watermark: Optional[datetime] = None
+        self.searches = 0
+        self.total_search_seconds = 0.0
+        self.last_load_seconds = 0.0
+        self._replay: Optional[List[Tuple[str, Optional[Dict[str, Any]]]]] = None  # Writes seen during a load
+        self._reset()
+
+    def _reset(self):
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._size = 0
+        self._docs: List[Optional[Dict[str, Any]]] = []
+        self._row_terms: List[Dict[str, List[str]]] = []
+        self._postings: Dict[Tuple[str, str], Set[int]] = {}
+        self._posting_arrays: Dict[Tuple[str, str], Any] = {}
+        self._columns: Dict[str, Any] = {}
+        self._allocate(_INITIAL_CAPACITY)
+
+    @property
+    def available(self) -> bool:
+        return settings.search_engine_enabled
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    def _allocate(self, capacity: int):
+        """Grow every column to capacity rows, keeping existing values."""
+        dtypes = {
+            "alive": bool,
+            "public": bool,
+            "created_at": np.float64,
+            "ids": "<U24",
+            **{field: np.float64 for field in _NUMERIC_FIELDS}
+        }
+        for name, dtype in dtypes.items():
+            column = np.zeros(capacity, dtype=dtype)
+            existing = self._columns.get(name)
+            if existing is not None:
+                column[:len(existing)] = existing
+            self._columns[name] = column
+        self._docs.extend([None] * (capacity - len(self._docs)))
+        self._row_terms.extend({} for _ in range(capacity - len(self._row_terms)))
+
+    def upsert(self, portfolio: Dict[str, Any]):
+        """Add or replace one portfolio (projected with DISPLAY_PROJECTION)."""
+        if self._replay is not None:
+            self._replay.append((str(portfolio["_id"]), portfolio))
+        index = portfolio.get("search_index")
+        if not index:
+            return  # Not indexed yet; the backfill job will index it and the refresh loop picks it up
+
+        portfolio_id = str(portfolio["_id"])
+        row = self._rows.get(portfolio_id)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                if self._size == len(self._columns["alive"]):
+                    self._allocate(self._size * 2)
+                row = self._size
+                self._size += 1
+            self._rows[portfolio_id] = row
+        else:
+            self._drop_terms(row)
+
+        columns = self._columns
+        columns["alive"][row] = True
+        columns["public"][row] = bool(portfolio.get("is_public", False))
+        columns["ids"][row] = portfolio_id
+        created_at = portfolio.get("created_at")
+        columns["created_at"][row] = created_at.timestamp() if isinstance(created_at, datetime) else 0.0
+        for field in _NUMERIC_FIELDS:
+            columns[field][row] = float(index.get(field) or 0)
+
+        terms = {field: list(index.get(field) or []) for field in _TERM_FIELDS}
+        for field, values in terms.items():
+            for term in values:
+                self._postings.setdefault((field, term), set()).add(row)
+                self._posting_arrays.pop((field, term), None)
+        self._row_terms[row] = terms
+
+        doc = {key: value for key, value in portfolio.items() if key != "search_index"}
+        doc["repository_count"] = index.get("repository_count", 0)
+        self._docs[row] = doc
+
+    def remove(self, portfolio_id: str):
+        if self._replay is not None:
+            self._replay.append((portfolio_id, None))
+        row = self._rows.pop(portfolio_id, None)
+        if row is None:
+            return
+        self._drop_terms(row)
+        self._columns["alive"][row] = False
+        self._columns["ids"][row] = ""
+        self._docs[row] = None
+        self._free.append(row)
+
+    def documents(self, portfolio_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Display documents of the given portfolios that are loaded here."""
+        if not self.ready:
+            return {}
+        found = {}
+        for portfolio_id in portfolio_ids:
+            row = self._rows.get(portfolio_id)
+            if row is not None:
+                found[portfolio_id] = self._docs[row]
+        return found
+
+    def term_frequency(self, field: str, term: str) -> Optional[int]:
+        """Portfolios carrying term in a search_index term field (None until loaded)."""
+        if not self.ready:
+            return None
+        return len(self._postings.get((field, term), ()))
+
+    def _drop_terms(self, row: int):
+        for field, values in self._row_terms[row].items():
+            for term in values:
+                posting = self._postings.get((field, term))
+                if posting is not None:
+                    posting.discard(row)
+                    if not posting:
+                        del self._postings[(field, term)]
+                self._posting_arrays.pop((field, term), None)
+        self._row_terms[row] = {}
+
+    def _posting(self, field: str, term: str):
+        """Row ids containing term, as a cached int array."""
+        key = (field, term)
+        array = self._posting_arrays.get(key)
+        if array is None:
+            array = np.fromiter(self._postings.get(key, ()), dtype=np.int64)
+            self._posting_arrays[key] = array
+        return array
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(
+        self,
+        conditions: Dict[str, Any],
+        sort_by: str,
+        descending: bool,
+        limit: int,
+        offset: int = 0,
+        after: Optional[Dict[str, Any]] = None,
+        text_scores: Optional[Dict[str, float]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Evaluate SearchService match conditions over the whole pool.
+        With text_scores (portfolio id -> custom_query relevance), relevance sorts by them.
+        Returns None when a condition is not supported here (callers then use MongoDB).
+        """
+        if not self.ready:
+            return None
+        started_at = time.perf_counter()
+
+        n = self._size
+        columns = {name: column[:n] for name, column in self._columns.items()}
+        mask = columns["alive"].copy()
+
+        for path, condition in conditions.items():
+            if path == "is_public":
+                mask &= columns["public"] == bool(condition)
+                continue
+            if path == "_id" and isinstance(condition, dict) and set(condition) == {"$in"}:
+                mask &= self._rows_bitmap((str(portfolio_id) for portfolio_id in condition["$in"]), n)
+                continue
+
+            field = path[len("search_index."):] if path.startswith("search_index.") else None
+            if field in _TERM_FIELDS and isinstance(condition, dict) and set(condition) == {"$in"}:
+                mask &= self._any_of(field, condition["$in"], n)
+            elif field in _NUMERIC_FIELDS and isinstance(condition, (int, float)):
+                mask &= columns[field] == condition
+            elif field in _NUMERIC_FIELDS and isinstance(condition, dict) and set(condition) == {"$gte"}:
+                mask &= columns[field] >= condition["$gte"]
+            else:
+                return None
+
+        scores = self._match_scores(columns, match_terms(conditions), n)
+        if sort_by == "score":
+            keys = columns["overall_score"]
+        elif sort_by == "created_at":
+            keys = columns["created_at"]
+        elif text_scores is not None:  # relevance to custom_query
+            keys = np.zeros(n, dtype=np.float64)
+            for portfolio_id, text_score in text_scores.items():
+                row = self._rows.get(portfolio_id)
+                if row is not None:
+                    keys[row] = text_score
+        else:  # relevance
+            keys = scores
+
+        total_count = int(mask.sum())
+
+        if after is not None:
+            ids = columns["ids"]
+            if descending:
+                mask &= (keys < after["sort_key"]) | ((keys == after["sort_key"]) & (ids < after["_id"]))
+            else:
+                mask &= (keys > after["sort_key"]) | ((keys == after["sort_key"]) & (ids > after["_id"]))
+            offset = 0
+
+        rows = self._top_rows(np.flatnonzero(mask), keys, columns["ids"], descending, offset + limit + 1)
+        rows = rows[offset:]
+
+        self.searches += 1
+        self.total_search_seconds += time.perf_counter() - started_at
+        return {
+            "total_count": total_count,
+            "results": [
+                {
+                    **self._docs[row],
+                    "match_score": float(scores[row]),
+                    "sort_key": float(keys[row])
+                }
+                for row in rows
+            ]
+        }
+
+    def _rows_bitmap(self, portfolio_ids, n: int):
+        bitmap = np.zeros(n, dtype=bool)
+        rows = [self._rows[portfolio_id] for portfolio_id in portfolio_ids if portfolio_id in self._rows]
+        bitmap[rows] = True
+        return bitmap
+
+    def _any_of(self, field: str, terms: List[str], n: int):
+        """Bitmap of rows that have at least one of the terms."""
+        bitmap = np.zeros(n, dtype=bool)
+        for term in terms:
+            bitmap[self._posting(field, term)] = True
+        return bitmap
+
+    def _match_scores(self, columns: Dict[str, Any], terms: Dict[str, List[str]], n: int):
+        """The match_score module's score for every row in one vectorized pass."""
+        def overlap(field: str, wanted: List[str]):
+            hits = np.zeros(n, dtype=np.float64)
+            for term in wanted:
+                hits[self._posting(field, term)] += 1
+            return hits
+
+        return combine(terms, overlap, lambda field: columns[field], lambda x: np.minimum(x, 1.0))
+
+    def _top_rows(self, candidates, keys, ids, descending: bool, k: int) -> List[int]:
+        """The first k candidate rows ordered by (key, id), without sorting the whole pool."""
+        if len(candidates) > k:
+            candidate_keys = -keys[candidates] if descending else keys[candidates]
+            kth = np.partition(candidate_keys, k - 1)[k - 1]
+            # Keep every row tied with the k-th key so the (key, id) order stays exact
+            candidates = candidates[candidate_keys <= kth]
+
+        order = np.lexsort((ids[candidates], keys[candidates]))
+        if descending:
+            order = order[::-1]
+        return candidates[order][:k].tolist()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Load the pool and keep it fresh in the background (application startup)."""
+        if not self.available or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _refresh_loop(self):
+        last_full_load = 0.0
+        while True:
+            try:
+                if time.monotonic() - last_full_load >= settings.search_engine_full_reload_seconds:
+                    await self.load()
+                    last_full_load = time.monotonic()
+                else:
+                    await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Candidate search engine refresh failed: {e}")
+            await asyncio.sleep(settings.search_engine_refresh_seconds)
+
+    async def load(self):
+        """Rebuild every row from MongoDB, then swap it in."""
+        database = await get_database()
+        if database is None:
+            return
+
+        started_at = time.perf_counter()
+        fresh = CandidateSearchEngine()
+        watermark = None
+        self._replay = []
+        try:
+            async for portfolio in database.portfolios.find({}, DISPLAY_PROJECTION):
+                fresh.upsert(portfolio)
+                indexed_at = (portfolio.get("search_index") or {}).get("indexed_at")
+                if indexed_at and (watermark is None or indexed_at > watermark):
+                    watermark = indexed_at
+            # The scan may have read a portfolio before it was written or deleted here
+            for portfolio_id, portfolio in self._replay:
+                if portfolio is None:
+                    fresh.remove(portfolio_id)
+                else:
+                    fresh.upsert(portfolio)
+        finally:
+            self._replay = None
+
+        # Other processes' writes made while loading are newer than the watermark, so the next refresh re-applies them
+        self._rows, self._free, self._size = fresh._rows, fresh._free, fresh._size
+        self._docs, self._row_terms = fresh._docs, fresh._row_terms
+        self._postings, self._posting_arrays, self._columns = fresh._postings, fresh._posting_arrays, fresh._columns
+        self._watermark = watermark or self._watermark
+        self.ready = True
+
+        self.last_load_seconds = time.perf_counter() - started_at
+        logger.info(f"Candidate search engine loaded {len(self._rows)} portfolios in {self.last_load_seconds:.2f}s")
+
+    async def refresh(self):
+        """Apply portfolios (re)indexed since the last load or refresh, e.g. by other processes."""
+        database = await get_database()
+        if database is None or self._watermark is None:
+            return
+
+        query = {"search_index.indexed_at": {"$gte": self._watermark}}
+        async for portfolio in database.portfolios.find(query, DISPLAY_PROJECTION):
+            self.upsert(portfolio)
+            indexed_at = portfolio["search_index"].get("indexed_at")
+            if indexed_at and indexed_at > self._watermark:
+                self._watermark = indexed_at
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "available": self.available,
+            "ready": self.ready,
+            "portfolios": len(self._rows),
+            "terms": len(self._postings),
+            "searches": self.searches,
+            "avg_search_ms": round(self.total_search_seconds / self.searches * 1000, 3) if self.searches else 0.0,
+            "last_load_ms": round(self.last_load_seconds * 1000, 1)
+        }
+
+candidate_search_engine = CandidateSearchEngine()
@@ -1,41 +1,228 @@
 import httpx
-from typing import List, Dict, Any, Optional
+import asyncio
+import copy
+import logging
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
 from app.core.config import settings
+from app.core.http_client import get_github_client
+from app.core.github_rate_limiter import github_rate_limiter
+from app.core.github_resilience import backoff_delay, circuit_breaker, is_retryable_response, is_secondary_rate_limit
+from app.core.progress import report_progress
+from app.services.cache_service import MemoryCache, SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Per-host concurrency caps shared by every GitHubService instance
+_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.github_max_concurrent_requests_per_host)
+        _host_semaphores[host] = semaphore
+    return semaphore
+
+# Repositories, README presence, language bytes and default-branch commit totals in one query
+_REPOSITORIES_QUERY = """
+query($login: String!, $first: Int!, $after: String) {
+  user(login: $login) {
+    repositories(first: $first, after: $after, ownerAffiliations: OWNER, privacy: PUBLIC,
+                 orderBy: {field: UPDATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        databaseId
+        name
+        nameWithOwner
+        description
+        url
+        primaryLanguage { name }
+        stargazerCount
+        watchers { totalCount }
+        forkCount
+        issues(states: OPEN) { totalCount }
+        diskUsage
+        repositoryTopics(first: 20) { nodes { topic { name } } }
+        createdAt
+        updatedAt
+        pushedAt
+        licenseInfo { key name spdxId url }
+        hasWikiEnabled
+        isArchived
+        isDisabled
+        isPrivate
+        isFork
+        readmeMd: object(expression: "HEAD:README.md") { id }
+        readmeLowerMd: object(expression: "HEAD:readme.md") { id }
+        readmeTxt: object(expression: "HEAD:README.txt") { id }
+        readmeLowerTxt: object(expression: "HEAD:readme.txt") { id }
+        readmePlain: object(expression: "HEAD:README") { id }
+        languages(first: 20, orderBy: {field: SIZE, direction: DESC}) {
+          edges { size node { name } }
+        }
+        defaultBranchRef {
+          target { ... on Commit { history { totalCount } } }
+        }
+      }
+    }
+  }
+}
+"""
+
+_README_ALIASES = ("readmeMd", "readmeLowerMd", "readmeTxt", "readmeLowerTxt", "readmePlain")
+
+# Derived per-repo data that stays valid until the repository is pushed to again
+_CARRY_OVER_FIELDS = ("has_readme", "languages", "commit_count")
+
+# Shared by every GitHubService instance so separate services in one request dedupe too
+_in_flight = SingleFlight()
+_recent_results = MemoryCache(
+    max_entries=settings.github_memo_max_entries,
+    ttl_seconds=settings.github_memo_ttl_seconds
+)
+
+class _RequestCounter:
+    """Counts GitHub requests made while a top-level call is running."""
+
+    def __init__(self, parent: Optional["_RequestCounter"] = None):
+        self.count = 0
+        self.parent = parent
+
+_request_counter: ContextVar[Optional[_RequestCounter]] = ContextVar("github_request_counter", default=None)
 
 class GitHubService:
     def __init__(self):
-        self.base_url = "https://api.github.com"
+        self.base_url = settings.github_api_url.rstrip("/")
         self.headers = {
             "Accept": "application/vnd.github.v3+json",
             "User-Agent": "PortReviewer/1.0"
         }
+    
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request through the shared connection pool, capped per host.
+        API calls without their own Authorization header are authenticated from
+        the token pool; a rate-limit rejection is retried on another token, or
+        after the reset once every token is spent.
+        """
+        if not url.startswith(self.base_url) or "Authorization" in (kwargs.get("headers") or {}):
+            return await self._send(method, url, **kwargs)
+        
+        headers = dict(kwargs.pop("headers", None) or self.headers)
+        resource = github_rate_limiter.resource_for(url)
+        
+        for _ in range(len(github_rate_limiter.tokens) + 1):
+            budget = await github_rate_limiter.acquire(resource)
+            if budget.token:
+                headers["Authorization"] = f"token {budget.token}"
+            
+            response = None
+            try:
+                response = await self._send(method, url, headers=headers, **kwargs)
+            finally:
+                rate_limited = github_rate_limiter.release(budget, response)
+            
+            if not rate_limited:
+                break
         
-        if settings.github_token:
-            self.headers["Authorization"] = f"token {settings.github_token}"
+        return response
+    
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send with retries: timeouts, connection errors, 5xx and secondary rate
+        limits are retried with backoff (honoring Retry-After) behind the host's
+        circuit breaker. Pass timeout= to override the client default per call.
+        Only reads are retried (GET and GraphQL queries), never the OAuth exchange.
+        """
+        host = urlsplit(url).netloc
+        breaker = circuit_breaker(host)
+        idempotent = method == "GET" or url.endswith("/graphql")
+        attempts = max(1, settings.github_retry_max_attempts) if idempotent else 1
+        
+        for attempt in range(1, attempts + 1):
+            breaker.before_call()
+            
+            counter = _request_counter.get()
+            while counter is not None:
+                counter.count += 1
+                counter = counter.parent
+            
+            client = get_github_client()
+            try:
+                async with _host_semaphore(url):
+                    response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                if attempt == attempts:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"GitHub {method} {url} failed ({type(e).__name__}), retry {attempt}/{attempts - 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled, or failed in a way that says nothing about GitHub's health
+                # (decoding, redirects, bad URL): free the half-open trial slot
+                breaker.record_abandoned()
+                raise
+            
+            if response.status_code in (500, 502, 503, 504):
+                breaker.record_failure()
+            else:
+                # Client errors and secondary limits mean GitHub itself is healthy
+                breaker.record_success()
+            
+            if not is_retryable_response(response) or attempt == attempts:
+                return response
+            
+            delay = backoff_delay(attempt, response)
+            reason = "secondary rate limit" if is_secondary_rate_limit(response) else f"HTTP {response.status_code}"
+            logger.warning(f"GitHub {method} {url} got {reason}, retry {attempt}/{attempts - 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
     
     async def exchange_code_for_token(self, code: str) -> Dict[str, Any]:
         """
         Exchange GitHub OAuth code for access token.
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://github.com/login/oauth/access_token",
-                data={
-                    "client_id": settings.github_client_id,
-                    "client_secret": settings.github_client_secret,
-                    "code": code,
-                },
-                headers={"Accept": "application/json"}
-            )
-            response.raise_for_status()
-            token_data = response.json()
-            
-            # Convert to expected format
-            return {
-                "access_token": token_data.get("access_token"),
-                "token_type": token_data.get("token_type", "bearer"),
-                "scope": token_data.get("scope", "")
-            }
+        response = await self._request(
+            "POST",
+            settings.github_oauth_token_url,
+            data={
+                "client_id": settings.github_client_id,
+                "client_secret": settings.github_client_secret,
+                "code": code,
+            },
+            headers={"Accept": "application/json"}
+        )
+        response.raise_for_status()
+        token_data = response.json()
+        
+        # Convert to expected format
+        return {
+            "access_token": token_data.get("access_token"),
+            "token_type": token_data.get("token_type", "bearer"),
+            "scope": token_data.get("scope", "")
+        }
+    
+    async def _shared_call(self, key: tuple, fetch) -> Any:
+        """
+        Run fetch() once for concurrent or recently completed identical calls.
+        Callers get their own copy so they can mutate results freely.
+        """
+        key = (self.base_url,) + key
+        cached = _recent_results.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
+        async def run():
+            result = await fetch()
+            _recent_results.set(key, result)
+            return result
+        
+        result = await _in_flight.do(key, run)
+        return copy.deepcopy(result)
     
     async def get_user_data(self, access_token: str) -> Dict[str, Any]:
         """
@@ -46,141 +233,464 @@ class GitHubService:
             "Authorization": f"token {access_token}"
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/user",
-                headers=headers
-            )
-            response.raise_for_status()
-            user_data = response.json()
-            
-            # Convert to expected format
-            return {
-                "id": user_data.get("id"),
-                "login": user_data.get("login"),
-                "name": user_data.get("name"),
-                "email": user_data.get("email"),
-                "avatar_url": user_data.get("avatar_url"),
-                "bio": user_data.get("bio"),
-                "company": user_data.get("company"),
-                "location": user_data.get("location"),
-                "blog": user_data.get("blog"),
-                "public_repos": user_data.get("public_repos", 0),
-                "followers": user_data.get("followers", 0),
-                "following": user_data.get("following", 0),
-                "created_at": user_data.get("created_at"),
-                "updated_at": user_data.get("updated_at")
-            }
+        response = await self._request(
+            "GET",
+            f"{self.base_url}/user",
+            headers=headers
+        )
+        response.raise_for_status()
+        user_data = response.json()
+        
+        # Convert to expected format
+        return {
+            "id": user_data.get("id"),
+            "login": user_data.get("login"),
+            "name": user_data.get("name"),
+            "email": user_data.get("email"),
+            "avatar_url": user_data.get("avatar_url"),
+            "bio": user_data.get("bio"),
+            "company": user_data.get("company"),
+            "location": user_data.get("location"),
+            "blog": user_data.get("blog"),
+            "public_repos": user_data.get("public_repos", 0),
+            "followers": user_data.get("followers", 0),
+            "following": user_data.get("following", 0),
+            "created_at": user_data.get("created_at"),
+            "updated_at": user_data.get("updated_at")
+        }
     
     async def get_user_repositories(self, username: str, per_page: int = 100) -> List[Dict[str, Any]]:
         """
         Get user's public repositories.
         """
+        return await self._shared_call(
+            ("repositories", username.lower(), per_page),
+            lambda: self._get_user_repositories(username, per_page)
+        )
+    
+    async def sync_user_repositories(
+        self,
+        username: str,
+        previous_repositories: Optional[List[Dict[str, Any]]] = None,
+        sync_state: Optional[Dict[str, Any]] = None,
+        per_page: int = 100
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Incremental repository sync using conditional requests.
+        
+        Listing pages are requested with the ETag from the previous sync; a 304
+        (free against the rate limit) reuses that page's previous repositories.
+        Repositories whose pushed_at is unchanged keep their README/language
+        data, so only new or pushed repos are re-checked.
+        Returns (repositories, sync_state to persist for the next call).
+        """
+        if self._use_graphql():
+            # GraphQL POSTs cannot be conditional; a full fetch is only a few requests anyway
+            return await self.get_user_repositories(username, per_page), {}
+        
+        state = sync_state or {}
+        if state.get("username", "").lower() != username.lower() or state.get("per_page") != per_page:
+            # Nothing to compare against: a full fetch, shared with identical concurrent/recent calls
+            return await self._shared_call(
+                ("repository_sync", username.lower(), per_page),
+                lambda: self._sync_user_repositories(username, per_page, {}, {})
+            )
+        
+        previous_by_name = {repo.get("name"): repo for repo in previous_repositories or []}
+        return await self._sync_user_repositories(username, per_page, state.get("pages", {}), previous_by_name)
+    
+    async def _sync_user_repositories(
+        self,
+        username: str,
+        per_page: int,
+        previous_pages: Dict[str, Dict[str, Any]],
+        previous_by_name: Dict[str, Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        counter = _RequestCounter(_request_counter.get())
+        counter_token = _request_counter.set(counter)
+        try:
+            repositories, pages, not_modified = await self._fetch_repository_pages_conditional(
+                username, per_page, previous_pages, previous_by_name
+            )
+            
+            changed = []
+            unprobed = []
+            for repo in repositories:
+                previous = previous_by_name.get(repo.get("name"))
+                if previous is not None and previous.get("pushed_at") == repo.get("pushed_at"):
+                    for field in _CARRY_OVER_FIELDS:
+                        if field in previous:
+                            repo[field] = previous[field]
+                    if "has_readme" not in previous:
+                        unprobed.append(repo)  # The last README probe failed
+                else:
+                    changed.append(repo)
+            
+            await self._detect_readmes(username, changed + unprobed)
+            report_progress("readmes_checked", {
+                "repositories": len(repositories),
+                "checked": len(changed) + len(unprobed),
+                "with_readme": sum(1 for repo in repositories if repo.get("has_readme"))
+            })
+        finally:
+            _request_counter.reset(counter_token)
+        
+        # Later plain get_user_repositories calls (activity stats) reuse this result
+        _recent_results.set((self.base_url, "repositories", username.lower(), per_page), copy.deepcopy(repositories))
+        
+        logger.info(
+            f"Synced {len(repositories)} repositories for {username} using {counter.count} GitHub requests "
+            f"({not_modified} listing pages not modified, {len(changed)} repos re-checked)"
+        )
+        return repositories, {
+            "username": username,
+            "per_page": per_page,
+            "pages": pages,
+            "synced_at": datetime.utcnow().isoformat()
+        }
+    
+    async def _fetch_repository_pages_conditional(
+        self,
+        username: str,
+        per_page: int,
+        previous_pages: Dict[str, Dict[str, Any]],
+        previous_by_name: Dict[str, Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]], int]:
+        """
+        Page through the repository listing with If-None-Match.
+        Returns (repositories, {page: {etag, repos}}, number of 304 pages).
+        """
         repositories = []
+        pages = {}
+        not_modified = 0
         page = 1
         
-        async with httpx.AsyncClient() as client:
-            while True:
-                response = await client.get(
-                    f"{self.base_url}/users/{username}/repos",
-                    headers=self.headers,
-                    params={
-                        "sort": "updated",
-                        "direction": "desc",
-                        "per_page": per_page,
-                        "page": page
-                    }
-                )
+        while True:
+            headers = dict(self.headers)
+            previous_page = previous_pages.get(str(page))
+            # Only send the ETag if every repo on that page can be restored from the previous sync
+            if previous_page and all(name in previous_by_name for name in previous_page["repos"]):
+                headers["If-None-Match"] = previous_page["etag"]
+            
+            response = await self._request(
+                "GET",
+                f"{self.base_url}/users/{username}/repos",
+                headers=headers,
+                params={
+                    "sort": "updated",
+                    "direction": "desc",
+                    "per_page": per_page,
+                    "page": page
+                }
+            )
+            
+            if response.status_code == 304:
+                not_modified += 1
+                etag = previous_page["etag"]
+                page_repos = [copy.deepcopy(previous_by_name[name]) for name in previous_page["repos"]]
+            else:
                 response.raise_for_status()
-                repos = response.json()
-                
-                if not repos:
-                    break
+                etag = response.headers.get("ETag")
+                page_repos = [self._normalize_repository(repo) for repo in response.json()]
+            
+            if not page_repos:
+                break
+            
+            repositories.extend(page_repos)
+            if etag:
+                pages[str(page)] = {"etag": etag, "repos": [repo.get("name") for repo in page_repos]}
+            report_progress("repo_page", {"page": page, "repositories": len(repositories), "not_modified": response.status_code == 304})
+            
+            # GitHub API pagination
+            if len(page_repos) < per_page:
+                break
+            
+            page += 1
+            
+            # Limit to prevent excessive API calls
+            if page > 10:  # Max 1000 repos
+                break
+        
+        return repositories, pages, not_modified
+    
+    async def _get_user_repositories(self, username: str, per_page: int) -> List[Dict[str, Any]]:
+        counter = _RequestCounter(_request_counter.get())
+        counter_token = _request_counter.set(counter)
+        try:
+            if self._use_graphql():
+                # README, languages and commit totals arrive with the listing
+                repositories = await self._fetch_repositories_graphql(username)
+            else:
+                repositories = await self._fetch_repository_pages(username, per_page)
                 
-                for repo in repos:
-                    # Get additional repository details
-                    repo_data = {
-                        "id": repo.get("id"),
-                        "name": repo.get("name"),
-                        "full_name": repo.get("full_name"),
-                        "description": repo.get("description"),
-                        "html_url": repo.get("html_url"),
-                        "clone_url": repo.get("clone_url"),
-                        "language": repo.get("language"),
-                        "stargazers_count": repo.get("stargazers_count", 0),
-                        "stars": repo.get("stargazers_count", 0),  # For frontend compatibility
-                        "watchers_count": repo.get("watchers_count", 0),
-                        "forks_count": repo.get("forks_count", 0),
-                        "forks": repo.get("forks_count", 0),  # For frontend compatibility
-                        "url": repo.get("html_url"),  # For frontend compatibility
-                        "open_issues_count": repo.get("open_issues_count", 0),
-                        "size": repo.get("size", 0),
-                        "topics": repo.get("topics", []),
-                        "created_at": repo.get("created_at"),
-                        "updated_at": repo.get("updated_at"),
-                        "pushed_at": repo.get("pushed_at"),
-                        "license": repo.get("license"),
-                        "has_readme": False,  # Will be checked separately
-                        "has_wiki": repo.get("has_wiki", False),
-                        "has_pages": repo.get("has_pages", False),
-                        "archived": repo.get("archived", False),
-                        "disabled": repo.get("disabled", False),
-                        "private": repo.get("private", False),
-                        "fork": repo.get("fork", False)
+                # README detection runs concurrently across repos once the listing is complete
+                await self._detect_readmes(username, repositories)
+            
+            report_progress("readmes_checked", {
+                "repositories": len(repositories),
+                "with_readme": sum(1 for repo in repositories if repo.get("has_readme"))
+            })
+        finally:
+            _request_counter.reset(counter_token)
+        
+        logger.info(f"Fetched {len(repositories)} repositories for {username} using {counter.count} GitHub requests")
+        return repositories
+    
+    async def _fetch_repository_pages(self, username: str, per_page: int) -> List[Dict[str, Any]]:
+        """
+        Page through /users/{username}/repos and normalize each repository.
+        """
+        repositories = []
+        page = 1
+        
+        while True:
+            response = await self._request(
+                "GET",
+                f"{self.base_url}/users/{username}/repos",
+                headers=self.headers,
+                params={
+                    "sort": "updated",
+                    "direction": "desc",
+                    "per_page": per_page,
+                    "page": page
+                }
+            )
+            response.raise_for_status()
+            repos = response.json()
+            
+            if not repos:
+                break
+            
+            repositories.extend(self._normalize_repository(repo) for repo in repos)
+            report_progress("repo_page", {"page": page, "repositories": len(repositories)})
+            
+            # GitHub API pagination
+            if len(repos) < per_page:
+                break
+            
+            page += 1
+            
+            # Limit to prevent excessive API calls
+            if page > 10:  # Max 1000 repos
+                break
+        
+        return repositories
+    
+    def _use_graphql(self) -> bool:
+        """GraphQL mode is opt-in and only works with an authenticated client."""
+        if settings.github_fetch_mode != "graphql":
+            return False
+        if not github_rate_limiter.has_tokens:
+            logger.warning("GITHUB_FETCH_MODE=graphql requires GITHUB_TOKEN or GITHUB_TOKENS - using REST")
+            return False
+        return True
+    
+    async def _fetch_repositories_graphql(self, username: str) -> List[Dict[str, Any]]:
+        """
+        Fetch repositories through the GraphQL API, a page of repos per request.
+        """
+        repositories = []
+        cursor = None
+        
+        for page in range(1, 21):  # Same 1000 repo ceiling as the REST path
+            response = await self._request(
+                "POST",
+                f"{self.base_url}/graphql",
+                headers=self.headers,
+                json={
+                    "query": _REPOSITORIES_QUERY,
+                    "variables": {
+                        "login": username,
+                        "first": settings.github_graphql_page_size,
+                        "after": cursor
                     }
-                    
-                    # Check for README
-                    readme_exists = await self._check_readme_exists(username, repo.get("name"))
-                    repo_data["has_readme"] = readme_exists
-                    
-                    repositories.append(repo_data)
-                
-                # GitHub API pagination
-                if len(repos) < per_page:
-                    break
-                
-                page += 1
-                
-                # Limit to prevent excessive API calls
-                if page > 10:  # Max 1000 repos
-                    break
+                }
+            )
+            response.raise_for_status()
+            payload = response.json()
+            
+            if payload.get("errors"):
+                messages = "; ".join(error.get("message", "") for error in payload["errors"])
+                raise httpx.HTTPStatusError(
+                    f"GitHub GraphQL error: {messages}",
+                    request=response.request,
+                    response=response
+                )
+            
+            user = (payload.get("data") or {}).get("user")
+            if not user:
+                break
+            
+            connection = user["repositories"]
+            repositories.extend(self._normalize_graphql_repository(node) for node in connection["nodes"])
+            report_progress("repo_page", {"page": page, "repositories": len(repositories)})
+            
+            if not connection["pageInfo"]["hasNextPage"]:
+                break
+            cursor = connection["pageInfo"]["endCursor"]
         
         return repositories
     
-    async def _check_readme_exists(self, username: str, repo_name: str) -> bool:
+    def _normalize_graphql_repository(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a GraphQL repository node to the same dict shape as the REST path."""
+        license_info = node.get("licenseInfo")
+        license_data = None
+        if license_info:
+            license_data = {
+                "key": license_info.get("key"),
+                "name": license_info.get("name"),
+                "spdx_id": license_info.get("spdxId"),
+                "url": license_info.get("url")
+            }
+        
+        history = ((node.get("defaultBranchRef") or {}).get("target") or {}).get("history") or {}
+        
+        return {
+            "id": node.get("databaseId"),
+            "name": node.get("name"),
+            "full_name": node.get("nameWithOwner"),
+            "description": node.get("description"),
+            "html_url": node.get("url"),
+            "clone_url": f"{node.get('url')}.git",
+            "language": (node.get("primaryLanguage") or {}).get("name"),
+            "stargazers_count": node.get("stargazerCount", 0),
+            "stars": node.get("stargazerCount", 0),  # For frontend compatibility
+            "watchers_count": (node.get("watchers") or {}).get("totalCount", 0),
+            "forks_count": node.get("forkCount", 0),
+            "forks": node.get("forkCount", 0),  # For frontend compatibility
+            "url": node.get("url"),  # For frontend compatibility
+            "open_issues_count": (node.get("issues") or {}).get("totalCount", 0),
+            "size": node.get("diskUsage") or 0,
+            "topics": [
+                topic_node["topic"]["name"]
+                for topic_node in (node.get("repositoryTopics") or {}).get("nodes", [])
+            ],
+            "created_at": node.get("createdAt"),
+            "updated_at": node.get("updatedAt"),
+            "pushed_at": node.get("pushedAt"),
+            "license": license_data,
+            "has_readme": any(node.get(alias) for alias in _README_ALIASES),
+            "has_wiki": node.get("hasWikiEnabled", False),
+            "has_pages": False,  # Not exposed by the GraphQL API
+            "archived": node.get("isArchived", False),
+            "disabled": node.get("isDisabled", False),
+            "private": node.get("isPrivate", False),
+            "fork": node.get("isFork", False),
+            "languages": {
+                edge["node"]["name"]: edge["size"]
+                for edge in (node.get("languages") or {}).get("edges", [])
+            },
+            "commit_count": history.get("totalCount")
+        }
+    
+    def _normalize_repository(self, repo: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a GitHub API repository payload to our repository dict."""
+        return {
+            "id": repo.get("id"),
+            "name": repo.get("name"),
+            "full_name": repo.get("full_name"),
+            "description": repo.get("description"),
+            "html_url": repo.get("html_url"),
+            "clone_url": repo.get("clone_url"),
+            "language": repo.get("language"),
+            "stargazers_count": repo.get("stargazers_count", 0),
+            "stars": repo.get("stargazers_count", 0),  # For frontend compatibility
+            "watchers_count": repo.get("watchers_count", 0),
+            "forks_count": repo.get("forks_count", 0),
+            "forks": repo.get("forks_count", 0),  # For frontend compatibility
+            "url": repo.get("html_url"),  # For frontend compatibility
+            "open_issues_count": repo.get("open_issues_count", 0),
+            "size": repo.get("size", 0),
+            "topics": repo.get("topics", []),
+            "created_at": repo.get("created_at"),
+            "updated_at": repo.get("updated_at"),
+            "pushed_at": repo.get("pushed_at"),
+            "license": repo.get("license"),
+            "has_readme": False,  # Will be checked separately
+            "has_wiki": repo.get("has_wiki", False),
+            "has_pages": repo.get("has_pages", False),
+            "archived": repo.get("archived", False),
+            "disabled": repo.get("disabled", False),
+            "private": repo.get("private", False),
+            "fork": repo.get("fork", False)
+        }
+    
+    async def _detect_readmes(self, username: str, repositories: List[Dict[str, Any]]):
+        """
+        Fill in has_readme for every repository, bounded by github_readme_concurrency.
+        A repository whose probe failed is left without has_readme, so it is neither
+        counted as documented nor carried over, and the next sync probes it again.
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.github_readme_concurrency))
+        
+        async def check(repo: Dict[str, Any]):
+            async with semaphore:
+                has_readme = await self._check_readme_exists(username, repo.get("name"))
+            if has_readme is None:
+                repo.pop("has_readme", None)
+            else:
+                repo["has_readme"] = has_readme
+        
+        await asyncio.gather(*(check(repo) for repo in repositories))
+    
+    async def _check_readme_exists(self, username: str, repo_name: str) -> Optional[bool]:
         """
         Check if repository has a README file.
+        None when it could not be determined (timeouts, 5xx, rate limits).
         """
+        if settings.github_readme_strategy == "readme_endpoint":
+            # GitHub resolves any README variant in a single request
+            try:
+                response = await self._request(
+                    "GET",
+                    f"{self.base_url}/repos/{username}/{repo_name}/readme",
+                    headers=self.headers,
+                    timeout=settings.github_probe_timeout_seconds
+                )
+                if response.status_code not in (200, 404):
+                    response.raise_for_status()
+                return response.status_code == 200
+            except httpx.HTTPError as e:
+                logger.warning(f"README check failed for {username}/{repo_name}: {e}")
+                return None
+        
         readme_files = ["README.md", "readme.md", "README.txt", "readme.txt", "README"]
         
-        async with httpx.AsyncClient() as client:
-            for readme_file in readme_files:
-                try:
-                    response = await client.get(
-                        f"{self.base_url}/repos/{username}/{repo_name}/contents/{readme_file}",
-                        headers=self.headers
-                    )
-                    if response.status_code == 200:
-                        return True
-                except httpx.HTTPError:
-                    continue
+        failed = False
+        for readme_file in readme_files:
+            try:
+                response = await self._request(
+                    "GET",
+                    f"{self.base_url}/repos/{username}/{repo_name}/contents/{readme_file}",
+                    headers=self.headers,
+                    timeout=settings.github_probe_timeout_seconds
+                )
+                if response.status_code == 200:
+                    return True
+                if response.status_code != 404:
+                    response.raise_for_status()
+            except httpx.HTTPError as e:
+                logger.warning(f"README check for {username}/{repo_name}/{readme_file} failed: {e}")
+                failed = True
         
-        return False
+        # A failed probe may have been the README
+        return None if failed else False
     
     async def get_repository_languages(self, username: str, repo_name: str) -> Dict[str, int]:
         """
         Get programming languages used in a repository.
         """
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/repos/{username}/{repo_name}/languages",
-                    headers=self.headers
-                )
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPError:
-                return {}
+        try:
+            response = await self._request(
+                "GET",
+                f"{self.base_url}/repos/{username}/{repo_name}/languages",
+                headers=self.headers,
+                timeout=settings.github_probe_timeout_seconds
+            )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError:
+            return {}
     
     async def get_repository_commits(self, username: str, repo_name: str, since: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -190,56 +700,63 @@ class GitHubService:
         if since:
             params["since"] = since
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    f"{self.base_url}/repos/{username}/{repo_name}/commits",
-                    headers=self.headers,
-                    params=params
-                )
-                response.raise_for_status()
-                commits = response.json()
-                
-                return [
-                    {
-                        "sha": commit.get("sha"),
-                        "message": commit.get("commit", {}).get("message"),
-                        "author": commit.get("commit", {}).get("author", {}).get("name"),
-                        "date": commit.get("commit", {}).get("author", {}).get("date"),
-                        "url": commit.get("html_url")
-                    }
-                    for commit in commits
-                ]
-            except httpx.HTTPError:
-                return []
+        try:
+            response = await self._request(
+                "GET",
+                f"{self.base_url}/repos/{username}/{repo_name}/commits",
+                headers=self.headers,
+                timeout=settings.github_probe_timeout_seconds,
+                params=params
+            )
+            response.raise_for_status()
+            commits = response.json()
+            
+            return [
+                {
+                    "sha": commit.get("sha"),
+                    "message": commit.get("commit", {}).get("message"),
+                    "author": commit.get("commit", {}).get("author", {}).get("name"),
+                    "date": commit.get("commit", {}).get("author", {}).get("date"),
+                    "url": commit.get("html_url")
+                }
+                for commit in commits
+            ]
+        except httpx.HTTPError:
+            return []
     
     async def get_user_data_public(self, username: str) -> Dict[str, Any]:
         """
-        Get public user data without requiring authentication.
+        Get public user data (a user token is not needed; pool tokens are used if configured).
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/users/{username}",
-                headers={"Accept": "application/vnd.github.v3+json"}
-            )
-            response.raise_for_status()
-            user_data = response.json()
-            
-            return {
-                "id": user_data.get("id"),
-                "login": user_data.get("login"),
-                "name": user_data.get("name"),
-                "avatar_url": user_data.get("avatar_url"),
-                "bio": user_data.get("bio"),
-                "company": user_data.get("company"),
-                "location": user_data.get("location"),
-                "blog": user_data.get("blog"),
-                "public_repos": user_data.get("public_repos", 0),
-                "followers": user_data.get("followers", 0),
-                "following": user_data.get("following", 0),
-                "created_at": user_data.get("created_at"),
-                "updated_at": user_data.get("updated_at")
-            }
+        return await self._shared_call(
+            ("user", username.lower()),
+            lambda: self._get_user_data_public(username)
+        )
+    
+    async def _get_user_data_public(self, username: str) -> Dict[str, Any]:
+        response = await self._request(
+            "GET",
+            f"{self.base_url}/users/{username}",
+            headers=self.headers
+        )
+        response.raise_for_status()
+        user_data = response.json()
+        
+        return {
+            "id": user_data.get("id"),
+            "login": user_data.get("login"),
+            "name": user_data.get("name"),
+            "avatar_url": user_data.get("avatar_url"),
+            "bio": user_data.get("bio"),
+            "company": user_data.get("company"),
+            "location": user_data.get("location"),
+            "blog": user_data.get("blog"),
+            "public_repos": user_data.get("public_repos", 0),
+            "followers": user_data.get("followers", 0),
+            "following": user_data.get("following", 0),
+            "created_at": user_data.get("created_at"),
+            "updated_at": user_data.get("updated_at")
+        }
 
     async def get_user_activity_stats(self, username: str) -> Dict[str, Any]:
         """
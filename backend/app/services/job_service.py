@@ -0,0 +1,300 @@
+from typing import Dict, Any, Optional, Callable, Awaitable, List
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.core.database import get_database
+from app.core.config import settings
+import asyncio
+import logging
+import os
+import random
+import socket
+import uuid
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+class JobService:
+    """
+    Background job queue backed by the Mongo `jobs` collection.
+
+    Jobs are claimed atomically by a pool of asyncio workers in this process,
+    retried with exponential backoff, and de-duplicated while active by an
+    optional idempotency key. A running job's lock is renewed every
+    `job_heartbeat_seconds`, so only jobs whose worker died (no heartbeat for
+    `job_lock_timeout_seconds`) are reclaimed. Every write that finishes a job
+    is conditional on still holding its lock.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, JobHandler] = {}
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    def register(self, job_type: str, handler: JobHandler):
+        """Register the coroutine that runs jobs of this type with their payload."""
+        self._handlers[job_type] = handler
+
+    async def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Queue a job and return it.
+        If an active (queued or running) job has the same idempotency key, that
+        job is returned instead of creating a new one. `user_id` is the owner
+        allowed to read the job's status; jobs without one are internal.
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f"No handler registered for job type '{job_type}'")
+
+        database = await get_database()
+        if database is None:
+            raise RuntimeError("Background jobs require MongoDB")
+
+        now = datetime.utcnow()
+        job = {
+            "type": job_type,
+            "user_id": user_id,
+            "payload": payload,
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": max_attempts or settings.job_max_attempts,
+            "run_at": now,
+            "created_at": now,
+            "updated_at": now,
+            "result": None,
+            "error": None
+        }
+        if idempotency_key:
+            job["idempotency_key"] = idempotency_key
+            job["active_key"] = idempotency_key  # Unique while queued/running, unset when finished
+
+        try:
+            result = await database.jobs.insert_one(job)
+            job["_id"] = result.inserted_id
+        except DuplicateKeyError:
+            existing = await database.jobs.find_one({"active_key": idempotency_key})
+            if existing is not None:
+                logger.info(f"Reusing active job {existing['_id']} for key {idempotency_key}")
+                return self._to_public(existing)
+            # The active job finished between insert and lookup; queue a new one
+            return await self.enqueue(job_type, payload, idempotency_key, max_attempts, user_id)
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+        logger.info(f"Queued {job_type} job {job['_id']}")
+        return self._to_public(job)
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job's public status document."""
+        database = await get_database()
+        if database is None or not ObjectId.is_valid(job_id):
+            return None
+
+        job = await database.jobs.find_one({"_id": ObjectId(job_id)})
+        return self._to_public(job) if job else None
+
+    def _to_public(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        job_id = str(job["_id"])
+        return {
+            "id": job_id,
+            "type": job["type"],
+            "user_id": job.get("user_id"),
+            "status": job["status"],
+            "attempts": job.get("attempts", 0),
+            "max_attempts": job.get("max_attempts"),
+            "created_at": job.get("created_at"),
+            "started_at": job.get("started_at"),
+            "finished_at": job.get("finished_at"),
+            "next_run_at": job.get("run_at") if job["status"] == "queued" else None,
+            "result": job.get("result"),
+            "error": job.get("error"),
+            "status_url": f"/api/jobs/{job_id}"
+        }
+
+    # ------------------------------------------------------------------
+    # Worker pool
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Start the worker pool (application startup)."""
+        if self._workers:
+            return
+        if await get_database() is None:
+            logger.warning("MongoDB unavailable - background job workers not started")
+            return
+
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            asyncio.create_task(self._worker_loop(index))
+            for index in range(settings.job_workers)
+        ]
+        logger.info(f"Started {len(self._workers)} background job workers")
+
+    async def stop(self):
+        """Stop the workers. Interrupted jobs are put back on the queue."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("Background job workers stopped")
+
+    async def _worker_loop(self, index: int):
+        while True:
+            try:
+                job = await self._claim_next()
+            except Exception as e:
+                logger.error(f"Job worker {index} failed to claim a job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.job_poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run(job)
+
+    async def _claim_next(self) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest due job (or one whose worker lock expired)."""
+        database = await get_database()
+        if database is None:
+            return None
+
+        now = datetime.utcnow()
+        lock_expired = now - timedelta(seconds=settings.job_lock_timeout_seconds)
+        return await database.jobs.find_one_and_update(
+            {
+                "type": {"$in": list(self._handlers)},
+                "$or": [
+                    {"status": "queued", "run_at": {"$lte": now}},
+                    {"status": "running", "locked_at": {"$lt": lock_expired}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "locked_by": self.worker_id,
+                    "lock_id": uuid.uuid4().hex,
+                    "locked_at": now,
+                    "started_at": now,
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _run(self, job: Dict[str, Any]):
+        database = await get_database()
+        handler = self._handlers[job["type"]]
+        owned = self._owned(job)
+
+        lock_lost = asyncio.Event()
+        run = asyncio.create_task(handler(job["payload"]))
+        heartbeat = asyncio.create_task(self._heartbeat(job, run, lock_lost))
+        try:
+            result = await run
+        except asyncio.CancelledError:
+            if lock_lost.is_set():
+                # Another worker owns the job now; leave it to them
+                return
+            # Shutting down: hand the job back without spending an attempt
+            await database.jobs.update_one(
+                owned,
+                {
+                    "$set": {"status": "queued", "run_at": datetime.utcnow(), "updated_at": datetime.utcnow()},
+                    "$inc": {"attempts": -1},
+                    "$unset": {"locked_by": "", "lock_id": "", "locked_at": ""}
+                }
+            )
+            raise
+        except Exception as e:
+            await self._record_failure(job, e)
+            return
+        finally:
+            heartbeat.cancel()
+
+        now = datetime.utcnow()
+        update = await database.jobs.update_one(
+            owned,
+            {
+                "$set": {"status": "succeeded", "result": result, "error": None, "finished_at": now, "updated_at": now},
+                "$unset": {"locked_by": "", "lock_id": "", "locked_at": "", "active_key": ""}
+            }
+        )
+        if update.matched_count == 0:
+            logger.warning(f"{job['type']} job {job['_id']} finished after losing its lock; result discarded")
+            return
+        logger.info(f"{job['type']} job {job['_id']} succeeded (attempt {job['attempts']})")
+
+    def _owned(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Filter matching the job only while this claim still holds its lock."""
+        return {"_id": job["_id"], "lock_id": job["lock_id"]}
+
+    async def _heartbeat(self, job: Dict[str, Any], run: asyncio.Task, lock_lost: asyncio.Event):
+        """Renew the job's lock while it runs; cancel the run if the lock was taken over."""
+        database = await get_database()
+        while True:
+            await asyncio.sleep(settings.job_heartbeat_seconds)
+            try:
+                update = await database.jobs.update_one(
+                    self._owned(job),
+                    {"$set": {"locked_at": datetime.utcnow()}}
+                )
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {job['_id']} failed: {e}")
+                continue
+            if update.matched_count == 0:
+                logger.warning(f"{job['type']} job {job['_id']} lost its lock; abandoning this run")
+                lock_lost.set()
+                run.cancel()
+                return
+
+    async def _record_failure(self, job: Dict[str, Any], error: Exception):
+        """Schedule a retry with jittered exponential backoff, or mark the job failed."""
+        database = await get_database()
+        now = datetime.utcnow()
+        message = f"{type(error).__name__}: {error}"
+
+        if job["attempts"] < job["max_attempts"]:
+            delay = min(
+                settings.job_retry_max_seconds,
+                settings.job_retry_base_seconds * (2 ** (job["attempts"] - 1))
+            )
+            delay = random.uniform(delay / 2, delay)
+            await database.jobs.update_one(
+                self._owned(job),
+                {
+                    "$set": {"status": "queued", "run_at": now + timedelta(seconds=delay), "error": message, "updated_at": now},
+                    "$unset": {"locked_by": "", "lock_id": "", "locked_at": ""}
+                }
+            )
+            logger.warning(
+                f"{job['type']} job {job['_id']} failed (attempt {job['attempts']}/{job['max_attempts']}), "
+                f"retrying in {delay:.1f}s: {message}"
+            )
+            return
+
+        await database.jobs.update_one(
+            self._owned(job),
+            {
+                "$set": {"status": "failed", "error": message, "finished_at": now, "updated_at": now},
+                "$unset": {"locked_by": "", "lock_id": "", "locked_at": "", "active_key": ""}
+            }
+        )
+        logger.error(f"{job['type']} job {job['_id']} failed permanently: {message}")
+
+job_service = JobService()
@@ -8,11 +8,11 @@ from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
 from langchain.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 import json
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
 from app.core.config import settings
+from app.core.llm_executor import llm_executor
+from app.services.llm_cache_service import llm_response_cache
 
 class CandidateAnalysisOutput(BaseModel):
     """Structured output for candidate analysis"""
@@ -55,11 +55,26 @@ class JobDescriptionOutput(BaseModel):
     nice_to_have: List[str] = Field(description="Preferred qualifications")
     benefits: List[str] = Field(description="Company benefits")
 
+def _json_object(text: Any) -> Optional[Dict[str, Any]]:
+    """The outermost JSON object embedded in chain output text, if any."""
+    if not isinstance(text, str):
+        return None
+    start_idx = text.find('{')
+    end_idx = text.rfind('}') + 1
+    if start_idx == -1 or end_idx == 0:
+        return None
+    try:
+        parsed = json.loads(text[start_idx:end_idx])
+    except ValueError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
 class LangChainRecruitmentAI:
     """LangChain-powered recruitment AI system"""
     
     def __init__(self):
         self.llm = None
+        self.model_name = "gemini-2.5-flash-lite"
         self.setup_llm()
         
     def setup_llm(self):
@@ -67,7 +82,7 @@ class LangChainRecruitmentAI:
         try:
             if settings.gemini_api_key:
                 self.llm = GoogleGenerativeAI(
-                    model="gemini-2.5-flash-lite",
+                    model=self.model_name,
                     google_api_key=settings.gemini_api_key,
                     temperature=0.3,
                     max_tokens=4000
@@ -77,6 +92,31 @@ class LangChainRecruitmentAI:
         except Exception as e:
             print(f"Error setting up LLM: {e}")
     
+    async def _run_chain(
+        self,
+        method: str,
+        chain: LLMChain,
+        is_cacheable: Optional[Callable[[Any], bool]] = None,
+        **inputs
+    ) -> Any:
+        """
+        Run a chain on the shared LLM executor, reusing cached output for identical prompts.
+        Only output passing is_cacheable is cached (default: a non-empty parsed object).
+        """
+        prompt = chain.prompt.format(**inputs)
+        
+        async def generate():
+            result = await llm_executor.run(lambda: chain.run(**inputs))
+            return result.dict() if hasattr(result, 'dict') else result
+        
+        return await llm_response_cache.get_or_generate(
+            method,
+            self.model_name,
+            prompt,
+            generate,
+            is_cacheable=is_cacheable or (lambda result: isinstance(result, dict) and bool(result))
+        )
+    
     async def analyze_candidate_profile(self, candidate_data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze candidate using LangChain and real AI"""
         if not self.llm:
@@ -128,18 +168,15 @@ class LangChainRecruitmentAI:
             skills = json.dumps(candidate_data.get('skills', []))
             
             # Run analysis asynchronously
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as executor:
-                result = await loop.run_in_executor(
-                    executor,
-                    lambda: chain.run(
-                        github_data=github_data,
-                        portfolio_data=portfolio_data,
-                        skills=skills
-                    )
-                )
+            result = await self._run_chain(
+                "analyze_candidate_profile",
+                chain,
+                github_data=github_data,
+                portfolio_data=portfolio_data,
+                skills=skills
+            )
             
-            return result.dict() if hasattr(result, 'dict') else result
+            return result
             
         except Exception as e:
             print(f"AI analysis failed: {e}")
@@ -197,19 +234,16 @@ class LangChainRecruitmentAI:
                 output_parser=output_parser
             )
             
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as executor:
-                result = await loop.run_in_executor(
-                    executor,
-                    lambda: chain.run(
-                        role=requirements.get('role', ''),
-                        skills=json.dumps(requirements.get('skills', [])),
-                        location=requirements.get('location', ''),
-                        experience=requirements.get('experience', '')
-                    )
-                )
+            result = await self._run_chain(
+                "generate_talent_pool_insights",
+                chain,
+                role=requirements.get('role', ''),
+                skills=json.dumps(requirements.get('skills', [])),
+                location=requirements.get('location', ''),
+                experience=requirements.get('experience', '')
+            )
             
-            return result.dict() if hasattr(result, 'dict') else result
+            return result
             
         except Exception as e:
             print(f"Market insights generation failed: {e}")
@@ -270,17 +304,14 @@ class LangChainRecruitmentAI:
                 output_parser=output_parser
             )
             
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as executor:
-                result = await loop.run_in_executor(
-                    executor,
-                    lambda: chain.run(
-                        candidate_profile=json.dumps(candidate_profile),
-                        job_requirements=json.dumps(job_requirements)
-                    )
-                )
+            result = await self._run_chain(
+                "create_interview_kit",
+                chain,
+                candidate_profile=json.dumps(candidate_profile),
+                job_requirements=json.dumps(job_requirements)
+            )
             
-            return result.dict() if hasattr(result, 'dict') else result
+            return result
             
         except Exception as e:
             print(f"Interview kit generation failed: {e}")
@@ -318,18 +349,16 @@ class LangChainRecruitmentAI:
             
             chain = LLMChain(llm=self.llm, prompt=prompt_template)
             
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as executor:
-                result = await loop.run_in_executor(
-                    executor,
-                    lambda: chain.run(
-                        role=requirements.get('role', ''),
-                        company=requirements.get('company', ''),
-                        skills=', '.join(requirements.get('skills', [])),
-                        experience=requirements.get('experience', ''),
-                        location=requirements.get('location', '')
-                    )
-                )
+            result = await self._run_chain(
+                "generate_job_description",
+                chain,
+                is_cacheable=lambda result: isinstance(result, str) and bool(result.strip()),
+                role=requirements.get('role', ''),
+                company=requirements.get('company', ''),
+                skills=', '.join(requirements.get('skills', [])),
+                experience=requirements.get('experience', ''),
+                location=requirements.get('location', '')
+            )
             
             return result
             
@@ -369,27 +398,15 @@ class LangChainRecruitmentAI:
             
             chain = LLMChain(llm=self.llm, prompt=prompt_template)
             
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as executor:
-                result = await loop.run_in_executor(
-                    executor,
-                    lambda: chain.run(
-                        candidate_data=json.dumps(candidate_data),
-                        role_requirements=json.dumps(role_requirements)
-                    )
-                )
-            
-            # Parse JSON response
-            try:
-                start_idx = result.find('{')
-                end_idx = result.rfind('}') + 1
-                if start_idx != -1 and end_idx != 0:
-                    json_str = result[start_idx:end_idx]
-                    return json.loads(json_str)
-            except:
-                pass
+            result = await self._run_chain(
+                "predict_hiring_success",
+                chain,
+                is_cacheable=lambda result: _json_object(result) is not None,
+                candidate_data=json.dumps(candidate_data),
+                role_requirements=json.dumps(role_requirements)
+            )
             
-            return self._fallback_success_prediction()
+            return _json_object(result) or self._fallback_success_prediction()
             
         except Exception as e:
             print(f"Success prediction failed: {e}")
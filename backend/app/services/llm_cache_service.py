@@ -0,0 +1,108 @@
+from typing import Dict, Any, Callable, Awaitable
+from collections import defaultdict
+from app.core.config import settings
+from app.services.cache_service import MemoryCache, SingleFlight, cache_service
+import copy
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LLMResponseCache:
+    """
+    Content-addressed cache for LLM responses.
+
+    Keys are a hash of (model, rendered prompt), so identical prompts are
+    answered without a model call. A bounded in-process LRU sits in front of
+    the Mongo key/value cache; concurrent identical prompts share one call.
+    """
+
+    NAMESPACE = "llm"
+
+    def __init__(self):
+        self.memory = MemoryCache(
+            max_entries=settings.llm_cache_max_entries,
+            ttl_seconds=settings.llm_cache_ttl_seconds
+        )
+        self.single_flight = SingleFlight()
+        self.method_counters: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"memory_hits": 0, "mongo_hits": 0, "misses": 0, "coalesced": 0, "uncacheable": 0}
+        )
+
+    @staticmethod
+    def make_key(model: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest()
+
+    async def get_or_generate(
+        self,
+        method: str,
+        model: str,
+        prompt: str,
+        generate: Callable[[], Awaitable[Any]],
+        is_cacheable: Callable[[Any], bool] = lambda result: True
+    ) -> Any:
+        """
+        Return the cached response for this prompt, or call generate() and
+        cache its result. Failed generations (exceptions or results rejected
+        by is_cacheable) are never stored.
+        """
+        if not settings.llm_cache_enabled:
+            return await generate()
+
+        counters = self.method_counters[method]
+        key = self.make_key(model, prompt)
+
+        cached = self.memory.get(key)
+        if cached is not None:
+            counters["memory_hits"] += 1
+            return copy.deepcopy(cached)
+
+        cached = await cache_service.get(key, namespace=self.NAMESPACE, use_memory=False)
+        if cached is not None:
+            counters["mongo_hits"] += 1
+            self.memory.set(key, cached)
+            return copy.deepcopy(cached)
+
+        if self.single_flight.is_running(key):
+            counters["coalesced"] += 1
+        else:
+            counters["misses"] += 1
+
+        async def generate_and_store():
+            result = await generate()
+            if not is_cacheable(result):
+                counters["uncacheable"] += 1
+                return result
+
+            self.memory.set(key, copy.deepcopy(result))
+            await cache_service.set(
+                key,
+                result,
+                expire_seconds=settings.llm_cache_ttl_seconds,
+                namespace=self.NAMESPACE,
+                use_memory=False
+            )
+            return result
+
+        result = await self.single_flight.do(key, generate_and_store)
+        return copy.deepcopy(result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-method hit rates plus memory tier size/evictions."""
+        methods = {}
+        for method, counters in self.method_counters.items():
+            hits = counters["memory_hits"] + counters["mongo_hits"] + counters["coalesced"]
+            lookups = hits + counters["misses"]
+            methods[method] = {
+                **counters,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+            }
+
+        return {
+            "enabled": settings.llm_cache_enabled,
+            "memory_entries": len(self.memory),
+            "memory_evictions": self.memory.evictions,
+            "methods": methods
+        }
+
+llm_response_cache = LLMResponseCache()
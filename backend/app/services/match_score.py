@@ -0,0 +1,74 @@
+"""
+Candidate match score shared by every search backend.
+
+A portfolio's match score weighs the share of the searched skills and
+languages it has, its craftsmanship score and its repository activity. The
+components are declared once below; the scalar, NumPy and MongoDB forms all
+evaluate the same components over search_index fields, so a query ranks the
+same whether the in-process engine or MongoDB serves it.
+"""
+
+from typing import Dict, Any, List, Callable
+
+# (search_index term field, weight): share of the searched terms the portfolio carries.
+# Only counted when the search filters on that field.
+OVERLAP_COMPONENTS = (("skills", 0.3), ("languages", 0.25))
+
+# (search_index numeric field, weight, scale): value / scale, capped at 1
+VALUE_COMPONENTS = (("overall_score", 0.25, 100.0), ("repository_count", 0.2, 20.0))
+
+def match_terms(conditions: Dict[str, Any]) -> Dict[str, List[str]]:
+    """The searched terms of each overlap field, read from SearchService match conditions."""
+    terms = {}
+    for field, _ in OVERLAP_COMPONENTS:
+        condition = conditions.get(f"search_index.{field}")
+        if isinstance(condition, dict) and set(condition) == {"$in"} and condition["$in"]:
+            terms[field] = sorted(set(condition["$in"]))
+    return terms
+
+def combine(
+    terms: Dict[str, List[str]],
+    overlap: Callable[[str, List[str]], Any],
+    value: Callable[[str], Any],
+    cap: Callable[[Any], Any]
+) -> Any:
+    """
+    Weighted mean of the components.
+    overlap(field, terms) is the number of terms matched, value(field) a numeric
+    field and cap(x) min(x, 1); they may work on scalars or NumPy arrays.
+    """
+    score = 0.0
+    factors = 0.0
+    for field, weight in OVERLAP_COMPONENTS:
+        if field in terms:
+            score = score + overlap(field, terms[field]) / len(terms[field]) * weight
+            factors += weight
+    for field, weight, scale in VALUE_COMPONENTS:
+        score = score + cap(value(field) / scale) * weight
+        factors += weight
+    return score / factors
+
+def match_score(index: Dict[str, Any], terms: Dict[str, List[str]]) -> float:
+    """Score one portfolio from its search_index entry."""
+    return float(combine(
+        terms,
+        lambda field, wanted: len(set(index.get(field) or []) & set(wanted)),
+        lambda field: float(index.get(field) or 0),
+        lambda x: min(x, 1.0)
+    ))
+
+def match_score_expression(terms: Dict[str, List[str]]) -> Dict[str, Any]:
+    """The same score as a MongoDB aggregation expression over $search_index."""
+    added = []
+    factors = 0.0
+    for field, weight in OVERLAP_COMPONENTS:
+        if field in terms:
+            carried = {"$in": ["$$this", {"$ifNull": [f"$search_index.{field}", []]}]}
+            matched = {"$size": {"$filter": {"input": terms[field], "cond": carried}}}
+            added.append({"$multiply": [{"$divide": [matched, len(terms[field])]}, weight]})
+            factors += weight
+    for field, weight, scale in VALUE_COMPONENTS:
+        value = {"$divide": [{"$ifNull": [f"$search_index.{field}", 0]}, scale]}
+        added.append({"$multiply": [{"$min": [value, 1.0]}, weight]})
+        factors += weight
+    return {"$divide": [{"$add": added}, factors]}
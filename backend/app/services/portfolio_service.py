@@ -5,9 +5,71 @@ from app.models.portfolio import (
 )
 from app.services.ai_service import AIService
 from app.services.github_service import GitHubService
+from app.services.job_service import job_service
+from app.services.search_service import search_service
+from app.services.text_index_service import text_index_service
+from app.core.database import get_database
 from bson import ObjectId
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Awaitable, Tuple, Set
 from datetime import datetime
+import asyncio
+import re
+import time
+
+# A stage is (names of the stages it depends on, async fn(results so far) -> result)
+Stage = Tuple[List[str], Callable[[Dict[str, Any]], Awaitable[Any]]]
+
+async def run_stage_graph(stages: Dict[str, Stage]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Run async stages as a dependency graph.
+    Independent stages run concurrently and each stage starts as soon as its
+    dependencies finish. Returns (results by stage, timings in ms). If a stage
+    raises, the remaining stages are cancelled and the error propagates.
+    """
+    for name, (dependencies, _) in stages.items():
+        unknown = [dep for dep in dependencies if dep not in stages]
+        if unknown:
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {unknown}")
+    
+    # Reject cycles up front; they would otherwise wait forever
+    ordered: List[str] = []
+    while len(ordered) < len(stages):
+        ready = [name for name, (deps, _) in stages.items() if name not in ordered and all(dep in ordered for dep in deps)]
+        if not ready:
+            raise ValueError("Stage graph contains a cycle")
+        ordered.extend(ready)
+    
+    results: Dict[str, Any] = {}
+    stage_timings: Dict[str, Dict[str, float]] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+    graph_started = time.monotonic()
+    
+    async def run(name: str):
+        dependencies, fn = stages[name]
+        if dependencies:
+            await asyncio.gather(*(tasks[dep] for dep in dependencies))
+        started = time.monotonic()
+        results[name] = await fn(results)
+        finished = time.monotonic()
+        stage_timings[name] = {
+            "start_ms": round((started - graph_started) * 1000, 1),
+            "duration_ms": round((finished - started) * 1000, 1)
+        }
+    
+    for name in ordered:
+        tasks[name] = asyncio.create_task(run(name))
+    
+    try:
+        await asyncio.gather(*tasks.values())
+    except Exception:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    
+    return results, {
+        "stages": stage_timings,
+        "total_ms": round((time.monotonic() - graph_started) * 1000, 1)
+    }
 
 class PortfolioService:
     def __init__(self, db):
@@ -41,42 +103,102 @@ class PortfolioService:
         
         result = await self.collection.insert_one(portfolio_doc)
         portfolio_id = str(result.inserted_id)
+        await search_service.index_portfolio(portfolio_id)
         
-        # Trigger background AI analysis
-        await self._perform_full_analysis(portfolio_id, portfolio_data.github_username, portfolio_data.resume_data)
+        # Queue the AI analysis; the returned portfolio carries its job id
+        await self.enqueue_analysis(portfolio_id, user_id, portfolio_data.github_username, portfolio_data.resume_data)
         
         # Return the created portfolio
-        updated_portfolio = await self.get_portfolio(portfolio_id)
-        return updated_portfolio
+        created_portfolio = await self.get_portfolio(portfolio_id)
+        return created_portfolio
     
-    async def _perform_full_analysis(self, portfolio_id: str, github_username: str, resume_data: Dict[str, Any] = None):
+    async def enqueue_analysis(self, portfolio_id: str, user_id: str, github_username: str, resume_data: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Queue a full analysis run for a portfolio, owned by its user, and record the job id on it."""
+        job = await job_service.enqueue(
+            "portfolio_analysis",
+            {
+                "portfolio_id": portfolio_id,
+                "github_username": github_username,
+                "resume_data": resume_data
+            },
+            idempotency_key=f"portfolio_analysis:{github_username.lower()}:{portfolio_id}",
+            user_id=str(user_id)
+        )
+        
+        await self.collection.update_one(
+            {"_id": ObjectId(portfolio_id)},
+            {"$set": {"analysis_job_id": job["id"]}}
+        )
+        return job
+    
+    async def _perform_full_analysis(self, portfolio_id: str, github_username: str, resume_data: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Perform complete AI analysis pipeline for a portfolio.
+        Returns the stage timings; errors propagate so the job can be retried.
         """
         try:
-            # Step 1: Fetch GitHub repositories
-            repositories = await self.github_service.get_user_repositories(github_username)
+            ai = self.ai_service
+            sync = {}
             
-            # Step 2: AI-Powered Profile Analysis
-            profile_analysis_data = await self.ai_service.analyze_profile(repositories, resume_data)
+            async def fetch_repositories(results):
+                # Conditional requests against the last sync; unchanged repos keep their README data
+                previous = await self.collection.find_one(
+                    {"_id": ObjectId(portfolio_id)},
+                    {"github_repositories": 1, "github_sync_state": 1}
+                ) or {}
+                repositories, sync["state"] = await self.github_service.sync_user_repositories(
+                    github_username,
+                    previous_repositories=previous.get("github_repositories"),
+                    sync_state=previous.get("github_sync_state")
+                )
+                return repositories
             
-            # Step 3: Code Craftsmanship Score
-            craftsmanship_data = await self.ai_service.calculate_craftsmanship_score(repositories)
+            async def single_shot(results):
+                # Any section this could not produce falls back to its own call below
+                return await ai.generate_full_analysis(results["repositories"], resume_data=resume_data)
             
-            # Step 4: Automated Portfolio Generation
-            portfolio_content_data = await self.ai_service.generate_portfolio_content(profile_analysis_data, repositories)
+            async def profile_analysis(results):
+                return results["single_shot"].get("profile_analysis") or \
+                    await ai.analyze_profile(results["repositories"], resume_data)
             
-            # Step 5: Recruiter Insights
-            recruiter_insights_data = await self.ai_service.generate_candidate_summary({
-                "profile_analysis": profile_analysis_data,
-                "craftsmanship_score": craftsmanship_data,
-                "repositories": repositories,
-                "resume_data": resume_data
+            async def craftsmanship_score(results):
+                return results["single_shot"].get("craftsmanship_score") or \
+                    await ai.calculate_craftsmanship_score(results["repositories"])
+            
+            async def portfolio_content(results):
+                return results["single_shot"].get("portfolio_content") or \
+                    await ai.generate_portfolio_content(results["profile_analysis"], results["repositories"])
+            
+            async def recruiter_insights(results):
+                return results["single_shot"].get("recruiter_insights") or \
+                    await ai.generate_candidate_summary({
+                        "profile_analysis": results["profile_analysis"],
+                        "craftsmanship_score": results["craftsmanship_score"],
+                        "repositories": results["repositories"],
+                        "resume_data": resume_data
+                    })
+            
+            async def interview_questions(results):
+                return results["single_shot"].get("interview_questions") or \
+                    await ai.generate_interview_questions(results["repositories"], results["profile_analysis"])
+            
+            # Each stage starts as soon as the stages it depends on have finished
+            results, timings = await run_stage_graph({
+                "repositories": ([], fetch_repositories),
+                "single_shot": (["repositories"], single_shot),
+                "profile_analysis": (["single_shot"], profile_analysis),
+                "craftsmanship_score": (["single_shot"], craftsmanship_score),
+                "portfolio_content": (["profile_analysis"], portfolio_content),
+                "recruiter_insights": (["profile_analysis", "craftsmanship_score"], recruiter_insights),
+                "interview_questions": (["profile_analysis"], interview_questions)
             })
             
-            # Step 6: Generate Interview Questions
-            interview_questions = await self.ai_service.generate_interview_questions(repositories, profile_analysis_data)
-            recruiter_insights_data["interview_questions"] = interview_questions
+            repositories = results["repositories"]
+            profile_analysis_data = results["profile_analysis"]
+            craftsmanship_data = results["craftsmanship_score"]
+            portfolio_content_data = results["portfolio_content"]
+            recruiter_insights_data = results["recruiter_insights"]
+            recruiter_insights_data["interview_questions"] = results["interview_questions"]
             
             # Update portfolio with all analysis results
             update_data = {
@@ -85,6 +207,8 @@ class PortfolioService:
                 "ai_generated_content": portfolio_content_data,
                 "code_craftsmanship_score": craftsmanship_data,
                 "recruiter_insights": recruiter_insights_data,
+                "analysis_timings": timings,
+                "github_sync_state": sync["state"],
                 "last_github_sync": datetime.utcnow(),
                 "updated_at": datetime.utcnow()
             }
@@ -93,10 +217,12 @@ class PortfolioService:
                 {"_id": ObjectId(portfolio_id)},
                 {"$set": update_data}
             )
+            await search_service.index_portfolio(portfolio_id)
+            return timings
             
         except Exception as e:
-            # Log error but don't fail portfolio creation
             print(f"Analysis failed for portfolio {portfolio_id}: {str(e)}")
+            raise
     
     async def get_portfolio(self, portfolio_id: str) -> Optional[Portfolio]:
         """Get portfolio by ID."""
@@ -168,11 +294,13 @@ class PortfolioService:
         )
         
         if result.modified_count > 0:
+            await search_service.index_portfolio(portfolio_id)
+            
             # If GitHub username changed, re-run analysis
             if "github_username" in update_dict:
                 portfolio = await self.get_portfolio(portfolio_id)
                 if portfolio:
-                    await self._perform_full_analysis(portfolio_id, portfolio.github_username, portfolio.resume_data)
+                    await self.enqueue_analysis(portfolio_id, user_id, portfolio.github_username, portfolio.resume_data)
             
             return await self.get_portfolio(portfolio_id)
         return None
@@ -182,6 +310,8 @@ class PortfolioService:
         result = await self.collection.delete_one(
             {"_id": ObjectId(portfolio_id), "user_id": user_id}
         )
+        if result.deleted_count > 0:
+            search_service.remove_portfolio(portfolio_id)
         return result.deleted_count > 0
     
     async def increment_view_count(self, portfolio_id: str):
@@ -192,10 +322,10 @@ class PortfolioService:
         )
     
     async def sync_github_data(self, portfolio_id: str) -> Optional[Portfolio]:
-        """Re-sync GitHub data and re-run analysis."""
+        """Queue a GitHub re-sync and analysis; the returned portfolio carries the job id."""
         portfolio = await self.get_portfolio(portfolio_id)
         if portfolio:
-            await self._perform_full_analysis(portfolio_id, portfolio.github_username, portfolio.resume_data)
+            await self.enqueue_analysis(portfolio_id, portfolio.user_id, portfolio.github_username, portfolio.resume_data)
             return await self.get_portfolio(portfolio_id)
         return None
     
@@ -248,29 +378,50 @@ class PortfolioService:
         """
         query = {"is_public": True}
         
-        if search:
-            query["$or"] = [
-                {"title": {"$regex": search, "$options": "i"}},
-                {"description": {"$regex": search, "$options": "i"}},
-                {"skills": {"$regex": search, "$options": "i"}}
-            ]
-        
         if skills:
             query["skills"] = {"$in": skills}
         
         if experience_level:
             query["experience_level"] = experience_level
         
+        if search and text_index_service.ready and text_index_service.portfolios.has_terms(search):
+            # Ranked by the BM25 text index; MongoDB only applies the other filters by _id
+            page = await text_index_service.ranked_page(
+                text_index_service.portfolios, search, lambda ids: self._matching_ids(query, ids), skip, limit
+            )
+            if page is not None:
+                page_ids = [ObjectId(portfolio_id) for portfolio_id in page]
+                docs = await self.collection.find({"_id": {"$in": page_ids}}).to_list(length=len(page_ids))
+                docs_by_id = {doc["_id"]: doc for doc in docs}
+                return [
+                    PortfolioPublic(**docs_by_id[portfolio_id], id=str(portfolio_id))
+                    for portfolio_id in page_ids if portfolio_id in docs_by_id
+                ]
+        
+        if search:
+            # Text index still building, or no whole-word/prefix hits: substring match (scans the collection)
+            query["$or"] = [
+                {"title": {"$regex": re.escape(search), "$options": "i"}},
+                {"description": {"$regex": re.escape(search), "$options": "i"}},
+                {"skills": {"$regex": re.escape(search), "$options": "i"}}
+            ]
+        
         cursor = self.collection.find(query).skip(skip).limit(limit)
         portfolios = []
         
         async for portfolio_doc in cursor:
             # Convert to public portfolio (exclude sensitive data)
-            public_portfolio = PortfolioPublic(**portfolio_doc, id=portfolio_doc["_id"])
+            public_portfolio = PortfolioPublic(**portfolio_doc, id=str(portfolio_doc["_id"]))
             portfolios.append(public_portfolio)
         
         return portfolios
     
+    async def _matching_ids(self, query: Dict[str, Any], portfolio_ids: List[str]) -> Set[str]:
+        """The given portfolio ids that also match query."""
+        id_filter = {"$in": [ObjectId(portfolio_id) for portfolio_id in portfolio_ids]}
+        matching = await self.collection.find({**query, "_id": id_filter}, {"_id": 1}).to_list(length=None)
+        return {str(doc["_id"]) for doc in matching}
+    
     async def update_portfolio(self, portfolio_id: ObjectId, portfolio_update: PortfolioUpdate) -> Optional[Portfolio]:
         """
         Update portfolio.
@@ -284,6 +435,7 @@ class PortfolioService:
         )
         
         if result.modified_count > 0:
+            await search_service.index_portfolio(str(portfolio_id))
             return await self.get_portfolio(portfolio_id)
         return None
     
@@ -292,6 +444,8 @@ class PortfolioService:
         Delete portfolio.
         """
         result = await self.collection.delete_one({"_id": portfolio_id})
+        if result.deleted_count > 0:
+            search_service.remove_portfolio(str(portfolio_id))
         return result.deleted_count > 0
     
     async def get_portfolio_stats(self, portfolio_id: ObjectId) -> dict:
@@ -306,3 +460,15 @@ class PortfolioService:
             "average_rating": 0.0,
             "last_updated": datetime.utcnow()
         }
+
+async def run_portfolio_analysis_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Background job handler for "portfolio_analysis"."""
+    database = await get_database()
+    timings = await PortfolioService(database)._perform_full_analysis(
+        payload["portfolio_id"],
+        payload["github_username"],
+        payload.get("resume_data")
+    )
+    return {"portfolio_id": payload["portfolio_id"], "analysis_timings": timings}
+
+job_service.register("portfolio_analysis", run_portfolio_analysis_job)
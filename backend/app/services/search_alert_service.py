@@ -0,0 +1,399 @@
+from typing import Dict, Any, List, Optional, Set, Tuple
+from datetime import datetime
+from app.core.config import settings
+from app.core.database import get_database
+from app.models.search import SearchCriteria
+from app.services.search_service import search_service
+from app.services.search_result_cache import conditions_match
+from app.services.candidate_search_engine import candidate_search_engine
+from app.services.text_index_service import portfolio_text_fields, text_index_service, tokenize
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# search_index term fields a saved search can be indexed under, plus "text" for custom_query terms
+_TERM_FIELDS = ("skills", "languages", "original_topics")
+
+_SAVED_SEARCH_PROJECTION = {"criteria": 1, "recruiter_id": 1, "alerts_enabled": 1, "updated_at": 1}
+
+class CompiledSearch:
+    """A saved search reduced to what matching one portfolio needs."""
+
+    __slots__ = ("saved_search_id", "recruiter_id", "conditions", "query_terms", "keys")
+
+    def __init__(
+        self,
+        saved_search_id: str,
+        recruiter_id: str,
+        conditions: Dict[str, Any],
+        query_terms: Optional[Set[str]]
+    ):
+        self.saved_search_id = saved_search_id
+        self.recruiter_id = recruiter_id
+        self.conditions = conditions
+        self.query_terms = query_terms
+        self.keys: List[Tuple[str, str]] = []  # (field, term) entries it is indexed under
+
+    def matches(self, portfolio: Dict[str, Any], portfolio_terms: Set[str]) -> bool:
+        if self.query_terms is not None and not self.query_terms & portfolio_terms:
+            return False
+        return conditions_match(self.conditions, portfolio) is True
+
+def _term_frequency(field: str, term: str) -> Optional[int]:
+    if field == "text":
+        return text_index_service.portfolios.document_frequency(term) if text_index_service.ready else None
+    return candidate_search_engine.term_frequency(field, term)
+
+class SearchAlertService:
+    """
+    Incremental saved-search alerts.
+
+    Alert-enabled saved searches are compiled once into match conditions and
+    indexed under the terms of their most selective term filter: the skill,
+    language or topic list (or custom_query terms) that the fewest portfolios
+    carry. Any portfolio matching the search must carry one of those terms, so
+    an indexed portfolio is tested only against the searches filed under its
+    own terms, plus the few searches with no term filter at all.
+
+    Matches are recorded per saved search in `search_alerts` (one SearchAlert
+    document each, counting every portfolio once). Searches saved, toggled or
+    deleted through this process apply immediately; other processes' changes
+    are picked up from MongoDB every `search_alert_refresh_seconds`.
+    """
+
+    def __init__(self):
+        self._searches: Dict[str, CompiledSearch] = {}
+        self._by_term: Dict[Tuple[str, str], Set[str]] = {}
+        self._unindexed: Set[str] = set()  # No term filter: tested against every portfolio
+        self._text_keys = 0
+        self._query_searches = 0  # Searches with custom_query terms, which need the portfolio's text
+        self._estimated = False  # Some searches were filed before term frequencies were known
+        self._loaded_at = 0.0
+        self._watermark: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._replay: Optional[List[Tuple[str, Optional[Dict[str, Any]]]]] = None  # Changes seen during a load
+        self.ready = False
+        self.portfolios_checked = 0
+        self.searches_tested = 0
+        self.alerts_recorded = 0
+        self.last_load_seconds = 0.0
+
+    # ------------------------------------------------------------------
+    # Compiled search index
+    # ------------------------------------------------------------------
+
+    def compile(self, saved_search: Dict[str, Any]) -> CompiledSearch:
+        criteria = SearchCriteria(**saved_search.get("criteria") or {})
+        query_terms = set(tokenize(criteria.custom_query)) if criteria.custom_query else None
+        return CompiledSearch(
+            str(saved_search["_id"]),
+            saved_search.get("recruiter_id"),
+            search_service._build_match_conditions(criteria),
+            query_terms or None
+        )
+
+    def _selective_keys(self, compiled: CompiledSearch) -> List[Tuple[str, str]]:
+        """
+        (field, term) keys of the term filter the fewest portfolios satisfy.
+        Without term frequencies yet (indexes still loading), the shortest term list wins.
+        """
+        options = []
+        for field in _TERM_FIELDS:
+            condition = compiled.conditions.get(f"search_index.{field}")
+            if isinstance(condition, dict) and set(condition) == {"$in"} and condition["$in"]:
+                options.append((field, sorted(set(condition["$in"]))))
+        if compiled.query_terms:
+            options.append(("text", sorted(compiled.query_terms)))
+        if not options:
+            return []
+
+        def cost(option):
+            field, terms = option
+            frequencies = [_term_frequency(field, term) for term in terms]
+            if any(frequency is None for frequency in frequencies):
+                self._estimated = True
+                return (1, len(terms))
+            return (0, sum(frequencies))
+
+        field, terms = min(options, key=cost)
+        return [(field, term) for term in terms]
+
+    def add(self, saved_search: Dict[str, Any]):
+        """Compile and index one alert-enabled saved search (replacing an older version)."""
+        saved_search_id = str(saved_search["_id"])
+        self.remove(saved_search_id)
+        try:
+            compiled = self.compile(saved_search)
+        except Exception as e:
+            logger.warning(f"Saved search {saved_search_id} has invalid criteria, no alerts: {e}")
+            return
+
+        compiled.keys = self._selective_keys(compiled)
+        for key in compiled.keys:
+            self._by_term.setdefault(key, set()).add(saved_search_id)
+            if key[0] == "text":
+                self._text_keys += 1
+        if not compiled.keys:
+            self._unindexed.add(saved_search_id)
+        if compiled.query_terms:
+            self._query_searches += 1
+        self._searches[saved_search_id] = compiled
+
+    def remove(self, saved_search_id: str):
+        compiled = self._searches.pop(saved_search_id, None)
+        if compiled is None:
+            return
+        for key in compiled.keys:
+            filed = self._by_term.get(key)
+            if filed is not None:
+                filed.discard(saved_search_id)
+                if not filed:
+                    del self._by_term[key]
+            if key[0] == "text":
+                self._text_keys -= 1
+        self._unindexed.discard(saved_search_id)
+        if compiled.query_terms:
+            self._query_searches -= 1
+
+    def saved_search_changed(self, saved_search_id: str, saved_search: Optional[Dict[str, Any]]):
+        """search_service listener: apply a saved search this process saved, toggled or deleted (None)."""
+        if self._replay is not None:
+            self._replay.append((saved_search_id, saved_search))
+        if saved_search is not None and saved_search.get("alerts_enabled"):
+            self.add(saved_search)
+        else:
+            self.remove(saved_search_id)
+
+    def candidates(self, portfolio: Dict[str, Any], portfolio_terms: Set[str]) -> Set[str]:
+        """Saved searches a portfolio could match, from its own terms."""
+        index = portfolio.get("search_index") or {}
+        found = set(self._unindexed)
+        for field in _TERM_FIELDS:
+            for term in index.get(field) or []:
+                filed = self._by_term.get((field, term))
+                if filed:
+                    found |= filed
+        if self._text_keys:
+            for term in portfolio_terms:
+                filed = self._by_term.get(("text", term))
+                if filed:
+                    found |= filed
+        return found
+
+    def match(self, portfolio: Dict[str, Any]) -> List[CompiledSearch]:
+        """Alert-enabled saved searches the portfolio matches."""
+        if not portfolio.get("is_public") or not self._searches:
+            return []
+
+        portfolio_terms = set()
+        if self._query_searches:
+            portfolio_terms = {term for text, _ in portfolio_text_fields(portfolio) for term in tokenize(text)}
+
+        candidate_ids = self.candidates(portfolio, portfolio_terms)
+        self.portfolios_checked += 1
+        self.searches_tested += len(candidate_ids)
+        matched = []
+        for saved_search_id in candidate_ids:
+            compiled = self._searches[saved_search_id]
+            if compiled.matches(portfolio, portfolio_terms):
+                matched.append(compiled)
+        return matched
+
+    # ------------------------------------------------------------------
+    # Alerts
+    # ------------------------------------------------------------------
+
+    async def portfolio_indexed(self, portfolio: Dict[str, Any]):
+        """search_service index listener: record alerts for the searches this portfolio now matches."""
+        try:
+            matched = self.match(portfolio)
+            if matched:
+                await self._record(str(portfolio["_id"]), matched)
+        except Exception as e:
+            logger.error(f"Saved-search alerts failed for portfolio {portfolio.get('_id')}: {e}")
+
+    async def _record(self, portfolio_id: str, matched: List[CompiledSearch]):
+        database = await get_database()
+        if database is None:
+            return
+
+        now = datetime.utcnow()
+        try:
+            # Update the searches that already have an alert document, insert the rest
+            existing = set(await database.search_alerts.distinct(
+                "saved_search_id",
+                {"saved_search_id": {"$in": [compiled.saved_search_id for compiled in matched]}}
+            ))
+            await self._update_alerts(
+                database, portfolio_id, [compiled for compiled in matched if compiled.saved_search_id in existing], now
+            )
+            created = [compiled for compiled in matched if compiled.saved_search_id not in existing]
+            if not created:
+                return
+            try:
+                await database.search_alerts.insert_many([
+                    {
+                        "saved_search_id": compiled.saved_search_id,
+                        "recruiter_id": compiled.recruiter_id,
+                        "candidate_ids": [portfolio_id],
+                        "new_candidates_count": 1,
+                        "last_triggered": now,
+                        "is_active": True
+                    }
+                    for compiled in created
+                ], ordered=False)
+                self.alerts_recorded += len(created)
+            except BulkWriteError as e:
+                # Another process created some of these documents since the lookup: update those instead
+                failed = {error["index"] for error in e.details.get("writeErrors", [])}
+                self.alerts_recorded += e.details.get("nInserted", 0)
+                await self._update_alerts(
+                    database, portfolio_id, [compiled for index, compiled in enumerate(created) if index in failed], now
+                )
+        except PyMongoError as e:
+            logger.error(f"Recording {len(matched)} search alerts for portfolio {portfolio_id} failed: {e}")
+
+    async def _update_alerts(self, database, portfolio_id: str, matched: List[CompiledSearch], now: datetime):
+        if not matched:
+            return
+        operations = [
+            # Filtering on candidate_ids makes a repeat match a no-op
+            UpdateOne(
+                {"saved_search_id": compiled.saved_search_id, "candidate_ids": {"$ne": portfolio_id}},
+                {
+                    "$addToSet": {"candidate_ids": portfolio_id},
+                    "$inc": {"new_candidates_count": 1},
+                    "$set": {"recruiter_id": compiled.recruiter_id, "last_triggered": now, "is_active": True}
+                }
+            )
+            for compiled in matched
+        ]
+        result = await database.search_alerts.bulk_write(operations, ordered=False)
+        self.alerts_recorded += result.modified_count
+
+    async def get_alerts(self, recruiter_id: str) -> List[Dict[str, Any]]:
+        """SearchAlert documents of a recruiter, most recently triggered first."""
+        database = await get_database()
+        if database is None:
+            return []
+        cursor = database.search_alerts.find({"recruiter_id": recruiter_id}).sort("last_triggered", -1)
+        alerts = await cursor.to_list(length=100)
+        for alert in alerts:
+            alert["id"] = str(alert.pop("_id"))
+        return alerts
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        if not settings.search_alerts_enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                # Full loads re-file searches by current term frequencies
+                stale = time.monotonic() - self._loaded_at >= settings.search_alert_full_reload_seconds
+                known = candidate_search_engine.ready or not candidate_search_engine.available
+                if not self.ready or stale or (self._estimated and known):
+                    await self.load()
+                else:
+                    await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Saved-search alert refresh failed: {e}")
+            await asyncio.sleep(settings.search_alert_refresh_seconds)
+
+    async def load(self):
+        """Compile every alert-enabled saved search, then swap them in."""
+        database = await get_database()
+        if database is None:
+            return
+
+        started_at = time.perf_counter()
+        fresh = SearchAlertService()
+        self._replay = []
+        try:
+            async for saved_search in database.saved_searches.find({"alerts_enabled": True}, _SAVED_SEARCH_PROJECTION):
+                fresh.add(saved_search)
+                fresh._advance(saved_search)
+            # The scan may have read a saved search before this process changed or deleted it
+            for saved_search_id, saved_search in self._replay:
+                fresh.saved_search_changed(saved_search_id, saved_search)
+        finally:
+            self._replay = None
+
+        self._searches, self._by_term, self._unindexed = fresh._searches, fresh._by_term, fresh._unindexed
+        self._text_keys, self._query_searches, self._estimated = fresh._text_keys, fresh._query_searches, fresh._estimated
+        self._watermark = fresh._watermark or self._watermark
+        self._loaded_at = time.monotonic()
+        self.ready = True
+
+        self.last_load_seconds = time.perf_counter() - started_at
+        logger.info(f"Compiled {len(self._searches)} saved-search alerts in {self.last_load_seconds:.2f}s")
+
+    async def refresh(self):
+        """
+        Apply saved searches created or changed since the last load or refresh,
+        and drop compiled searches that were deleted since.
+        """
+        database = await get_database()
+        if database is None:
+            return
+
+        query = {"updated_at": {"$gte": self._watermark}} if self._watermark else {}
+        async for saved_search in database.saved_searches.find(query, _SAVED_SEARCH_PROJECTION):
+            if saved_search.get("alerts_enabled"):
+                self.add(saved_search)
+            else:
+                self.remove(str(saved_search["_id"]))
+            self._advance(saved_search)
+
+        # Deletions leave no updated_at behind: look the compiled searches up by _id
+        compiled_ids = list(self._searches)
+        if not compiled_ids:
+            return
+        kept = set()
+        query = {"_id": {"$in": [ObjectId(saved_search_id) for saved_search_id in compiled_ids]}, "alerts_enabled": True}
+        async for saved_search in database.saved_searches.find(query, {"_id": 1}):
+            kept.add(str(saved_search["_id"]))
+        for saved_search_id in compiled_ids:
+            if saved_search_id not in kept:
+                self.remove(saved_search_id)
+
+    def _advance(self, saved_search: Dict[str, Any]):
+        updated_at = saved_search.get("updated_at")
+        if updated_at and (self._watermark is None or updated_at > self._watermark):
+            self._watermark = updated_at
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.search_alerts_enabled,
+            "ready": self.ready,
+            "saved_searches": len(self._searches),
+            "indexed_terms": len(self._by_term),
+            "unindexed_searches": len(self._unindexed),
+            "portfolios_checked": self.portfolios_checked,
+            "avg_searches_tested": round(self.searches_tested / self.portfolios_checked, 2) if self.portfolios_checked else 0.0,
+            "alerts_recorded": self.alerts_recorded,
+            "last_load_ms": round(self.last_load_seconds * 1000, 1)
+        }
+
+search_alert_service = SearchAlertService()
+
+search_service.add_index_listener(search_alert_service.portfolio_indexed)
+search_service.add_saved_search_listener(search_alert_service.saved_search_changed)
@@ -0,0 +1,196 @@
+from typing import Dict, Any, Optional, Tuple
+from app.core.config import settings
+from app.models.search import SearchCriteria
+from app.services.cache_service import MemoryCache
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Paging fields: every page of one search shares a cache entry
+_PAGING_FIELDS = {"offset", "limit", "cursor"}
+
+def criteria_cache_key(criteria: SearchCriteria) -> str:
+    """
+    Canonical key for the ranking a SearchCriteria produces.
+    Paging is stripped, and list filters (matched case-insensitively) are
+    lower-cased, de-duplicated and sorted, so equivalent searches share an entry.
+    """
+    canonical = {}
+    for field, value in criteria.dict(exclude=_PAGING_FIELDS).items():
+        if isinstance(value, list):
+            value = sorted({str(item).strip().lower() for item in value}) or None
+        elif field == "custom_query" and value:
+            value = " ".join(value.lower().split())
+        canonical[field] = value
+
+    encoded = json.dumps(canonical, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def conditions_match(conditions: Dict[str, Any], portfolio: Dict[str, Any]) -> Optional[bool]:
+    """
+    Evaluate SearchService match conditions against one portfolio document.
+    Returns None when a condition is not understood here.
+    """
+    index = portfolio.get("search_index") or {}
+    for path, condition in conditions.items():
+        if path == "is_public":
+            value = bool(portfolio.get("is_public", False))
+        elif path == "_id":
+            value = portfolio.get("_id")
+        elif path.startswith("search_index."):
+            value = index.get(path[len("search_index."):])
+        else:
+            return None
+
+        if isinstance(condition, dict):
+            if set(condition) == {"$in"}:
+                values = value if isinstance(value, list) else [value]
+                if not any(item in condition["$in"] for item in values):
+                    return False
+            elif set(condition) == {"$gte"}:
+                if value is None or value < condition["$gte"]:
+                    return False
+            else:
+                return None
+        elif value != condition:
+            return False
+    return True
+
+class SearchResultCache:
+    """
+    Ranked candidate ids per canonical SearchCriteria.
+
+    An entry holds the first `search_cache_depth` ids of a ranking (with their
+    sort keys) and the total count; every page within that depth, by offset or
+    cursor, is a slice of it. A portfolio write drops the entries it could
+    change: those listing the portfolio, those whose filter it matches now (or
+    matched before, for entries cut off at the depth), and all free-text
+    rankings, since BM25 scores shift with every document. Entries expire after
+    `search_cache_ttl_seconds`, which bounds staleness from other processes' writes.
+    """
+
+    def __init__(self):
+        self._entries = MemoryCache(settings.search_cache_max_entries, settings.search_cache_ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidations = 0
+        self.writes = 0  # Portfolio writes seen; a ranking computed across one is not stored
+
+    @property
+    def enabled(self) -> bool:
+        return settings.search_cache_enabled
+
+    def store(
+        self,
+        key: str,
+        ranked: Dict[str, Any],
+        conditions: Dict[str, Any],
+        text_ranked: bool,
+        writes_before: int
+    ) -> Optional[Dict[str, Any]]:
+        """Cache a ranking computed with limit search_cache_depth (+1 probe row) from offset 0."""
+        if writes_before != self.writes:
+            return None
+
+        depth = settings.search_cache_depth
+        results = ranked["results"]
+        ids = [str(portfolio["_id"]) for portfolio in results[:depth]]
+        entry = {
+            "by": ranked.get("by", "engine"),
+            "total_count": ranked["total_count"],
+            "ids": ids,
+            "sort_keys": [portfolio.get("sort_key") for portfolio in results[:depth]],
+            "match_scores": [portfolio.get("match_score") for portfolio in results[:depth]],
+            "positions": {portfolio_id: position for position, portfolio_id in enumerate(ids)},
+            "conditions": conditions,
+            "text_ranked": text_ranked,
+            "truncated": len(results) > depth
+        }
+        self._entries.set(key, entry)
+        self.stores += 1
+        return entry
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._entries.get(key)
+
+    def page(
+        self,
+        entry: Dict[str, Any],
+        offset: int,
+        limit: int,
+        after: Optional[Dict[str, Any]] = None
+    ) -> Optional[Tuple[int, int]]:
+        """
+        (start, end) positions of a page plus its probe row, or None when the
+        entry cannot serve it (unknown cursor, or the page runs past the cached depth).
+        """
+        if after is not None:
+            position = entry["positions"].get(str(after["_id"]))
+            if position is None or after["by"] != entry["by"]:
+                return None
+            offset = position + 1
+
+        end = offset + limit + 1
+        if entry["truncated"] and end > len(entry["ids"]):
+            return None
+        return offset, min(end, len(entry["ids"]))
+
+    def record_hit(self):
+        self.hits += 1
+
+    def record_miss(self):
+        self.misses += 1
+
+    def invalidate_portfolio(
+        self,
+        portfolio_id: str,
+        portfolio: Optional[Dict[str, Any]] = None,
+        previous: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Drop entries a write to this portfolio may change.
+        portfolio is the document as written (None if deleted); previous its
+        former search_index state (None if unknown).
+        """
+        self.writes += 1
+        dropped = 0
+        for key in self._entries.keys():
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+
+            conditions = entry["conditions"]
+            stale = entry["text_ranked"] or portfolio_id in entry["positions"]
+            if not stale and portfolio is not None:
+                stale = conditions_match(conditions, portfolio) is not False
+            if not stale and entry["truncated"]:
+                # Matched somewhere past the cached depth: the total count changes
+                stale = previous is None or conditions_match(conditions, previous) is not False
+
+            if stale:
+                self._entries.delete(key)
+                dropped += 1
+
+        self.invalidations += dropped
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "invalidations": self.invalidations,
+            "evictions": self._entries.evictions,
+            "expirations": self._entries.expirations
+        }
+
+search_result_cache = SearchResultCache()
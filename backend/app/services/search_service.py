@@ -1,13 +1,93 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Awaitable
 from app.models.search import SearchCriteria, SearchResult, SearchResponse
 from app.models.portfolio import Portfolio, CandidateProfile
+from app.core.config import settings
 from app.core.database import get_database
+from app.services.job_service import job_service
+from app.services.candidate_search_engine import DISPLAY_PROJECTION, candidate_search_engine
+from app.services.text_index_service import PORTFOLIO_TEXT_PROJECTION, text_index_service
+from app.services.search_result_cache import criteria_cache_key, search_result_cache
+from app.services.match_score import match_score_expression, match_terms
+from bson import ObjectId, json_util
+from pymongo import ReturnDocument, UpdateOne
+import base64
+import logging
 import re
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# Bump when build_search_index changes so the backfill job rebuilds existing entries
+SEARCH_INDEX_VERSION = 2
+
+# Portfolio fields build_search_index reads (manual and auto-generated portfolio layouts)
+_INDEX_SOURCE_PROJECTION = {
+    "skills": 1,
+    "github_repositories.fork": 1,
+    "github_repositories.topics": 1,
+    "github_data.repositories.fork": 1,
+    "github_data.repositories.topics": 1,
+    "ai_profile_analysis.most_active_languages": 1,
+    "ai_insights.profile_analysis.most_active_languages": 1,
+    "code_craftsmanship_score": 1,
+    "ai_insights.craftsmanship_score": 1
+}
+
+# Only what SearchResult and its scoring need; repository arrays are reduced to a count
+_RESULT_PROJECTION = {
+    "title": 1,
+    "github_username": 1,
+    "skills": 1,
+    "description": 1,
+    "code_craftsmanship_score": 1,
+    "recruiter_insights.candidate_summary": 1,
+    "ai_profile_analysis.most_active_languages": 1,
+    "ai_profile_analysis.experience_level": 1,
+    "repository_count": "$search_index.repository_count",
+    "match_score": 1,
+    "sort_key": 1
+}
+
+def build_search_index(portfolio: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Flatten the fields candidate search filters and ranks on into one
+    subdocument, so search matches indexed scalars instead of nested arrays.
+    """
+    github_data = portfolio.get("github_data") or {}
+    ai_insights = portfolio.get("ai_insights") or {}
+    repositories = portfolio.get("github_repositories") or github_data.get("repositories") or []
+    profile = portfolio.get("ai_profile_analysis") or ai_insights.get("profile_analysis") or {}
+    craftsmanship = portfolio.get("code_craftsmanship_score") or ai_insights.get("craftsmanship_score") or {}
+    
+    skills = portfolio.get("skills") or []
+    languages = [
+        entry.get("language") for entry in profile.get("most_active_languages") or []
+        if isinstance(entry, dict) and entry.get("language")
+    ]
+    originals = [repo for repo in repositories if not repo.get("fork")]
+    overall_score = float(craftsmanship.get("overall_score") or 0)
+    
+    return {
+        "version": SEARCH_INDEX_VERSION,
+        "skills": sorted({str(skill).strip().lower() for skill in skills if str(skill).strip()}),
+        "languages": sorted({str(language).strip().lower() for language in languages}),
+        "original_topics": sorted({
+            str(topic).lower() for repo in originals for topic in repo.get("topics") or []
+        }),
+        "repository_count": len(repositories),
+        "original_repository_count": len(originals),
+        "fork_count": len(repositories) - len(originals),
+        "overall_score": overall_score,
+        "documentation_score": float(craftsmanship.get("documentation_score") or 0),
+        "testing_score": float(craftsmanship.get("testing_score") or 0),
+        "indexed_at": datetime.utcnow()
+    }
+
 class SearchService:
     def __init__(self):
         self.db = None
+        self._index_listeners: List[Callable[[Dict[str, Any]], Awaitable[None]]] = []
+        self._saved_search_listeners: List[Callable[[str, Optional[Dict[str, Any]]], None]] = []
     
     async def initialize(self):
         """Initialize database connection."""
@@ -22,22 +102,28 @@ class SearchService:
             await self.initialize()
         
         start_time = datetime.utcnow()
+        after = self._decode_cursor(criteria.cursor) if criteria.cursor else None
         
         try:
-            # Build MongoDB aggregation pipeline
-            pipeline = self._build_search_pipeline(criteria)
+            page = await self._cached_page(criteria, after)
+            if page is None:
+                text_scores = self._text_scores(criteria)
+                match_conditions = self._build_match_conditions(criteria, text_scores)
+                page = await self._rank(criteria, match_conditions, after, text_scores)
             
-            # Execute search
-            cursor = self.db.portfolios.aggregate(pipeline)
-            portfolios = await cursor.to_list(length=criteria.limit + criteria.offset)
+            total_count = page["total_count"]
+            by = page.get("by", "engine")
             
-            # Apply offset and limit
-            portfolios_slice = portfolios[criteria.offset:criteria.offset + criteria.limit]
+            # One extra document was fetched to tell whether another page exists
+            page_docs = page["results"][:criteria.limit]
+            next_cursor = None
+            if len(page["results"]) > criteria.limit:
+                next_cursor = self._encode_cursor(page_docs[-1], by)
             
             # Convert to search results
             results = []
-            for portfolio in portfolios_slice:
-                result = await self._portfolio_to_search_result(portfolio, criteria)
+            for portfolio in page_docs:
+                result = await self._portfolio_to_search_result(portfolio, criteria, portfolio["match_score"])
                 results.append(result)
             
             # Calculate search time
@@ -49,12 +135,15 @@ class SearchService:
             
             return SearchResponse(
                 results=results,
-                total_count=len(portfolios),
+                total_count=total_count,
                 search_time_ms=search_time_ms,
                 filters_applied=criteria.dict(exclude_none=True),
-                suggestions=suggestions
+                suggestions=suggestions,
+                next_cursor=next_cursor
             )
             
+        except ValueError:
+            raise
         except Exception as e:
             return SearchResponse(
                 results=[],
@@ -64,42 +153,227 @@ class SearchService:
                 suggestions=[f"Search error: {str(e)}"]
             )
     
-    def _build_search_pipeline(self, criteria: SearchCriteria) -> List[Dict[str, Any]]:
-        """Build MongoDB aggregation pipeline for advanced search."""
-        pipeline = []
+    async def _rank(
+        self,
+        criteria: SearchCriteria,
+        match_conditions: Dict[str, Any],
+        after: Optional[Dict[str, Any]],
+        text_scores: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
+        """One page (plus a probe row) from the in-process engine, or MongoDB when it cannot serve it."""
+        page = None
+        
+        # The in-process engine serves the search when it is warm and the cursor came from it
+        if after is None or after["by"] == "engine":
+            page = candidate_search_engine.search(
+                match_conditions,
+                criteria.sort_by,
+                criteria.sort_order == "desc",
+                criteria.limit,
+                criteria.offset,
+                after,
+                text_scores
+            )
+            if page is None and after is not None:
+                raise ValueError("Search cursor expired; start again without a cursor")
+        
+        if page is None:
+            page = await self._search_mongo(criteria, match_conditions, after, text_scores)
+        return page
+    
+    async def _cached_page(self, criteria: SearchCriteria, after: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Serve a page as a slice of the cached ranking for these criteria, ranking
+        search_cache_depth candidates and caching them on a miss.
+        None when the page has to be ranked directly (deep pages, expired cursors).
+        """
+        if not search_result_cache.enabled:
+            return None
+        
+        key = criteria_cache_key(criteria)
+        entry = search_result_cache.lookup(key)
+        documents = None
+        
+        if entry is None:
+            search_result_cache.record_miss()
+            depth = settings.search_cache_depth
+            if after is not None or criteria.offset + criteria.limit >= depth:
+                return None
+            
+            writes_before = search_result_cache.writes
+            text_scores = self._text_scores(criteria)
+            match_conditions = self._build_match_conditions(criteria, text_scores)
+            ranked = await self._rank(
+                criteria.copy(update={"offset": 0, "limit": depth}),
+                match_conditions,
+                None,
+                text_scores
+            )
+            entry = search_result_cache.store(key, ranked, match_conditions, text_scores is not None, writes_before)
+            if entry is None:
+                # A portfolio was written while ranking, so the ranking is not cached; still serve it
+                window = ranked["results"][criteria.offset:criteria.offset + criteria.limit + 1]
+                return {**ranked, "results": window}
+            documents = {str(portfolio["_id"]): portfolio for portfolio in ranked["results"]}
+        
+        bounds = search_result_cache.page(entry, criteria.offset, criteria.limit, after)
+        if bounds is None:
+            if documents is None:
+                search_result_cache.record_miss()
+            return None
+        if documents is None:
+            search_result_cache.record_hit()
+        
+        start, end = bounds
+        if documents is None:
+            documents = await self._load_documents(entry["ids"][start:end])
+        
+        results = []
+        for position in range(start, end):
+            portfolio = documents.get(entry["ids"][position])
+            if portfolio is None:
+                continue  # Deleted by another process since it was ranked
+            results.append({
+                **portfolio,
+                "sort_key": entry["sort_keys"][position],
+                "match_score": entry["match_scores"][position]
+            })
+        return {"by": entry["by"], "total_count": entry["total_count"], "results": results}
+    
+    async def _load_documents(self, portfolio_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Display documents for cached ids: from the engine when loaded, else MongoDB."""
+        documents = candidate_search_engine.documents(portfolio_ids)
+        missing = [ObjectId(portfolio_id) for portfolio_id in portfolio_ids if portfolio_id not in documents]
+        if missing:
+            projection = {field: value for field, value in _RESULT_PROJECTION.items() if field not in ("sort_key", "match_score")}
+            async for portfolio in self.db.portfolios.find({"_id": {"$in": missing}}, projection):
+                documents[str(portfolio["_id"])] = portfolio
+        return documents
+    
+    async def _search_mongo(
+        self,
+        criteria: SearchCriteria,
+        match_conditions: Dict[str, Any],
+        after: Optional[Dict[str, Any]],
+        text_scores: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
+        """Filter, page and project inside MongoDB (used when the in-process engine is unavailable)."""
+        pipeline = self._build_search_pipeline(criteria, match_conditions, text_scores)
+        pipeline.append({
+            "$facet": {
+                "total": [{"$count": "count"}],
+                "page": self._build_page_stages(criteria, after)
+            }
+        })
+        
+        facets = await self.db.portfolios.aggregate(pipeline).to_list(length=1)
+        facet = facets[0] if facets else {"total": [], "page": []}
+        return {
+            "by": "mongo",
+            "total_count": facet["total"][0]["count"] if facet["total"] else 0,
+            "results": facet["page"]
+        }
+    
+    def _build_page_stages(self, criteria: SearchCriteria, after: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Sort, page and project one page of results.
+        Pages after a cursor seek past the last (sort_key, _id) seen, so deep pages
+        cost the same as the first; without a cursor offset is used.
+        """
+        sort_order = -1 if criteria.sort_order == "desc" else 1
+        stages = []
+        
+        if after is not None:
+            beyond = "$lt" if sort_order == -1 else "$gt"
+            stages.append({
+                "$match": {
+                    "$or": [
+                        {"sort_key": {beyond: after["sort_key"]}},
+                        {"sort_key": after["sort_key"], "_id": {beyond: after["_id"]}}
+                    ]
+                }
+            })
         
-        # Match stage for basic filtering
+        stages.append({"$sort": {"sort_key": sort_order, "_id": sort_order}})
+        if after is None and criteria.offset:
+            stages.append({"$skip": criteria.offset})
+        stages.append({"$limit": criteria.limit + 1})
+        stages.append({"$project": _RESULT_PROJECTION})
+        return stages
+    
+    def _encode_cursor(self, portfolio: Dict[str, Any], by: str) -> str:
+        # Engine and MongoDB compute sort keys in different float arithmetic, so a cursor stays with the backend that made it
+        portfolio_id = str(portfolio["_id"]) if by == "engine" else portfolio["_id"]
+        position = json_util.dumps({"sort_key": portfolio.get("sort_key"), "_id": portfolio_id, "by": by})
+        return base64.urlsafe_b64encode(position.encode("utf-8")).decode("ascii")
+    
+    def _decode_cursor(self, cursor: str) -> Dict[str, Any]:
+        try:
+            position = json_util.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return {"sort_key": position["sort_key"], "_id": position["_id"], "by": position.get("by", "mongo")}
+        except Exception:
+            raise ValueError("Invalid search cursor")
+    
+    def _text_scores(self, criteria: SearchCriteria) -> Optional[Dict[str, float]]:
+        """
+        BM25 relevance of custom_query per portfolio id, scaled to 0-1 by the best match.
+        None when there is no free text to rank by (or the text index is still building).
+        """
+        if not criteria.custom_query or not text_index_service.ready:
+            return None
+        if not text_index_service.portfolios.has_terms(criteria.custom_query):
+            return None
+        
+        ranked = text_index_service.search_portfolios(criteria.custom_query)
+        best = ranked[0][1] if ranked else 1.0
+        return {portfolio_id: score / best for portfolio_id, score in ranked}
+    
+    def _build_match_conditions(
+        self,
+        criteria: SearchCriteria,
+        text_scores: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the MongoDB filter for the criteria.
+        The in-process engine evaluates the same conditions, so both backends match alike.
+        """
         match_conditions = {"is_public": True}
         
+        # Free text: only portfolios the text index matched
+        if text_scores is not None:
+            match_conditions["_id"] = {"$in": [ObjectId(portfolio_id) for portfolio_id in text_scores]}
+        
+        # All filters read the precomputed search_index (see build_search_index)
+        
         # Skills filter
         if criteria.skills:
-            match_conditions["skills"] = {"$in": criteria.skills}
+            match_conditions["search_index.skills"] = {"$in": [skill.lower() for skill in criteria.skills]}
         
         # GitHub-specific filters
         if criteria.min_github_score is not None:
-            match_conditions["code_craftsmanship_score.overall_score"] = {"$gte": criteria.min_github_score}
+            match_conditions["search_index.overall_score"] = {"$gte": criteria.min_github_score}
         
         if criteria.primary_languages:
-            match_conditions["ai_profile_analysis.most_active_languages.language"] = {"$in": criteria.primary_languages}
+            match_conditions["search_index.languages"] = {"$in": [language.lower() for language in criteria.primary_languages]}
         
         if criteria.min_repositories is not None:
-            match_conditions["$expr"] = {"$gte": [{"$size": "$github_repositories"}, criteria.min_repositories]}
+            match_conditions["search_index.repository_count"] = {"$gte": criteria.min_repositories}
         
         # Exclude forks if requested
         if criteria.exclude_forks:
-            match_conditions["github_repositories.fork"] = {"$ne": True}
+            match_conditions["search_index.fork_count"] = 0
         
         # Documentation quality filter
         if criteria.documentation_quality:
             quality_score_map = {"poor": 0, "fair": 25, "good": 60, "excellent": 80}
             min_score = quality_score_map.get(criteria.documentation_quality, 0)
-            match_conditions["code_craftsmanship_score.documentation_score"] = {"$gte": min_score}
+            match_conditions["search_index.documentation_score"] = {"$gte": min_score}
         
         # Testing practices filter
         if criteria.testing_practices:
             quality_score_map = {"poor": 0, "fair": 25, "good": 60, "excellent": 80}
             min_score = quality_score_map.get(criteria.testing_practices, 0)
-            match_conditions["code_craftsmanship_score.testing_score"] = {"$gte": min_score}
+            match_conditions["search_index.testing_score"] = {"$gte": min_score}
         
         # Custom query handling
         if criteria.custom_query:
@@ -107,36 +381,33 @@ class SearchService:
             custom_conditions = self._parse_custom_query(criteria.custom_query)
             match_conditions.update(custom_conditions)
         
-        pipeline.append({"$match": match_conditions})
-        
-        # Add computed fields for scoring
-        pipeline.append({
-            "$addFields": {
-                "match_score": {
-                    "$divide": [
-                        {
-                            "$add": [
-                                {"$ifNull": ["$code_craftsmanship_score.overall_score", 0]},
-                                {"$multiply": [{"$size": {"$ifNull": ["$github_repositories", []]}}, 2]},
-                                {"$multiply": [{"$size": {"$ifNull": ["$skills", []]}}, 3]}
-                            ]
-                        },
-                        100
-                    ]
-                }
-            }
-        })
+        return match_conditions
+    
+    def _build_search_pipeline(
+        self,
+        criteria: SearchCriteria,
+        match_conditions: Dict[str, Any],
+        text_scores: Optional[Dict[str, float]] = None
+    ) -> List[Dict[str, Any]]:
+        """Build MongoDB aggregation pipeline for advanced search."""
+        pipeline = [
+            {"$match": match_conditions},
+            # The same match score the in-process engine ranks by (see match_score)
+            {"$addFields": {"match_score": match_score_expression(match_terms(match_conditions))}}
+        ]
         
-        # Sort stage
+        # Sort key (never null, so cursors can compare against it); sorting happens per page
         if criteria.sort_by == "score":
-            sort_field = "code_craftsmanship_score.overall_score"
+            sort_key = "$search_index.overall_score"
         elif criteria.sort_by == "created_at":
-            sort_field = "created_at"
+            sort_key = {"$ifNull": ["$created_at", datetime(1970, 1, 1)]}
+        elif text_scores is not None:  # relevance to custom_query
+            ids = [ObjectId(portfolio_id) for portfolio_id in text_scores]
+            sort_key = {"$arrayElemAt": [list(text_scores.values()), {"$indexOfArray": [ids, "$_id"]}]}
         else:  # relevance
-            sort_field = "match_score"
+            sort_key = "$match_score"
         
-        sort_order = -1 if criteria.sort_order == "desc" else 1
-        pipeline.append({"$sort": {sort_field: sort_order}})
+        pipeline.append({"$addFields": {"sort_key": sort_key}})
         
         return pipeline
     
@@ -147,24 +418,21 @@ class SearchService:
         
         # Example patterns to handle
         if "next.js" in query_lower and "non-forked" in query_lower:
-            conditions.update({
-                "$and": [
-                    {"github_repositories.topics": {"$in": ["nextjs", "next.js", "react"]}},
-                    {"github_repositories.fork": {"$ne": True}}
-                ]
-            })
+            conditions["search_index.original_topics"] = {"$in": ["nextjs", "next.js", "react"]}
         
         if "documentation" in query_lower and "strong" in query_lower:
-            conditions["code_craftsmanship_score.documentation_score"] = {"$gte": 75}
+            conditions["search_index.documentation_score"] = {"$gte": 75}
         
         # Add more pattern matching as needed
         return conditions
     
-    async def _portfolio_to_search_result(self, portfolio: Dict[str, Any], criteria: SearchCriteria) -> SearchResult:
-        """Convert portfolio document to search result."""
-        # Calculate match score based on criteria
-        match_score = self._calculate_match_score(portfolio, criteria)
-        
+    async def _portfolio_to_search_result(
+        self,
+        portfolio: Dict[str, Any],
+        criteria: SearchCriteria,
+        match_score: float
+    ) -> SearchResult:
+        """Convert portfolio document (scored by the backend that ranked it) to search result."""
         # Generate highlight reasons
         highlight_reasons = self._generate_highlight_reasons(portfolio, criteria)
         
@@ -185,42 +453,10 @@ class SearchService:
             highlight_reasons=highlight_reasons
         )
     
-    def _calculate_match_score(self, portfolio: Dict[str, Any], criteria: SearchCriteria) -> float:
-        """Calculate how well a candidate matches the search criteria."""
-        score = 0.0
-        factors = 0
-        
-        # Skills matching
-        if criteria.skills:
-            portfolio_skills = set(skill.lower() for skill in portfolio.get("skills", []))
-            criteria_skills = set(skill.lower() for skill in criteria.skills)
-            skill_match = len(portfolio_skills.intersection(criteria_skills)) / len(criteria_skills)
-            score += skill_match * 0.3
-            factors += 0.3
-        
-        # Language matching
-        if criteria.primary_languages:
-            portfolio_languages = []
-            for lang_data in portfolio.get("ai_profile_analysis", {}).get("most_active_languages", []):
-                portfolio_languages.append(lang_data.get("language", "").lower())
-            criteria_languages = set(lang.lower() for lang in criteria.primary_languages)
-            portfolio_lang_set = set(portfolio_languages)
-            lang_match = len(portfolio_lang_set.intersection(criteria_languages)) / len(criteria_languages)
-            score += lang_match * 0.25
-            factors += 0.25
-        
-        # Craftsmanship score factor
-        craftsmanship = portfolio.get("code_craftsmanship_score", {}).get("overall_score", 0)
-        score += (craftsmanship / 100) * 0.25
-        factors += 0.25
-        
-        # Repository activity factor
-        repo_count = len(portfolio.get("github_repositories", []))
-        repo_score = min(repo_count / 20, 1.0)  # Normalize to max 20 repos
-        score += repo_score * 0.2
-        factors += 0.2
-        
-        return min(score / factors if factors > 0 else 0.5, 1.0)
+    def _repository_count(self, portfolio: Dict[str, Any]) -> int:
+        if "repository_count" in portfolio:
+            return portfolio["repository_count"]
+        return len(portfolio.get("github_repositories", []))
     
     def _generate_highlight_reasons(self, portfolio: Dict[str, Any], criteria: SearchCriteria) -> List[str]:
         """Generate reasons why this candidate matches the search."""
@@ -240,7 +476,7 @@ class SearchService:
             reasons.append(f"High code craftsmanship score: {craftsmanship:.1f}/100")
         
         # Active repositories
-        repo_count = len(portfolio.get("github_repositories", []))
+        repo_count = self._repository_count(portfolio)
         if repo_count >= 10:
             reasons.append(f"Active developer with {repo_count} repositories")
         
@@ -292,8 +528,41 @@ class SearchService:
         }
         
         result = await self.db.saved_searches.insert_one(saved_search)
+        saved_search["_id"] = result.inserted_id
+        self._saved_search_changed(str(result.inserted_id), saved_search)
         return str(result.inserted_id)
     
+    async def set_search_alerts(self, saved_search_id: str, recruiter_id: str, alerts_enabled: bool) -> bool:
+        """Turn alerts of a recruiter's saved search on or off. False if there is no such search."""
+        if not self.db:
+            await self.initialize()
+        if not ObjectId.is_valid(saved_search_id):
+            return False
+        
+        saved_search = await self.db.saved_searches.find_one_and_update(
+            {"_id": ObjectId(saved_search_id), "recruiter_id": recruiter_id},
+            {"$set": {"alerts_enabled": alerts_enabled, "updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if saved_search is None:
+            return False
+        self._saved_search_changed(saved_search_id, saved_search)
+        return True
+    
+    async def delete_saved_search(self, saved_search_id: str, recruiter_id: str) -> bool:
+        """Delete a recruiter's saved search and its alerts. False if there is no such search."""
+        if not self.db:
+            await self.initialize()
+        if not ObjectId.is_valid(saved_search_id):
+            return False
+        
+        result = await self.db.saved_searches.delete_one({"_id": ObjectId(saved_search_id), "recruiter_id": recruiter_id})
+        if not result.deleted_count:
+            return False
+        self._saved_search_changed(saved_search_id, None)
+        await self.db.search_alerts.delete_many({"saved_search_id": saved_search_id})
+        return True
+    
     async def get_saved_searches(self, recruiter_id: str) -> List[Dict[str, Any]]:
         """Get all saved searches for a recruiter."""
         if not self.db:
@@ -301,3 +570,94 @@ class SearchService:
         
         cursor = self.db.saved_searches.find({"recruiter_id": recruiter_id})
         return await cursor.to_list(length=100)
+    
+    async def index_portfolio(self, portfolio_id: str):
+        """
+        Rebuild a portfolio's search_index after it was written.
+        Failures are logged, not raised: a stale index must not fail the write.
+        """
+        if self.db is None:
+            await self.initialize()
+        if self.db is None:
+            return
+        
+        try:
+            projection = {**DISPLAY_PROJECTION, **_INDEX_SOURCE_PROJECTION, **PORTFOLIO_TEXT_PROJECTION}
+            portfolio = await self.db.portfolios.find_one({"_id": ObjectId(portfolio_id)}, projection)
+            if portfolio is None:
+                self.remove_portfolio(portfolio_id)
+                return
+            
+            previous = None
+            if portfolio.get("search_index"):
+                # Visibility before the write is unknown, so assume it was public
+                previous = {"_id": portfolio["_id"], "is_public": True, "search_index": portfolio["search_index"]}
+            portfolio["search_index"] = build_search_index(portfolio)
+            await self.db.portfolios.update_one(
+                {"_id": portfolio["_id"]},
+                {"$set": {"search_index": portfolio["search_index"]}}
+            )
+            candidate_search_engine.upsert(portfolio)
+            text_index_service.index_portfolio(portfolio)
+            search_result_cache.invalidate_portfolio(portfolio_id, portfolio, previous)
+            for listener in self._index_listeners:
+                await listener(portfolio)
+        except Exception as e:
+            logger.error(f"Failed to update search index for portfolio {portfolio_id}: {e}")
+            search_result_cache.invalidate_portfolio(portfolio_id)
+    
+    def add_index_listener(self, listener: Callable[[Dict[str, Any]], Awaitable[None]]):
+        """Call listener(portfolio) after each portfolio this process (re)indexes."""
+        self._index_listeners.append(listener)
+    
+    def add_saved_search_listener(self, listener: Callable[[str, Optional[Dict[str, Any]]], None]):
+        """Call listener(saved_search_id, saved_search) after this process saves or changes a saved search (None once deleted)."""
+        self._saved_search_listeners.append(listener)
+    
+    def _saved_search_changed(self, saved_search_id: str, saved_search: Optional[Dict[str, Any]]):
+        for listener in self._saved_search_listeners:
+            try:
+                listener(saved_search_id, saved_search)
+            except Exception as e:
+                logger.error(f"Saved search listener failed for {saved_search_id}: {e}")
+    
+    def remove_portfolio(self, portfolio_id: str):
+        """Drop a deleted portfolio from the in-process search engine, text index and result cache."""
+        candidate_search_engine.remove(portfolio_id)
+        text_index_service.remove_portfolio(portfolio_id)
+        search_result_cache.invalidate_portfolio(portfolio_id)
+    
+    async def enqueue_backfill(self):
+        """Queue (at most one) job indexing portfolios without a current search_index."""
+        try:
+            await job_service.enqueue("search_index_backfill", {}, idempotency_key="search_index_backfill")
+        except Exception as e:
+            logger.warning(f"Search index backfill not queued: {e}")
+    
+    async def backfill_search_index(self, batch_size: int = 500) -> Dict[str, Any]:
+        """Index every portfolio whose search_index is missing or from an older version."""
+        if self.db is None:
+            await self.initialize()
+        
+        indexed = 0
+        stale = {"search_index.version": {"$ne": SEARCH_INDEX_VERSION}}
+        while True:
+            portfolios = await self.db.portfolios.find(stale, _INDEX_SOURCE_PROJECTION).limit(batch_size).to_list(length=batch_size)
+            if not portfolios:
+                break
+            
+            await self.db.portfolios.bulk_write([
+                UpdateOne({"_id": portfolio["_id"]}, {"$set": {"search_index": build_search_index(portfolio)}})
+                for portfolio in portfolios
+            ], ordered=False)
+            indexed += len(portfolios)
+        
+        logger.info(f"Search index backfill indexed {indexed} portfolios")
+        return {"indexed": indexed}
+
+search_service = SearchService()
+
+async def run_search_index_backfill_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    return await search_service.backfill_search_index()
+
+job_service.register("search_index_backfill", run_search_index_backfill_job)
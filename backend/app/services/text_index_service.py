@@ -0,0 +1,322 @@
+from typing import Dict, Any, List, Optional, Iterable, Tuple, Callable, Awaitable, Set
+from collections import Counter
+from app.core.config import settings
+from app.core.database import get_database
+import asyncio
+import bisect
+import heapq
+import logging
+import math
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# Keeps technology names intact: next.js, c++, c#, node-js
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.\-]*")
+
+_STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in into is it its of on or that the their
+this to was with who will i me my we our you your experience experienced project projects
+""".split())
+
+# Free-text search also matches index terms the query's terms are prefixes of (reac -> react),
+# scored below exact matches
+_PREFIX_MIN_LENGTH = 2
+_PREFIX_MAX_EXPANSIONS = 50
+_PREFIX_WEIGHT = 0.5
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case terms; punctuated names also index their bare form (next.js -> nextjs)."""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        token = token.rstrip(".-")
+        if not token or token in _STOPWORDS:
+            continue
+        tokens.append(token)
+        bare = re.sub(r"[.\-]", "", token)
+        if bare != token and bare:
+            tokens.append(bare)
+    return tokens
+
+class BM25Index:
+    """
+    In-memory Okapi BM25 index with incremental add/remove.
+
+    Documents are weighted bags of terms (a field's weight multiplies its term
+    frequencies). Queries are OR-ed terms; only the postings of query terms are
+    touched, and the top results are picked with a heap. With prefix=True each
+    query term also matches the index terms it is a prefix of, found by
+    bisecting a sorted vocabulary.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_lengths: Dict[str, float] = {}
+        self._total_length = 0.0
+        self._vocabulary: Optional[List[str]] = None  # Sorted terms, rebuilt after terms come or go
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, doc_id: str, fields: Iterable[Tuple[str, float]]):
+        """Index (or re-index) a document from (text, weight) pairs."""
+        self.remove(doc_id)
+
+        frequencies: Counter = Counter()
+        for text, weight in fields:
+            for token in tokenize(text or ""):
+                frequencies[token] += weight
+        if not frequencies:
+            return
+
+        for term, frequency in frequencies.items():
+            if term not in self._postings:
+                self._vocabulary = None
+            self._postings.setdefault(term, {})[doc_id] = frequency
+        self._doc_terms[doc_id] = dict(frequencies)
+        length = sum(frequencies.values())
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+
+    def remove(self, doc_id: str):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+                    self._vocabulary = None
+        self._total_length -= self._doc_lengths.pop(doc_id, 0.0)
+
+    def search(self, query: str, limit: Optional[int] = None, prefix: bool = False) -> List[Tuple[str, float]]:
+        """Top documents for the query (every hit without a limit) as (doc_id, score), best first."""
+        terms = set(tokenize(query))
+        document_count = len(self._doc_lengths)
+        if not terms or not document_count:
+            return []
+
+        average_length = self._total_length / document_count
+        scores: Dict[str, float] = {}
+        for term in terms:
+            # A document matching several expansions of one query term counts its best one
+            term_scores: Dict[str, float] = {}
+            for index_term, weight in self._expand(term, prefix):
+                posting = self._postings[index_term]
+                idf = math.log(1 + (document_count - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, frequency in posting.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / average_length)
+                    score = weight * idf * frequency * (self.k1 + 1) / (frequency + norm)
+                    if score > term_scores.get(doc_id, 0.0):
+                        term_scores[doc_id] = score
+            for doc_id, score in term_scores.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+
+        if limit is None:
+            return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def _expand(self, term: str, prefix: bool) -> List[Tuple[str, float]]:
+        """Index terms a query term matches, with their score weight."""
+        matches = [(term, 1.0)] if term in self._postings else []
+        if not prefix or len(term) < _PREFIX_MIN_LENGTH:
+            return matches
+
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        position = bisect.bisect_right(self._vocabulary, term)
+        for candidate in self._vocabulary[position:position + _PREFIX_MAX_EXPANSIONS]:
+            if not candidate.startswith(term):
+                break
+            matches.append((candidate, _PREFIX_WEIGHT))
+        return matches
+
+    def document_frequency(self, term: str) -> int:
+        return len(self._postings.get(term, ()))
+
+    def has_terms(self, query: str) -> bool:
+        return bool(tokenize(query))
+
+# Portfolio fields fed to the text index, for both manual and auto-generated layouts
+PORTFOLIO_TEXT_PROJECTION = {
+    "title": 1,
+    "description": 1,
+    "skills": 1,
+    "ai_generated_content.bio": 1,
+    "ai_generated_content.project_descriptions": 1,
+    "ai_insights.portfolio_content.bio": 1,
+    "ai_insights.portfolio_content.project_descriptions": 1,
+    "github_repositories.name": 1,
+    "github_repositories.description": 1,
+    "github_repositories.topics": 1,
+    "github_data.repositories.name": 1,
+    "github_data.repositories.description": 1,
+    "github_data.repositories.topics": 1
+}
+
+USER_TEXT_PROJECTION = {"name": 1, "github_username": 1, "bio": 1, "company": 1}
+
+def portfolio_text_fields(portfolio: Dict[str, Any]) -> List[Tuple[str, float]]:
+    """(text, weight) pairs for a portfolio: titles and skills count most, repo details least."""
+    content = portfolio.get("ai_generated_content") or (portfolio.get("ai_insights") or {}).get("portfolio_content") or {}
+    repositories = portfolio.get("github_repositories") or (portfolio.get("github_data") or {}).get("repositories") or []
+    project_descriptions = content.get("project_descriptions") or {}
+
+    fields = [
+        (portfolio.get("title"), 3.0),
+        (" ".join(str(skill) for skill in portfolio.get("skills") or []), 2.0),
+        (portfolio.get("description"), 1.0),
+        (content.get("bio"), 1.0)
+    ]
+    if isinstance(project_descriptions, dict):
+        fields.extend((f"{name} {text}", 1.0) for name, text in project_descriptions.items())
+    for repo in repositories:
+        fields.append((" ".join(repo.get("topics") or []), 1.5))
+        fields.append((f"{repo.get('name') or ''} {repo.get('description') or ''}", 0.5))
+    return [(str(text), weight) for text, weight in fields if text]
+
+def user_text_fields(user: Dict[str, Any]) -> List[Tuple[str, float]]:
+    return [
+        (str(user.get(field) or ""), weight)
+        for field, weight in (("name", 3.0), ("github_username", 3.0), ("company", 1.0), ("bio", 1.0))
+    ]
+
+class TextIndexService:
+    """
+    Offline full-text search over portfolios and users.
+
+    Both indexes are built at startup, updated on writes in this process and
+    rebuilt every `text_index_reload_seconds` to pick up other processes'
+    writes. Until the first build finishes, callers keep their regex fallback.
+    """
+
+    def __init__(self):
+        self.portfolios = BM25Index()
+        self.users = BM25Index()
+        self.ready = False
+        self._task: Optional[asyncio.Task] = None
+        self._replay: Optional[List[Tuple[str, str, Any]]] = None  # Writes seen during a rebuild
+        self.last_load_seconds = 0.0
+
+    def _apply(self, index_name: str, doc_id: str, fields: Optional[List[Tuple[str, float]]]):
+        index = self.portfolios if index_name == "portfolios" else self.users
+        if fields is None:
+            index.remove(doc_id)
+        else:
+            index.add(doc_id, fields)
+        if self._replay is not None:
+            self._replay.append((index_name, doc_id, fields))
+
+    def index_portfolio(self, portfolio: Dict[str, Any]):
+        self._apply("portfolios", str(portfolio["_id"]), portfolio_text_fields(portfolio))
+
+    def remove_portfolio(self, portfolio_id: str):
+        self._apply("portfolios", portfolio_id, None)
+
+    def index_user(self, user: Dict[str, Any]):
+        self._apply("users", str(user["_id"]), user_text_fields(user))
+
+    def remove_user(self, user_id: str):
+        self._apply("users", user_id, None)
+
+    def search_portfolios(self, query: str) -> List[Tuple[str, float]]:
+        """Every portfolio matching the query's terms, best first (custom_query ranking)."""
+        return self.portfolios.search(query)
+
+    async def ranked_page(
+        self,
+        index: BM25Index,
+        query: str,
+        keep: Callable[[List[str]], Awaitable[Set[str]]],
+        skip: int,
+        limit: int
+    ) -> Optional[List[str]]:
+        """
+        One page of free-text hits (prefix matches included) that pass keep(ids), best first.
+        Hits are filtered in rank order in windows starting at text_index_max_candidates and
+        growing until the page is full or the hits run out, so filters never truncate results.
+        None when nothing in the index matches the query.
+        """
+        ranked = [doc_id for doc_id, _ in index.search(query, prefix=True)]
+        if not ranked:
+            return None
+
+        kept: List[str] = []
+        start, window = 0, settings.text_index_max_candidates
+        while start < len(ranked) and len(kept) < skip + limit:
+            batch = ranked[start:start + window]
+            allowed = await keep(batch)
+            kept.extend(doc_id for doc_id in batch if doc_id in allowed)
+            start += len(batch)
+            window *= 4
+        return kept[skip:skip + limit]
+
+    async def start(self):
+        if not settings.text_index_enabled or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._reload_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _reload_loop(self):
+        while True:
+            try:
+                await self.load()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Text index rebuild failed: {e}")
+            await asyncio.sleep(settings.text_index_reload_seconds)
+
+    async def load(self):
+        """Build fresh indexes from MongoDB and swap them in."""
+        database = await get_database()
+        if database is None:
+            return
+
+        started_at = time.perf_counter()
+        portfolios, users = BM25Index(), BM25Index()
+        self._replay = []
+        try:
+            async for portfolio in database.portfolios.find({}, PORTFOLIO_TEXT_PROJECTION):
+                portfolios.add(str(portfolio["_id"]), portfolio_text_fields(portfolio))
+            async for user in database.users.find({}, USER_TEXT_PROJECTION):
+                users.add(str(user["_id"]), user_text_fields(user))
+
+            self.portfolios, self.users = portfolios, users
+            # The scan may have read documents from before writes made while it ran
+            for index_name, doc_id, fields in self._replay:
+                index = portfolios if index_name == "portfolios" else users
+                if fields is None:
+                    index.remove(doc_id)
+                else:
+                    index.add(doc_id, fields)
+        finally:
+            self._replay = None
+        self.ready = True
+        self.last_load_seconds = time.perf_counter() - started_at
+        logger.info(
+            f"Text index built for {len(portfolios)} portfolios and {len(users)} users "
+            f"in {self.last_load_seconds:.2f}s"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.text_index_enabled,
+            "ready": self.ready,
+            "portfolios": len(self.portfolios),
+            "users": len(self.users),
+            "last_load_ms": round(self.last_load_seconds * 1000, 1)
+        }
+
+text_index_service = TextIndexService()
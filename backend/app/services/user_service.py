@@ -1,8 +1,11 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.models.user import User, UserUpdate, UserPublic
+from app.services.search_service import search_service
+from app.services.text_index_service import USER_TEXT_PROJECTION, text_index_service
 from bson import ObjectId
-from typing import Optional, List
+from typing import Optional, List, Set
 from datetime import datetime
+import re
 
 class UserService:
     def __init__(self, db: AsyncIOMotorDatabase):
@@ -31,6 +34,9 @@ class UserService:
         )
         
         if result.modified_count > 0:
+            user = await self.collection.find_one({"_id": user_id}, USER_TEXT_PROJECTION)
+            if user:
+                text_index_service.index_user(user)
             return await self.get_user_by_id(user_id)
         return None
     
@@ -54,22 +60,37 @@ class UserService:
         if user_type:
             query["user_type"] = user_type
         
+        if skills:
+            query["skills"] = {"$in": skills}
+        
+        if search and text_index_service.ready and text_index_service.users.has_terms(search):
+            # Ranked by the BM25 text index; MongoDB only applies the other filters by _id
+            async def matching_ids(user_ids: List[str]) -> Set[str]:
+                id_filter = {"$in": [ObjectId(user_id) for user_id in user_ids], **({"$ne": exclude_user_id} if exclude_user_id else {})}
+                matching = await self.collection.find({**query, "_id": id_filter}, {"_id": 1}).to_list(length=None)
+                return {str(doc["_id"]) for doc in matching}
+            
+            page = await text_index_service.ranked_page(text_index_service.users, search, matching_ids, skip, limit)
+            if page is not None:
+                page_ids = [ObjectId(user_id) for user_id in page]
+                docs = await self.collection.find({"_id": {"$in": page_ids}}).to_list(length=len(page_ids))
+                docs_by_id = {doc["_id"]: doc for doc in docs}
+                return [UserPublic(**docs_by_id[user_id], id=str(user_id)) for user_id in page_ids if user_id in docs_by_id]
+        
         if search:
+            # Text index still building, or no whole-word/prefix hits: substring match (scans the collection)
             query["$or"] = [
-                {"name": {"$regex": search, "$options": "i"}},
-                {"github_username": {"$regex": search, "$options": "i"}},
-                {"bio": {"$regex": search, "$options": "i"}},
-                {"company": {"$regex": search, "$options": "i"}}
+                {"name": {"$regex": re.escape(search), "$options": "i"}},
+                {"github_username": {"$regex": re.escape(search), "$options": "i"}},
+                {"bio": {"$regex": re.escape(search), "$options": "i"}},
+                {"company": {"$regex": re.escape(search), "$options": "i"}}
             ]
         
-        if skills:
-            query["skills"] = {"$in": skills}
-        
         cursor = self.collection.find(query).skip(skip).limit(limit)
         users = []
         
         async for user_doc in cursor:
-            public_user = UserPublic(**user_doc, id=user_doc["_id"])
+            public_user = UserPublic(**user_doc, id=str(user_doc["_id"]))
             users.append(public_user)
         
         return users
@@ -103,13 +124,18 @@ class UserService:
         Delete user and all associated data.
         """
         # Delete user's portfolios
+        portfolio_ids = await self.db.portfolios.distinct("_id", {"user_id": user_id})
         await self.db.portfolios.delete_many({"user_id": user_id})
+        for portfolio_id in portfolio_ids:
+            search_service.remove_portfolio(str(portfolio_id))
         
         # Delete user's reviews
         await self.db.reviews.delete_many({"reviewer_id": user_id})
         
         # Delete the user
         result = await self.collection.delete_one({"_id": user_id})
+        if result.deleted_count > 0:
+            text_index_service.remove_user(str(user_id))
         return result.deleted_count > 0
     
     async def follow_user(self, follower_id: ObjectId, following_id: ObjectId) -> bool:
@@ -166,7 +192,7 @@ class UserService:
         
         followers = []
         async for user_doc in cursor:
-            public_user = UserPublic(**user_doc, id=user_doc["_id"])
+            public_user = UserPublic(**user_doc, id=str(user_doc["_id"]))
             followers.append(public_user)
         
         return followers
@@ -189,7 +215,7 @@ class UserService:
         
         following = []
         async for user_doc in cursor:
-            public_user = UserPublic(**user_doc, id=user_doc["_id"])
+            public_user = UserPublic(**user_doc, id=str(user_doc["_id"]))
             following.append(public_user)
         
         return following
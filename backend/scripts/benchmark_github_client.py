@@ -0,0 +1,133 @@
+"""
+Benchmark GitHub HTTP clients against a local stub server.
+
+Compares opening a new httpx.AsyncClient per call (how GitHubService used to
+call GitHub) with the shared pooled client that GitHubService now sends every
+request through. The stub counts accepted connections, i.e. TCP handshakes; each
+new connection can be charged a simulated TLS handshake delay. Reports
+connections and p50/p99 latency for both.
+
+The stub speaks plain HTTP/1.1, so both sides use HTTP/1.1 keep-alive here;
+HTTP/2 multiplexing is only negotiated over TLS against the real API.
+
+Run from backend/:
+    python -m scripts.benchmark_github_client --requests 500 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+import httpx
+
+from app.core.config import settings
+from app.core.http_client import close_http_client
+from app.services.github_service import GitHubService
+
+_BODY = b'{"login": "octocat", "public_repos": 8}'
+
+class StubServer:
+    """Minimal keep-alive HTTP/1.1 server answering every request with the same JSON."""
+
+    def __init__(self, handshake_ms: float, latency_ms: float):
+        self.handshake_seconds = handshake_ms / 1000
+        self.latency_seconds = latency_ms / 1000
+        self.connections = 0
+        self.requests = 0
+        self._server = None
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        await asyncio.sleep(self.handshake_seconds)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                await asyncio.sleep(self.latency_seconds)
+                self.requests += 1
+                close = b"connection: close" in head.lower()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(_BODY)).encode() + b"\r\n"
+                    + (b"Connection: close\r\n" if close else b"")
+                    + b"\r\n" + _BODY
+                )
+                await writer.drain()
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+async def _run(
+    send: Callable[[str], Awaitable[httpx.Response]],
+    url: str,
+    requests: int,
+    concurrency: int
+) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(index: int):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await send(f"{url}/users/user{index}")
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    return latencies
+
+async def _per_call_client(url: str) -> httpx.Response:
+    async with httpx.AsyncClient() as client:
+        return await client.get(url)
+
+def _report(name: str, server: StubServer, latencies: List[float], elapsed: float):
+    cut_points = statistics.quantiles(latencies, n=100)
+    print(
+        f"{name:<16} connections={server.connections:<6} requests={server.requests:<6} "
+        f"p50={cut_points[49]:.1f}ms p99={cut_points[98]:.1f}ms "
+        f"throughput={len(latencies) / elapsed:.0f} req/s"
+    )
+
+async def main(args: argparse.Namespace):
+    print(
+        f"{args.requests} GETs, concurrency {args.concurrency}, "
+        f"{args.handshake_ms}ms per new connection, {args.latency_ms}ms per request"
+    )
+
+    service = GitHubService()
+    modes = {
+        "per-call client": _per_call_client,
+        "shared pool": lambda url: service._send("GET", url)
+    }
+    for name, send in modes.items():
+        server = StubServer(args.handshake_ms, args.latency_ms)
+        url = await server.start()
+        try:
+            started = time.perf_counter()
+            latencies = await _run(send, url, args.requests, args.concurrency)
+            _report(name, server, latencies, time.perf_counter() - started)
+        finally:
+            await close_http_client()
+            await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=settings.github_max_concurrent_requests_per_host)
+    parser.add_argument("--handshake-ms", type=float, default=30.0, help="Simulated TCP+TLS setup cost per connection")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Simulated server time per request")
+    asyncio.run(main(parser.parse_args()))
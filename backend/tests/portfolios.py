@@ -0,0 +1,33 @@
+"""Portfolio documents shaped like the ones candidate search indexes."""
+
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.services.search_service import build_search_index
+
+def make_portfolio(skills, languages, overall_score, repositories, days_old=0, is_public=True):
+    portfolio = {
+        "_id": ObjectId(),
+        "title": f"{'/'.join(skills)} developer",
+        "github_username": f"dev{ObjectId()}",
+        "description": "",
+        "skills": skills,
+        "is_public": is_public,
+        "created_at": datetime(2024, 1, 1) + timedelta(days=days_old),
+        "github_repositories": [{"name": f"repo{i}", "fork": False, "topics": []} for i in range(repositories)],
+        "ai_profile_analysis": {"most_active_languages": [{"language": language} for language in languages]},
+        "code_craftsmanship_score": {"overall_score": overall_score}
+    }
+    portfolio["search_index"] = build_search_index(portfolio)
+    return portfolio
+
+PORTFOLIOS = [
+    make_portfolio(["Python", "Django"], ["Python"], 82, 12, 1),
+    make_portfolio(["React", "TypeScript"], ["TypeScript", "JavaScript"], 91, 30, 2),
+    make_portfolio(["Python", "React"], ["Python", "JavaScript"], 64, 5, 3),
+    make_portfolio(["Go"], ["Go"], 77, 25, 4),
+    make_portfolio(["Python", "FastAPI", "React"], ["Python"], 55, 18, 5),
+    make_portfolio(["Rust"], ["Rust"], 95, 2, 6),
+    make_portfolio(["Python"], ["Python"], 99, 40, 7, is_public=False),
+]
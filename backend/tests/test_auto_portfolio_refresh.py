@@ -0,0 +1,31 @@
+import asyncio
+
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.services import auto_portfolio_service as auto_module
+from app.services.auto_portfolio_service import AutoPortfolioService
+
+def test_refresh_is_limited_to_the_owner(monkeypatch):
+    queued = []
+
+    async def enqueue(job_type, payload, idempotency_key=None, max_attempts=None, user_id=None):
+        queued.append((payload["portfolio_id"], user_id))
+        return {"id": "job", "status": "queued"}
+
+    monkeypatch.setattr(auto_module.job_service, "enqueue", enqueue)
+    database = AsyncMongoMockClient().portreview
+    portfolio_id = ObjectId()
+    asyncio.run(database.portfolios.insert_one({"_id": portfolio_id, "user_id": "owner", "github_username": "octocat"}))
+    service = AutoPortfolioService(database)
+
+    async def run():
+        return (
+            await service.enqueue_refresh(str(portfolio_id), "intruder"),
+            await service.enqueue_refresh(str(portfolio_id), "owner")
+        )
+
+    intruder, owner = asyncio.run(run())
+    assert intruder == {"success": False, "error": "Portfolio not found"}
+    assert owner["success"]
+    assert queued == [(str(portfolio_id), "owner")]
@@ -0,0 +1,49 @@
+from app.services.autocomplete_service import PrefixIndex, portfolio_labels
+
+from portfolios import PORTFOLIOS
+
+def build_index(labels_per_portfolio, top_k=5):
+    index = PrefixIndex()
+    for labels in labels_per_portfolio:
+        index.add(labels)
+    index.build(top_k)
+    return index
+
+def values(completions):
+    return [completion["value"] for completion in completions]
+
+def test_completions_rank_by_portfolio_count():
+    index = build_index([["Python", "PyTorch"], ["python"], ["PyTorch", "Pydantic"], ["Python"]])
+    assert index.complete("pyt", 5) == [{"value": "Python", "count": 3}, {"value": "PyTorch", "count": 2}]
+    # Short prefixes come from the precomputed lists
+    assert values(index.complete("py", 5)) == ["Python", "PyTorch", "Pydantic"]
+    assert values(index.complete("", 1)) == ["Python"]
+    assert index.complete("rust", 5) == []
+
+def test_any_word_of_a_label_completes_it():
+    index = build_index([["Machine Learning"], ["Next.js"], ["Learning Management"]])
+    # Equally frequent labels are ordered alphabetically
+    assert values(index.complete("learn", 5)) == ["Learning Management", "Machine Learning"]
+    assert values(index.complete("js", 5)) == ["Next.js"]
+    assert values(index.complete("machine le", 5)) == ["Machine Learning"]
+
+def test_uncounted_labels_disappear_before_the_rebuild():
+    index = build_index([["Django"], ["Django", "Docker"]])
+    index.add(["Django", "Docker"], weight=-1)
+    assert index.dirty
+    assert index.complete("do", 5) == []
+    assert index.complete("dj", 5) == [{"value": "Django", "count": 1}]
+    index.build(5)
+    assert len(index) == 1 and not index.dirty
+
+def test_most_common_spelling_is_shown():
+    index = build_index([["javascript"], ["JavaScript"], ["JavaScript"]])
+    assert index.complete("java", 5) == [{"value": "JavaScript", "count": 3}]
+
+def test_labels_come_from_public_portfolios_only():
+    labels = portfolio_labels(PORTFOLIOS[1])
+    assert labels["skills"] == ["React", "TypeScript"]
+    assert labels["languages"] == ["TypeScript", "JavaScript"]
+    assert labels["titles"] == ["React/TypeScript developer"]
+    assert portfolio_labels(PORTFOLIOS[6]) == {}
+    assert portfolio_labels({**PORTFOLIOS[0], "title": "Ada's Portfolio"})["titles"] == []
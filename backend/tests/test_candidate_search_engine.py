@@ -0,0 +1,100 @@
+import asyncio
+import types
+
+import pytest
+
+from app.models.search import SearchCriteria
+from app.services import candidate_search_engine as engine_module
+from app.services.candidate_search_engine import CandidateSearchEngine
+from app.services.search_service import SearchService
+
+from portfolios import PORTFOLIOS, make_portfolio
+
+def conditions(**criteria):
+    return SearchService()._build_match_conditions(SearchCriteria(**criteria))
+
+def loaded_engine(portfolios=PORTFOLIOS):
+    engine = CandidateSearchEngine()
+    for portfolio in portfolios:
+        engine.upsert(portfolio)
+    engine.ready = True
+    return engine
+
+def ranked_ids(page):
+    return [str(doc["_id"]) for doc in page["results"]]
+
+class ScanDuringWrites:
+    """A portfolios.find() stand-in that runs a callback halfway through the scan."""
+
+    def __init__(self, portfolios, midway):
+        self.portfolios = portfolios
+        self.midway = midway
+
+    def find(self, query, projection):
+        async def scan():
+            for position, portfolio in enumerate(self.portfolios):
+                if position == len(self.portfolios) // 2:
+                    self.midway()
+                yield portfolio
+        return scan()
+
+def load_with(engine, portfolios, midway, monkeypatch):
+    database = types.SimpleNamespace(portfolios=ScanDuringWrites(portfolios, midway))
+
+    async def get_database():
+        return database
+
+    monkeypatch.setattr(engine_module, "get_database", get_database)
+    asyncio.run(engine.load())
+
+def test_filters_match_term_and_numeric_conditions():
+    engine = loaded_engine()
+    page = engine.search(conditions(skills=["python"], min_repositories=10), "relevance", True, 10)
+    expected = {
+        str(p["_id"]) for p in PORTFOLIOS
+        if p["is_public"] and "python" in p["search_index"]["skills"] and p["search_index"]["repository_count"] >= 10
+    }
+    assert set(ranked_ids(page)) == expected
+    assert page["total_count"] == len(expected)
+
+def test_unsupported_condition_falls_back_to_mongo():
+    engine = loaded_engine()
+    assert engine.search({"is_public": True, "title": {"$regex": "x"}}, "relevance", True, 10) is None
+
+def test_offset_and_cursor_pages_follow_the_full_ranking():
+    portfolios = [make_portfolio(["python"], ["Python"], score, 10) for score in range(40, 100, 3)]
+    engine = loaded_engine(portfolios)
+    match = conditions(skills=["python"])
+    full = ranked_ids(engine.search(match, "score", True, 100))
+
+    assert ranked_ids(engine.search(match, "score", True, 5, offset=5))[:5] == full[5:10]
+
+    page = engine.search(match, "score", True, 5)
+    last = page["results"][4]
+    after = {"sort_key": last["sort_key"], "_id": str(last["_id"]), "by": "engine"}
+    assert ranked_ids(engine.search(match, "score", True, 5, after=after))[:5] == full[5:10]
+
+def test_removed_rows_are_reused():
+    engine = loaded_engine()
+    removed = PORTFOLIOS[0]
+    engine.remove(str(removed["_id"]))
+    assert str(removed["_id"]) not in ranked_ids(engine.search(conditions(), "relevance", True, 100))
+
+    replacement = make_portfolio(["elixir"], ["Elixir"], 70, 3)
+    engine.upsert(replacement)
+    assert ranked_ids(engine.search(conditions(skills=["elixir"]), "relevance", True, 10)) == [str(replacement["_id"])]
+
+def test_load_keeps_removals_made_during_the_scan(monkeypatch):
+    engine = loaded_engine()
+    removed = PORTFOLIOS[4]
+    load_with(engine, PORTFOLIOS, lambda: engine.remove(str(removed["_id"])), monkeypatch)
+
+    assert str(removed["_id"]) not in ranked_ids(engine.search(conditions(), "relevance", True, 100))
+    assert engine.get_stats()["portfolios"] == len(PORTFOLIOS) - 1
+
+def test_load_keeps_upserts_made_during_the_scan(monkeypatch):
+    engine = loaded_engine()
+    added = make_portfolio(["zig"], ["Zig"], 88, 9)
+    load_with(engine, PORTFOLIOS, lambda: engine.upsert(added), monkeypatch)
+
+    assert ranked_ids(engine.search(conditions(skills=["zig"]), "relevance", True, 10)) == [str(added["_id"])]
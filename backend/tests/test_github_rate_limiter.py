@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core import github_rate_limiter as limiter_module
+from app.core.config import settings
+from app.core.github_rate_limiter import GitHubRateLimiter, GitHubRateLimitExceeded
+
+def rate_limited(remaining, limit=5000, reset_in=600, status_code=200, resource="core"):
+    return httpx.Response(status_code, headers={
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Reset": str(int(time.time() + reset_in)),
+        "X-RateLimit-Resource": resource
+    })
+
+def test_resources_are_metered_separately():
+    assert GitHubRateLimiter.resource_for("https://api.github.com/graphql") == "graphql"
+    assert GitHubRateLimiter.resource_for("https://api.github.com/search/users") == "search"
+    assert GitHubRateLimiter.resource_for("https://api.github.com/users/octocat/repos") == "core"
+
+def test_requests_go_to_the_token_with_most_headroom():
+    limiter = GitHubRateLimiter(["aaaa1111", "bbbb2222"])
+
+    async def run():
+        first = await limiter.acquire()
+        limiter.release(first, rate_limited(100))
+        second = await limiter.acquire()
+        limiter.release(second, rate_limited(4000))
+        return first, second, await limiter.acquire()
+
+    first, second, third = asyncio.run(run())
+    assert first.token != second.token
+    assert third.token == second.token
+    assert third.in_flight == 1
+
+def test_in_flight_requests_count_against_headroom():
+    limiter = GitHubRateLimiter(["aaaa1111", "bbbb2222"])
+
+    async def run():
+        # Tokens without a response yet have unlimited headroom
+        for budget in limiter._pool("core"):
+            limiter.release(budget, rate_limited(600, limit=1000))
+        return [await limiter.acquire() for _ in range(3)]
+
+    held = asyncio.run(run())
+    # Equal budgets alternate as in-flight requests use up headroom
+    assert [budget.token for budget in held] == ["aaaa1111", "bbbb2222", "aaaa1111"]
+    assert [budget.in_flight for budget in limiter._pool("core")] == [2, 1]
+
+def test_spent_pool_waits_for_a_near_reset(monkeypatch):
+    monkeypatch.setattr(settings, "github_rate_limit_max_wait_seconds", 30.0)
+    limiter = GitHubRateLimiter(["aaaa1111"])
+    slept = []
+
+    async def sleep(seconds):
+        slept.append(seconds)
+        budget = limiter._pool("core")[0]
+        budget.remaining = budget.limit  # The window rolled over
+
+    monkeypatch.setattr(limiter_module.asyncio, "sleep", sleep)
+
+    async def run():
+        budget = await limiter.acquire()
+        limiter.release(budget, rate_limited(10, limit=1000, reset_in=5))
+        return await limiter.acquire()
+
+    asyncio.run(run())
+    assert len(slept) == 1 and 0 < slept[0] <= 7
+    assert limiter.waits == 1
+
+def test_spent_pool_rejects_when_the_reset_is_far(monkeypatch):
+    monkeypatch.setattr(settings, "github_rate_limit_max_wait_seconds", 30.0)
+    limiter = GitHubRateLimiter(["aaaa1111"])
+
+    async def run():
+        budget = await limiter.acquire()
+        limiter.release(budget, rate_limited(0, reset_in=600))
+        await limiter.acquire()
+
+    with pytest.raises(GitHubRateLimitExceeded) as error:
+        asyncio.run(run())
+    assert error.value.retry_after > 500
+    assert limiter.rejected == 1
+
+def test_exhausted_rejections_are_retryable_on_the_reported_resource():
+    limiter = GitHubRateLimiter(["aaaa1111"])
+
+    async def run():
+        budget = await limiter.acquire("core")
+        return limiter.release(budget, rate_limited(0, status_code=403, resource="search"))
+
+    assert asyncio.run(run()) is True
+    assert limiter._pool("search")[0].remaining == 0
+    assert limiter._pool("core")[0].remaining is None
+    assert limiter._pool("core")[0].in_flight == 0
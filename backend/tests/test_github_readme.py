@@ -0,0 +1,59 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import github_resilience
+from app.core.config import settings
+from app.services import github_service as github_module
+from app.services.github_service import GitHubService
+
+@pytest.fixture(autouse=True)
+def fast_probes(monkeypatch):
+    monkeypatch.setattr(settings, "github_readme_strategy", "readme_endpoint")
+    monkeypatch.setattr(settings, "github_retry_max_attempts", 1)
+    monkeypatch.setattr(github_resilience, "_breakers", {})
+
+def repository(name, pushed_at="2024-01-01T00:00:00Z", **fields):
+    return {"name": name, "pushed_at": pushed_at, "has_readme": False, **fields}
+
+def sync(monkeypatch, listing, previous, readme_status):
+    service = GitHubService()
+    probed = []
+
+    async def fetch_pages(username, per_page, previous_pages, previous_by_name):
+        return [dict(repo) for repo in listing], {}, 0
+
+    def handler(request):
+        name = request.url.path.split("/")[3]
+        probed.append(name)
+        return httpx.Response(readme_status[name])
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(service, "_fetch_repository_pages_conditional", fetch_pages)
+    monkeypatch.setattr(github_module, "get_github_client", lambda: client)
+    previous_by_name = {repo["name"]: repo for repo in previous}
+    repositories, _ = asyncio.run(service._sync_user_repositories("octocat", 100, {}, previous_by_name))
+    return {repo["name"]: repo for repo in repositories}, probed
+
+def test_failed_probes_leave_has_readme_unknown(monkeypatch):
+    repositories, _ = sync(
+        monkeypatch,
+        [repository("docs"), repository("none"), repository("flaky")],
+        [],
+        {"docs": 200, "none": 404, "flaky": 503}
+    )
+    assert repositories["docs"]["has_readme"] is True
+    assert repositories["none"]["has_readme"] is False
+    assert "has_readme" not in repositories["flaky"]
+
+def test_unknown_readmes_are_probed_again_while_unchanged(monkeypatch):
+    previous = [
+        repository("docs", has_readme=True),
+        {key: value for key, value in repository("flaky").items() if key != "has_readme"}
+    ]
+    listing = [repository("docs"), repository("flaky")]
+    repositories, probed = sync(monkeypatch, listing, previous, {"flaky": 200})
+    assert probed == ["flaky"]
+    assert repositories["docs"]["has_readme"] is True
+    assert repositories["flaky"]["has_readme"] is True
@@ -0,0 +1,147 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import github_resilience
+from app.core.config import settings
+from app.core.github_resilience import CircuitBreaker, GitHubUnavailable, backoff_delay, is_retryable_response
+from app.services import github_service as github_module
+from app.services.github_service import GitHubService
+
+@pytest.fixture(autouse=True)
+def resilience_settings(monkeypatch):
+    monkeypatch.setattr(settings, "github_circuit_failure_threshold", 3)
+    monkeypatch.setattr(settings, "github_circuit_reset_seconds", 30.0)
+    monkeypatch.setattr(settings, "github_retry_max_attempts", 3)
+    monkeypatch.setattr(settings, "github_retry_base_seconds", 0.5)
+    monkeypatch.setattr(settings, "github_retry_max_seconds", 60.0)
+    monkeypatch.setattr(github_resilience, "_breakers", {})
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("api.github.com")
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.consecutive_failures == 0
+
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(GitHubUnavailable):
+        breaker.before_call()
+    assert breaker.rejected == 1
+
+def test_half_open_breaker_lets_one_trial_through():
+    breaker = CircuitBreaker("api.github.com")
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.opened_at -= settings.github_circuit_reset_seconds
+
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(GitHubUnavailable):
+        breaker.before_call()
+
+    # A failed trial re-opens the circuit, a successful one closes it
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.times_opened == 2
+    breaker.opened_at -= settings.github_circuit_reset_seconds
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+def test_abandoned_trial_frees_the_slot():
+    breaker = CircuitBreaker("api.github.com")
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.opened_at -= settings.github_circuit_reset_seconds
+    breaker.before_call()
+    breaker.record_abandoned()
+    breaker.before_call()
+
+def test_backoff_is_jittered_exponential_and_capped(monkeypatch):
+    monkeypatch.setattr(github_resilience.random, "uniform", lambda low, high: high)
+    assert [backoff_delay(attempt) for attempt in (1, 2, 3)] == [0.5, 1.0, 2.0]
+    assert backoff_delay(20) == 60.0
+
+def test_backoff_honors_retry_after_and_secondary_limits():
+    retry_after = httpx.Response(503, headers={"Retry-After": "7"})
+    assert backoff_delay(1, retry_after) == 7.0
+    assert backoff_delay(1, httpx.Response(503, headers={"Retry-After": "600"})) == 60.0
+    secondary = httpx.Response(403, headers={"X-RateLimit-Remaining": "10"}, text="You have exceeded a secondary rate limit")
+    assert is_retryable_response(secondary)
+    assert backoff_delay(1, secondary) == 60.0
+    # Primary budget exhaustion is the token pool's business, not a retry
+    assert not is_retryable_response(httpx.Response(403, headers={"X-RateLimit-Remaining": "0", "Retry-After": "5"}))
+    assert not is_retryable_response(httpx.Response(404))
+
+def send_with(monkeypatch, handler, method="GET"):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    slept = []
+
+    async def sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr(github_module, "get_github_client", lambda: client)
+    monkeypatch.setattr(github_module.asyncio, "sleep", sleep)
+    response = asyncio.run(GitHubService()._send(method, "https://api.github.com/users/octocat"))
+    return response, slept
+
+def test_reads_are_retried_until_they_succeed(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectTimeout("timed out", request=request)
+        if len(calls) == 2:
+            return httpx.Response(502)
+        return httpx.Response(200, json={"login": "octocat"})
+
+    response, slept = send_with(monkeypatch, handler)
+    assert response.status_code == 200
+    assert len(calls) == 3 and len(slept) == 2
+    assert github_resilience.circuit_breaker("api.github.com").consecutive_failures == 0
+
+def test_writes_are_not_retried(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    response, slept = send_with(monkeypatch, handler, method="POST")
+    assert response.status_code == 503
+    assert len(calls) == 1 and slept == []
+
+def test_repeated_failures_open_the_circuit(monkeypatch):
+    def handler(request):
+        return httpx.Response(500)
+
+    response, _ = send_with(monkeypatch, handler)
+    assert response.status_code == 500
+    with pytest.raises(GitHubUnavailable):
+        send_with(monkeypatch, handler)
+
+def test_unexpected_errors_release_the_half_open_trial(monkeypatch):
+    breaker = github_resilience.circuit_breaker("api.github.com")
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.opened_at -= settings.github_circuit_reset_seconds
+
+    def handler(request):
+        raise httpx.DecodingError("bad gzip", request=request)
+
+    with pytest.raises(httpx.DecodingError):
+        send_with(monkeypatch, handler)
+    assert breaker.state == "half_open" and not breaker.trial_in_flight
+
+    # The next call is let through as a new trial and can close the circuit
+    response, _ = send_with(monkeypatch, lambda request: httpx.Response(200))
+    assert response.status_code == 200
+    assert breaker.state == "closed"
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app.models.search import SearchCriteria
+from app.services.candidate_search_engine import CandidateSearchEngine
+from app.services.match_score import match_score, match_terms
+from app.services.search_service import SearchService
+
+from portfolios import PORTFOLIOS
+
+CRITERIA = [
+    SearchCriteria(),
+    SearchCriteria(skills=["python", "React"]),
+    SearchCriteria(primary_languages=["JavaScript"]),
+    SearchCriteria(skills=["Python"], primary_languages=["Python", "Go"], min_repositories=5),
+    SearchCriteria(min_github_score=60, sort_order="asc"),
+]
+
+@pytest.fixture
+def backends():
+    engine = CandidateSearchEngine()
+    for portfolio in PORTFOLIOS:
+        engine.upsert(portfolio)
+    engine.ready = True
+
+    service = SearchService()
+    service.db = AsyncMongoMockClient().portreview
+    asyncio.run(service.db.portfolios.insert_many([dict(portfolio) for portfolio in PORTFOLIOS]))
+    return engine, service
+
+def test_match_score_weights_only_searched_terms():
+    index = PORTFOLIOS[0]["search_index"]
+    # No term filters: craftsmanship and activity only
+    assert match_score(index, {}) == pytest.approx((0.82 * 0.25 + 0.6 * 0.2) / 0.45)
+    # Half of the searched skills matched
+    terms = {"skills": ["django", "go"]}
+    assert match_score(index, terms) == pytest.approx((0.5 * 0.3 + 0.82 * 0.25 + 0.6 * 0.2) / 0.75)
+
+def test_match_terms_reads_term_conditions():
+    conditions = {
+        "is_public": True,
+        "search_index.skills": {"$in": ["react", "python", "react"]},
+        "search_index.overall_score": {"$gte": 50}
+    }
+    assert match_terms(conditions) == {"skills": ["python", "react"]}
+
+@pytest.mark.parametrize("criteria", CRITERIA)
+def test_engine_and_mongo_rank_relevance_alike(backends, criteria):
+    engine, service = backends
+    conditions = service._build_match_conditions(criteria)
+
+    from_engine = engine.search(conditions, criteria.sort_by, criteria.sort_order == "desc", 100)
+    from_mongo = asyncio.run(service._search_mongo(criteria.copy(update={"limit": 100}), conditions, None))
+
+    assert from_engine["total_count"] == from_mongo["total_count"]
+    assert [str(doc["_id"]) for doc in from_engine["results"]] == [str(doc["_id"]) for doc in from_mongo["results"]]
+    for engine_doc, mongo_doc in zip(from_engine["results"], from_mongo["results"]):
+        assert engine_doc["match_score"] == pytest.approx(mongo_doc["match_score"])
+        expected = match_score(
+            next(p for p in PORTFOLIOS if p["_id"] == mongo_doc["_id"])["search_index"],
+            match_terms(conditions)
+        )
+        assert mongo_doc["match_score"] == pytest.approx(expected)
+
+def test_private_portfolios_are_not_ranked(backends):
+    engine, service = backends
+    conditions = service._build_match_conditions(SearchCriteria(skills=["python"]))
+    page = engine.search(conditions, "relevance", True, 100)
+    assert PORTFOLIOS[-1]["_id"] not in [doc["_id"] for doc in page["results"]]
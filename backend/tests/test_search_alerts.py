@@ -0,0 +1,106 @@
+import asyncio
+
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.models.search import SearchCriteria
+from app.services import search_alert_service as alert_module
+from app.services.search_alert_service import SearchAlertService
+from app.services.search_service import search_service
+
+from portfolios import PORTFOLIOS
+
+def saved_search(criteria, alerts_enabled=True):
+    return {"_id": ObjectId(), "criteria": criteria, "recruiter_id": "recruiter", "alerts_enabled": alerts_enabled}
+
+def matched_ids(service, portfolio):
+    return {compiled.saved_search_id for compiled in service.match(portfolio)}
+
+def use_database(monkeypatch):
+    database = AsyncMongoMockClient().portreview
+
+    async def get_database():
+        return database
+
+    monkeypatch.setattr(alert_module, "get_database", get_database)
+    monkeypatch.setattr(search_service, "db", database)
+    return database
+
+def test_searches_are_filed_under_their_terms():
+    service = SearchAlertService()
+    python = saved_search({"skills": ["Python"]})
+    rust_or_go = saved_search({"primary_languages": ["Rust", "Go"]})
+    anything = saved_search({"min_github_score": 90})
+    for search in (python, rust_or_go, anything):
+        service.add(search)
+
+    assert service.candidates(PORTFOLIOS[3], set()) == {str(rust_or_go["_id"]), str(anything["_id"])}
+    assert matched_ids(service, PORTFOLIOS[0]) == {str(python["_id"])}
+    assert matched_ids(service, PORTFOLIOS[3]) == {str(rust_or_go["_id"])}
+    assert matched_ids(service, PORTFOLIOS[5]) == {str(rust_or_go["_id"]), str(anything["_id"])}
+    # Private portfolios never alert
+    assert matched_ids(service, PORTFOLIOS[6]) == set()
+
+def test_custom_query_terms_gate_matches():
+    service = SearchAlertService()
+    search = saved_search({"custom_query": "fastapi"})
+    service.add(search)
+    assert matched_ids(service, PORTFOLIOS[4]) == {str(search["_id"])}
+    assert matched_ids(service, PORTFOLIOS[0]) == set()
+
+def test_readding_and_removing_keep_the_index_clean():
+    service = SearchAlertService()
+    search = saved_search({"skills": ["Python"]})
+    service.add(search)
+    service.add({**search, "criteria": {"skills": ["Go"]}})
+    assert matched_ids(service, PORTFOLIOS[0]) == set()
+    assert matched_ids(service, PORTFOLIOS[3]) == {str(search["_id"])}
+    service.remove(str(search["_id"]))
+    assert service._by_term == {} and service._searches == {}
+
+def test_local_changes_apply_immediately(monkeypatch):
+    use_database(monkeypatch)
+    service = SearchAlertService()
+    monkeypatch.setattr(search_service, "_saved_search_listeners", [service.saved_search_changed])
+
+    async def run():
+        search_id = await search_service.save_search(SearchCriteria(skills=["Python"]), "py", "recruiter", True)
+        assert matched_ids(service, PORTFOLIOS[0]) == {search_id}
+        assert await search_service.set_search_alerts(search_id, "recruiter", False)
+        assert matched_ids(service, PORTFOLIOS[0]) == set()
+        assert await search_service.set_search_alerts(search_id, "recruiter", True)
+        assert not await search_service.delete_saved_search(search_id, "someone else")
+        assert await search_service.delete_saved_search(search_id, "recruiter")
+        assert matched_ids(service, PORTFOLIOS[0]) == set()
+
+    asyncio.run(run())
+
+def test_refresh_drops_searches_deleted_elsewhere(monkeypatch):
+    database = use_database(monkeypatch)
+    service = SearchAlertService()
+    kept, deleted = saved_search({"skills": ["Python"]}), saved_search({"skills": ["Python"]})
+
+    async def run():
+        await database.saved_searches.insert_many([kept, deleted])
+        await service.load()
+        await database.saved_searches.delete_one({"_id": deleted["_id"]})
+        await service.refresh()
+
+    asyncio.run(run())
+    assert matched_ids(service, PORTFOLIOS[0]) == {str(kept["_id"])}
+
+def test_alerts_count_each_portfolio_once(monkeypatch):
+    database = use_database(monkeypatch)
+    service = SearchAlertService()
+    search = saved_search({"skills": ["Python"]})
+    service.add(search)
+
+    async def run():
+        for portfolio in (PORTFOLIOS[0], PORTFOLIOS[0], PORTFOLIOS[2]):
+            await service.portfolio_indexed(portfolio)
+        return await database.search_alerts.find_one({"saved_search_id": str(search["_id"])})
+
+    alert = asyncio.run(run())
+    assert alert["candidate_ids"] == [str(PORTFOLIOS[0]["_id"]), str(PORTFOLIOS[2]["_id"])]
+    assert alert["new_candidates_count"] == 2
+    assert service.alerts_recorded == 2
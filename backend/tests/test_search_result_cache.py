@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from app.core.config import settings
+from app.models.search import SearchCriteria
+from app.services import search_service as search_module
+from app.services.candidate_search_engine import CandidateSearchEngine
+from app.services.search_result_cache import SearchResultCache, conditions_match, criteria_cache_key
+from app.services.search_service import SearchService
+
+from portfolios import PORTFOLIOS, make_portfolio
+
+PYTHON = {"is_public": True, "search_index.skills": {"$in": ["python"]}}
+
+def ranked(portfolios):
+    return {"total_count": len(portfolios), "results": [{**portfolio, "sort_key": 1.0} for portfolio in portfolios]}
+
+def test_equivalent_criteria_share_a_key():
+    key = criteria_cache_key(SearchCriteria(skills=["React", "python"], custom_query="Next.js  apps"))
+    assert key == criteria_cache_key(SearchCriteria(skills=["python", "react", "React"], custom_query="next.js apps", offset=20))
+    assert key != criteria_cache_key(SearchCriteria(skills=["python"], custom_query="next.js apps"))
+
+def test_conditions_match_reads_search_index():
+    python, rust, private = PORTFOLIOS[0], PORTFOLIOS[5], PORTFOLIOS[6]
+    assert conditions_match(PYTHON, python) is True
+    assert conditions_match(PYTHON, rust) is False
+    assert conditions_match(PYTHON, private) is False
+    assert conditions_match({"search_index.overall_score": {"$gte": 90}}, rust) is True
+    # Conditions it cannot evaluate are reported as unknown
+    assert conditions_match({"search_index.skills": {"$all": ["python"]}}, python) is None
+    assert conditions_match({"title": "x"}, python) is None
+
+def test_writes_drop_only_the_entries_they_may_change():
+    cache = SearchResultCache()
+    python_ids = [PORTFOLIOS[0], PORTFOLIOS[2]]
+    cache.store("python", ranked(python_ids), PYTHON, False, cache.writes)
+    cache.store("text", ranked(python_ids), PYTHON, True, cache.writes)
+    cache.store("rust", ranked([PORTFOLIOS[5]]), {"search_index.skills": {"$in": ["rust"]}}, False, cache.writes)
+
+    # A listed portfolio changed; free-text rankings always go
+    cache.invalidate_portfolio(str(PORTFOLIOS[0]["_id"]), PORTFOLIOS[0])
+    assert cache.lookup("python") is None and cache.lookup("text") is None
+    assert cache.lookup("rust") is not None
+
+    # A new portfolio the filter matches
+    cache.store("python", ranked(python_ids), PYTHON, False, cache.writes)
+    newcomer = make_portfolio(["Rust"], ["Rust"], 70, 3)
+    cache.invalidate_portfolio(str(newcomer["_id"]), newcomer)
+    assert cache.lookup("rust") is None
+    assert cache.lookup("python") is not None
+
+    # Deleted portfolios only affect the entries listing them
+    cache.invalidate_portfolio(str(PORTFOLIOS[3]["_id"]))
+    assert cache.lookup("python") is not None
+    assert cache.invalidations == 3
+
+def test_truncated_entries_drop_for_unknown_previous_state(monkeypatch):
+    monkeypatch.setattr(settings, "search_cache_depth", 1)
+    cache = SearchResultCache()
+    cache.store("python", ranked(PORTFOLIOS[:3]), PYTHON, False, cache.writes)
+    rust = PORTFOLIOS[5]
+    cache.invalidate_portfolio(str(rust["_id"]), rust, rust)
+    assert cache.lookup("python") is not None
+    # It may have matched past the cached depth before this write
+    cache.invalidate_portfolio(str(rust["_id"]), rust)
+    assert cache.lookup("python") is None
+
+def test_rankings_computed_across_a_write_are_not_stored():
+    cache = SearchResultCache()
+    writes_before = cache.writes
+    cache.invalidate_portfolio(str(PORTFOLIOS[0]["_id"]))
+    assert cache.store("python", ranked(PORTFOLIOS[:1]), PYTHON, False, writes_before) is None
+    assert cache.lookup("python") is None
+
+def test_pages_slice_the_entry(monkeypatch):
+    monkeypatch.setattr(settings, "search_cache_depth", 4)
+    cache = SearchResultCache()
+    entry = cache.store("all", ranked(PORTFOLIOS[:5]), {}, False, cache.writes)
+    assert cache.page(entry, 0, 2) == (0, 3)
+    assert cache.page(entry, 2, 2) is None  # Runs past the cached depth
+    after = {"_id": PORTFOLIOS[0]["_id"], "by": "engine"}
+    assert cache.page(entry, 0, 2, after) == (1, 4)
+    assert cache.page(entry, 0, 2, {**after, "by": "mongo"}) is None
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(search_module, "search_result_cache", SearchResultCache())
+    monkeypatch.setattr(settings, "search_cache_enabled", True)
+    engine = CandidateSearchEngine()
+    for portfolio in PORTFOLIOS:
+        engine.upsert(portfolio)
+    engine.ready = True
+    monkeypatch.setattr(search_module, "candidate_search_engine", engine)
+    service = SearchService()
+    service._index_listeners = []
+    service.db = AsyncMongoMockClient().portreview
+    asyncio.run(service.db.portfolios.insert_many([dict(portfolio) for portfolio in PORTFOLIOS]))
+    return service
+
+def test_search_sees_its_own_writes(service):
+    cache = search_module.search_result_cache
+    criteria = SearchCriteria(skills=["go"], limit=10)
+    go = PORTFOLIOS[3]
+
+    async def run():
+        first = await service._cached_page(criteria, None)
+        again = await service._cached_page(criteria, None)
+        await service.db.portfolios.update_one({"_id": go["_id"]}, {"$set": {"skills": ["Rust"]}})
+        await service.index_portfolio(str(go["_id"]))
+        return first, again, await service._cached_page(criteria, None)
+
+    first, again, after_write = asyncio.run(run())
+    assert [doc["_id"] for doc in first["results"]] == [go["_id"]]
+    assert [doc["_id"] for doc in again["results"]] == [go["_id"]]
+    assert cache.hits == 1
+    assert after_write["results"] == [] and after_write["total_count"] == 0
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.services.portfolio_service import run_stage_graph
+
+def stage(dependencies, value, log, delay=0.0):
+    async def fn(results):
+        log.append(("start", value))
+        await asyncio.sleep(delay)
+        log.append(("end", value))
+        return value, {dep: results[dep] for dep in dependencies}
+    return dependencies, fn
+
+def test_stages_see_their_dependencies_results():
+    log = []
+    results, timings = asyncio.run(run_stage_graph({
+        "c": stage(["a", "b"], "c", log),
+        "a": stage([], "a", log),
+        "b": stage(["a"], "b", log)
+    }))
+    assert results["c"] == ("c", {"a": results["a"], "b": results["b"]})
+    assert log.index(("end", "a")) < log.index(("start", "b")) < log.index(("start", "c"))
+    assert set(timings["stages"]) == {"a", "b", "c"}
+    assert timings["total_ms"] >= 0
+
+def test_independent_stages_run_concurrently():
+    log = []
+    asyncio.run(run_stage_graph({
+        "root": stage([], "root", log),
+        "slow": stage(["root"], "slow", log, delay=0.05),
+        "fast": stage(["root"], "fast", log),
+        "after_fast": stage(["fast"], "after_fast", log)
+    }))
+    # after_fast does not wait for its unrelated sibling
+    assert log.index(("start", "slow")) < log.index(("end", "after_fast")) < log.index(("end", "slow"))
+
+def test_unknown_dependencies_and_cycles_are_rejected_before_running():
+    log = []
+    with pytest.raises(ValueError, match="unknown"):
+        asyncio.run(run_stage_graph({"a": stage(["missing"], "a", log)}))
+    with pytest.raises(ValueError, match="cycle"):
+        asyncio.run(run_stage_graph({
+            "root": stage([], "root", log),
+            "a": stage(["b"], "a", log),
+            "b": stage(["a"], "b", log)
+        }))
+    assert log == []
+
+def test_a_failing_stage_cancels_the_rest():
+    log = []
+
+    async def fail(results):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(run_stage_graph({
+            "fail": ([], fail),
+            "slow": stage([], "slow", log, delay=1.0),
+            "after": stage(["fail"], "after", log)
+        }))
+    assert ("end", "slow") not in log
+    assert ("start", "after") not in log
@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.core.config import settings
+from app.services.portfolio_service import PortfolioService
+from app.services.text_index_service import BM25Index, TextIndexService, text_index_service, tokenize
+
+def build_index(documents):
+    index = BM25Index()
+    for doc_id, text in documents.items():
+        index.add(doc_id, [(text, 1.0)])
+    return index
+
+def test_tokenize_keeps_technology_names():
+    assert tokenize("Built with Next.js, C++ and node-js!") == ["built", "next.js", "nextjs", "c++", "node-js", "nodejs"]
+
+def test_rarer_and_repeated_terms_rank_higher():
+    index = build_index({
+        "a": "python python django",
+        "b": "python flask",
+        "c": "rust tokio",
+        "d": "python"
+    })
+    ranked = [doc_id for doc_id, _ in index.search("python django")]
+    assert ranked[0] == "a"
+    assert set(ranked) == {"a", "b", "d"}
+    assert [doc_id for doc_id, _ in index.search("python django", limit=1)] == ["a"]
+
+def test_field_weights_multiply_term_frequency():
+    index = BM25Index()
+    index.add("title", [("react", 3.0), ("filler words here", 1.0)])
+    index.add("body", [("react", 1.0), ("filler words here", 1.0)])
+    assert [doc_id for doc_id, _ in index.search("react")] == ["title", "body"]
+
+def test_remove_and_readd_keep_statistics_consistent():
+    index = build_index({"a": "go kubernetes", "b": "go docker"})
+    index.remove("a")
+    assert index.document_frequency("kubernetes") == 0
+    assert [doc_id for doc_id, _ in index.search("go")] == ["b"]
+    index.add("b", [("rust", 1.0)])
+    assert index.search("go") == []
+    assert len(index) == 1
+
+def test_prefix_matches_rank_below_exact_matches():
+    index = build_index({"exact": "reac", "longer": "react", "other": "vue"})
+    assert index.search("reac") == index.search("reac", prefix=False)
+    ranked = [doc_id for doc_id, _ in index.search("reac", prefix=True)]
+    assert ranked == ["exact", "longer"]
+
+def test_prefix_vocabulary_follows_writes():
+    index = build_index({"a": "typescript"})
+    assert [doc_id for doc_id, _ in index.search("types", prefix=True)] == ["a"]
+    index.add("b", [("typesafe", 1.0)])
+    assert {doc_id for doc_id, _ in index.search("types", prefix=True)} == {"a", "b"}
+    index.remove("a")
+    assert [doc_id for doc_id, _ in index.search("types", prefix=True)] == ["b"]
+
+def test_ranked_page_filters_beyond_the_first_window(monkeypatch):
+    monkeypatch.setattr(settings, "text_index_max_candidates", 3)
+    service = TextIndexService()
+    for number in range(40):
+        service.index_user({"_id": f"user{number:02d}", "name": "python " * (number + 1)})
+
+    # Only every fifth hit passes the filter, so the page needs several windows
+    calls = []
+    async def keep(ids):
+        calls.append(len(ids))
+        return {doc_id for doc_id in ids if int(doc_id[4:]) % 5 == 0}
+
+    page = asyncio.run(service.ranked_page(service.users, "python", keep, 2, 4))
+    ranked = [doc_id for doc_id, _ in service.users.search("python")]
+    expected = [doc_id for doc_id in ranked if int(doc_id[4:]) % 5 == 0][2:6]
+    assert page == expected
+    assert calls[:2] == [3, 12]
+
+def test_ranked_page_is_none_without_hits():
+    service = TextIndexService()
+    service.index_user({"_id": "u", "name": "python"})
+    async def keep(ids):
+        return set(ids)
+    assert asyncio.run(service.ranked_page(service.users, "haskell", keep, 0, 10)) is None
+
+@pytest.fixture
+def portfolio_service(monkeypatch):
+    service = TextIndexService()
+    service.ready = True
+    monkeypatch.setattr("app.services.portfolio_service.text_index_service", service)
+    monkeypatch.setattr(settings, "text_index_max_candidates", 2)
+
+    database = AsyncMongoMockClient().portreview
+    now = datetime.utcnow()
+    portfolios = [
+        {"_id": ObjectId(), "title": f"React developer {number}", "description": "frontend work",
+         "skills": ["React"], "github_username": f"dev{number}", "is_public": number % 3 == 0,
+         "created_at": now, "updated_at": now}
+        for number in range(12)
+    ]
+    asyncio.run(database.portfolios.insert_many(portfolios))
+    for portfolio in portfolios:
+        service.index_portfolio(portfolio)
+    return PortfolioService(database), portfolios
+
+def test_search_portfolios_filters_visibility_before_paging(portfolio_service):
+    service, portfolios = portfolio_service
+    found = asyncio.run(service.search_portfolios(search="react", limit=20))
+    assert {p.id for p in found} == {str(p["_id"]) for p in portfolios if p["is_public"]}
+
+def test_search_portfolios_keeps_prefix_and_substring_matches(portfolio_service):
+    service, portfolios = portfolio_service
+    public = {str(p["_id"]) for p in portfolios if p["is_public"]}
+    # Prefix of an indexed term: served by the text index
+    assert {p.id for p in asyncio.run(service.search_portfolios(search="reac", limit=20))} == public
+    # Mid-word substring: no index hits, so the regex path still finds it
+    assert {p.id for p in asyncio.run(service.search_portfolios(search="ontend", limit=20))} == public
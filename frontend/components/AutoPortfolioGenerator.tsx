@@ -207,15 +207,37 @@ export default function AutoPortfolioGenerator({ onPortfolioCreated }: AutoPortf
       // Start loading animation
       await simulateLoadingSteps();
 
+      // Generation jobs belong to the signed-in user, so both calls need the token
+      const token = localStorage.getItem('auth_token');
+      const authHeaders: Record<string, string> = token ? { Authorization: `Bearer ${token}` } : {};
+
       const response = await fetch(`${API_BASE_URL}/api/auto-portfolio/create-from-github`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          ...authHeaders,
         },
         body: JSON.stringify({ github_username: effectiveUsername }),
       });
 
-      const data = await response.json();
+      let data = await response.json();
+
+      // Generation runs as a background job: poll until it finishes
+      if (response.status === 202 && data.status_url) {
+        let job = data;
+        while (job.status === 'queued' || job.status === 'running') {
+          await new Promise(resolve => setTimeout(resolve, 2000));
+          const jobResponse = await fetch(`${API_BASE_URL}${data.status_url}`, { headers: authHeaders });
+          job = await jobResponse.json();
+          if (!jobResponse.ok) {
+            throw new Error(job.detail || 'Failed to check portfolio generation status');
+          }
+        }
+        if (job.status !== 'succeeded') {
+          throw new Error(job.error || 'Failed to create portfolio');
+        }
+        data = { ...job.result, message: '🚀 Portfolio auto-generated successfully!' };
+      }
 
       if (response.ok) {
         setGeneratedPortfolio(data);
@@ -226,7 +248,7 @@ export default function AutoPortfolioGenerator({ onPortfolioCreated }: AutoPortf
         setSteps(prev => prev.map(step => ({ ...step, status: 'error' })));
       }
     } catch (err) {
-      setError('Network error. Please check if the backend is running.');
+      setError(err instanceof Error && !(err instanceof TypeError) ? err.message : 'Network error. Please check if the backend is running.');
       setSteps(prev => prev.map(step => ({ ...step, status: 'error' })));
     } finally {
       setIsGenerating(false);